@@ -21,12 +21,19 @@ Constants:
 MAP: What directions you can move from each cell in the maze. (list of list)
 MAZE: The details of the maze to solve. (dict)
 
+Run with the path of a maze file to play that maze instead. See maze_grid.py
+for the file formats. The rules of the game are in maze_engine.py.
+
 Classes:
 Maze: A maze game. (cmd.Cmd)
 """
 
 import cmd
-import random
+import itertools
+import sys
+
+from maze_engine import BUMPED, SOLVED, MazeEngine
+from maze_grid import MazeGrid
 
 # What directions you can move from each cell in the maze.
 MAP = [['se', 'ew', 'ws', 'es', 'we', 'ws', 'es', 'we', 'we', 'ws'],
@@ -35,7 +42,7 @@ MAP = [['se', 'ew', 'ws', 'es', 'we', 'ws', 'es', 'we', 'we', 'ws'],
     ['se', 'wen', 'wn', 'se', 'nsw', 'ne', 'w', 'se', 'ewn', 'wn'],
     ['ne', 'ew', 'ew', 'nw', 'ne', 'w', 'e', 'wen', 'ew', 'w']]
 # The details of the maze to solve.
-MAZE = {'map': MAP, 'start': (0, 0), 'end': (9, 4)}
+MAZE = {'grid': MazeGrid.from_map(MAP), 'start': (0, 0), 'end': (9, 4)}
 
 class Maze(cmd.Cmd):
     """
@@ -45,15 +52,13 @@ class Maze(cmd.Cmd):
     directions: Abbreviations for movement directions. (dict of str: str)
 
     Attributes:
-    current: The possible moves from the current location. (str)
-    map: What directions you can move from each cell in the maze. (list of list)
-    start: The starting coordinates of the player. (tuple of int)
-    x: The x coordinate of the current location. (int)
-    y: The y location of the current coordinate. (int)
+    engine: The game being played. (MazeEngine)
 
     Methods:
     do_east: Move to the east. (bool)
+    do_hint: Show which way to go to get out of the maze. (bool)
     do_north: Move to the north. (bool)
+    do_solve: Show the way out of the maze. (bool)
     do_south: Move to the couth. (bool)
     do_west: Move to the west. (bool)
     move: Move in the maze. (bool)
@@ -68,28 +73,45 @@ class Maze(cmd.Cmd):
 
     def do_east(self, arg):
         """Move to the east. Add an integer argument to move multiple times."""
-        return self.move('e', 1, 0, arg)
+        return self.move('e', arg)
+
+    def do_hint(self, arg):
+        """Show which way to go to get out of the maze."""
+        letter = self.engine.hint()
+        if letter is None:
+            print('There is no way out from here.')
+        else:
+            print('Try going {}.'.format(self.directions[letter]))
 
     def do_north(self, arg):
         """Move to the north. Add an integer argument to move multiple times."""
-        return self.move('n', 0, -1, arg)
+        return self.move('n', arg)
+
+    def do_solve(self, arg):
+        """Show the way out of the maze."""
+        moves = self.engine.solve()
+        if moves is None:
+            print('There is no way out from here.')
+        else:
+            # Group the moves into runs in the same direction.
+            runs = ['{} {}'.format(self.directions[letter], len(list(group)))
+                for letter, group in itertools.groupby(moves)]
+            print('The way out is {}.'.format(', '.join(runs)))
 
     def do_south(self, arg):
         """Move to the south. Add an integer argument to move multiple times."""
-        return self.move('s', 0, 1, arg)
+        return self.move('s', arg)
 
     def do_west(self, arg):
         """Move to the west. Add an integer argument to move multiple times."""
-        return self.move('w', -1, 0, arg)
+        return self.move('w', arg)
 
-    def move(self, check, delta_x, delta_y, arg):
+    def move(self, direction, arg):
         """
         Move in the maze. (bool)
 
         Parameters:
-        check: The character for checking for valid directions. (str)
-        delta_x: How much to move on the x axis. (int)
-        delta_y: How much to move on the y axis. (int)
+        direction: The letter of the direction to move. (str)
         arg: The arguments passed with the movement command. (str)
         """
         # Check for moving multiple times.
@@ -97,20 +119,15 @@ class Maze(cmd.Cmd):
             times = int(arg)
         else:
             times = 1
-        for movement in range(times):
-            # Check for a valid move
-            if check not in self.current:
-                self.ow()
-                break
-            # Update the player's postion.
-            self.x += delta_x
-            self.y += delta_y
-            self.current = self.map[self.y][self.x]
-            print('moving...')
-            # Check for solving the maze.
-            if (self.x, self.y) == self.end:
-                print('You made it out of the maze!')
-                return True
+        event = self.engine.move(direction, times)
+        # Describe the move.
+        if event.steps:
+            print('moving...' if event.steps == 1 else 'moving {} steps...'.format(event.steps))
+        if event.kind == SOLVED:
+            print('You made it out of the maze!')
+            return True
+        elif event.kind == BUMPED:
+            self.ow()
         # Show the next location if not solved.
         self.show_directions()
 
@@ -120,13 +137,8 @@ class Maze(cmd.Cmd):
 
     def preloop(self):
         """Prep for the command loop. (None)"""
-        # Extract the maze data.
-        self.map = MAZE['map']
-        self.x = MAZE['start'][0]
-        self.y = MAZE['start'][1]
-        self.end = MAZE['end']
-        # Set the starting location for validity checks.
-        self.current = self.map[self.y][self.x]
+        # Start a game with the maze data.
+        self.engine = MazeEngine(MAZE['grid'], MAZE['start'], MAZE['end'])
         # Print an introduction.
         print('You are in a maze.')
         print('You have a torch, but it barely lights past the end of your hand.')
@@ -136,19 +148,24 @@ class Maze(cmd.Cmd):
     def show_directions(self):
         """Show the ways the player can move. (None)"""
         # Get the valid moves.
-        direction_words = [self.directions[direction] for direction in self.current]
+        direction_words = [self.directions[direction] for direction in self.engine.directions()]
         # Select message based on number of valid moves.
-        if len(self.current) == 1:
+        if not direction_words:
+            message = 'You are boxed in. You can not move at all.'
+        elif len(direction_words) == 1:
             message = 'You are in a dead end. You can only move to the {}.'
-        elif len(self.current) == 2:
+        elif len(direction_words) == 2:
             message = 'You are in a hallway. You can move {} or {}.'
-        elif len(self.current) == 3:
+        elif len(direction_words) == 3:
             message = 'You are at an intersection. You can move {}, {}, or {}.'
-        elif len(self.current) == 4:
+        elif len(direction_words) == 4:
             message = 'You are in an open space. You can move {}, {}, {}, or {}'
         # Display the message.
         print(message.format(*direction_words))
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        grid = MazeGrid.load(sys.argv[1])
+        MAZE.update(grid = grid, start = grid.start, end = grid.end)
     maze = Maze()
     maze.cmdloop()
\ No newline at end of file
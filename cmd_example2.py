@@ -22,12 +22,23 @@ HELP_TEXT: The text to display for general help. (str)
 MAP: What directions you can move from each cell in the maze. (list of list)
 MAZE: The details of the maze to solve. (dict)
 
+Run with the path of a maze file to play that maze instead. See maze_grid.py
+for the file formats.
+
+The rules of the game are in maze_engine.py. The Maze class only turns
+commands into engine actions and the engine's events into text.
+
 Classes:
 Maze: A maze game. (cmd.Cmd)
 """
 
 import cmd
+import itertools
 import random
+import sys
+
+from maze_engine import BUMPED, NOTHING, MazeEngine
+from maze_grid import MazeGrid
 
 # The text to display for general help.
 HELP_TEXT = """This is a maze game. The only info you get is what directions you can move from
@@ -42,7 +53,7 @@ MAP = [['se', 'ew', 'ws', 'es', 'we', 'ws', 'es', 'we', 'we', 'ws'],
     ['se', 'wen', 'wn', 'se', 'nsw', 'ne', 'w', 'se', 'ewn', 'wn'],
     ['ne', 'ew', 'ew', 'nw', 'ne', 'w', 'e', 'wen', 'ew', 'w']]
 # The details of the maze to solve.
-MAZE = {'map': MAP, 'start': (0, 0), 'end': (9, 4)}
+MAZE = {'grid': MazeGrid.from_map(MAP), 'start': (0, 0), 'end': (9, 4)}
 
 
 class Maze(cmd.Cmd):
@@ -53,21 +64,29 @@ class Maze(cmd.Cmd):
     directions: Abbreviations for movement directions. (dict of str: str)
 
     Attributes:
-    map: What directions you can move from each cell in the maze. (list of list)
-    start: The starting coordinates of the player. (tuple)
+    engine: The game being played. (MazeEngine)
+    seed: The seed for the game's random number generator. (int)
 
     Methods:
+    do_EOF: Quit when the input runs out. (bool)
     do_east: Move to the east. (bool)
+    do_hint: Show which way to go to get out of the maze. (bool)
     do_north: Move to the north. (bool)
     do_quit: Give up and quit. (bool)
+    do_solve: Show the way out of the maze. (bool)
     do_south: Move to the couth. (bool)
     do_west: Move to the west. (bool)
+    do_xyzzy: Try a magic word. (bool)
     move: Move in the maze. (bool)
     ow: Bump into a wall. (None)
-    show_directions: Show the ways the player can move. (None)
+    reset: Put the player back at the start of the maze. (None)
+    show_directions: Show the ways the player can move. (str)
+    snapshot: Get the state to check when replaying a journal. (tuple)
 
     Overridden Methods:
+    __init__
     do_help
+    postcmd
     precmd
     preloop
     """
@@ -76,69 +95,88 @@ class Maze(cmd.Cmd):
     intro = 'You are in a maze.\nYou have a torch, but it barely lights past the end of your hand.'
     prompt = 'In the maze: '
 
+    def __init__(self, completekey = 'tab', stdin = None, stdout = None, seed = None):
+        """
+        Set up the game's files and random numbers. (None)
+
+        A random seed is picked if none is given, so that it can be recorded.
+
+        Parameters:
+        completekey: The key for command completion. (str)
+        stdin: The input file for the game. (file)
+        stdout: The output file for the game. (file)
+        seed: The seed for the game's random number generator. (int or None)
+        """
+        super().__init__(completekey, stdin, stdout)
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.engine = None
+
     def do_east(self, arg):
         """Move to the east. Add an integer argument to move multiple times."""
-        return self.move('e', 1, 0, arg)
+        return self.move('e', arg)
+
+    def do_EOF(self, arg):
+        """Quit when the input runs out."""
+        return True
 
     def do_help(self, arg):
         """Get help on a command, or just help for general help."""
         if arg:
             super().do_help(arg)
         else:
-            print(HELP_TEXT)
+            print(HELP_TEXT, file = self.stdout)
+
+    def do_hint(self, arg):
+        """Show which way to go to get out of the maze."""
+        letter = self.engine.hint()
+        if letter is None:
+            print('There is no way out from here.', file = self.stdout)
+        else:
+            print('Try going {}.'.format(self.directions[letter]), file = self.stdout)
 
     def do_north(self, arg):
         """Move to the north. Add an integer argument to move multiple times."""
-        return self.move('n', 0, -1, arg)
+        return self.move('n', arg)
 
     def do_quit(self, arg):
         """Give up and quit."""
         return True
 
+    def do_solve(self, arg):
+        """Show the way out of the maze."""
+        moves = self.engine.solve()
+        if moves is None:
+            print('There is no way out from here.', file = self.stdout)
+        else:
+            # Group the moves into runs in the same direction.
+            runs = ['{} {}'.format(self.directions[letter], len(list(group)))
+                for letter, group in itertools.groupby(moves)]
+            print('The way out is {}.'.format(', '.join(runs)), file = self.stdout)
+
     def do_south(self, arg):
         """Move to the south. Add an integer argument to move multiple times."""
-        return self.move('s', 0, 1, arg)
+        return self.move('s', arg)
 
     def do_west(self, arg):
         """Move to the west. Add an integer argument to move multiple times."""
-        return self.move('w', -1, 0, arg)
+        return self.move('w', arg)
 
     def do_xyzzy(self, arg):
-        if random.random() < 0.23:
-            self.x = random.randrange(len(self.map[0]))
-            self.y = random.randrange(len(self.map))
-            print('Poof! You have been teleported!')
+        """Try a magic word."""
+        if self.engine.teleport().kind == NOTHING:
+            print('Nothing happens.', file = self.stdout)
         else:
-            print('Nothing happens.')
+            print('Poof! You have been teleported!', file = self.stdout)
 
-    def move(self, check, delta_x, delta_y):
+    def move(self, direction, arg):
         """
         Move in the maze. (bool)
 
         The return value is the stop flag for the do_direction method that called this
-        method.
+        method. Solving the maze is checked for in postcmd.
 
         Parameters:
-        check: The character for checking for valid directions. (str)
-        delta_x: How much to move on the x axis. (int)
-        delta_y: How much to move on the y axis. (int)
-        """
-        # Check for a valid move.
-        if check not in self.current:
-            return self.ow()
-        # Update the current location.
-        self.x += delta_x
-        self.y += delta_y
-        self.current = self.map[self.y][self.x]
-
-    def move(self, check, delta_x, delta_y, arg):
-        """
-        Move in the maze. (bool)
-
-        Parameters:
-        check: The character for checking for valid directions. (str)
-        delta_x: How much to move on the x axis. (int)
-        delta_y: How much to move on the y axis. (int)
+        direction: The letter of the direction to move. (str)
         arg: The arguments passed with the movement command. (str)
         """
         # Check for moving multiple times.
@@ -146,20 +184,17 @@ class Maze(cmd.Cmd):
             times = int(arg)
         else:
             times = 1
-        for movement in range(times):
-            # Check for a valid move
-            if check not in self.current:
-                self.ow()
-                break
-            # Update the player's postion.
-            self.x += delta_x
-            self.y += delta_y
-            self.current = self.map[self.y][self.x]
-            print('moving...')
+        event = self.engine.move(direction, times)
+        # Describe the move.
+        if event.steps:
+            message = 'moving...' if event.steps == 1 else 'moving {} steps...'.format(event.steps)
+            print(message, file = self.stdout)
+        if event.kind == BUMPED:
+            self.ow()
 
     def ow(self):
         """ Bump into a wall. (None) """
-        print('Ow! You bump into a wall.')
+        print('Ow! You bump into a wall.', file = self.stdout)
 
     def precmd(self, line):
         """
@@ -175,14 +210,13 @@ class Maze(cmd.Cmd):
 
     def preloop(self):
         """ Prep for the command loop. (None)"""
-        # Extract the information from the MAZE global.
-        self.map = MAZE['map']
-        self.x = MAZE['start'][0]
-        self.y = MAZE['start'][1]
-        self.end = MAZE['end']
-        # Get the moves for the start position
-        self.current = self.map[self.y][self.x]
-        self.intro = '{}\n{}'.format(self.intro, self.show_directions())
+        # Start a game with the information from the MAZE global, or restart the last one.
+        if self.engine is None:
+            self.engine = MazeEngine(MAZE['grid'], MAZE['start'], MAZE['end'], self.seed)
+        else:
+            self.reset()
+        # Build the intro from the class's, so it doesn't grow if the loop is run again.
+        self.intro = '{}\n{}'.format(type(self).intro, self.show_directions())
 
     def postcmd(self, stop, line):
         """
@@ -193,29 +227,42 @@ class Maze(cmd.Cmd):
         line: The user command input. (str)
         """
         # Check for a solution.
-        if (self.x, self.y) == self.end:
-            print('You made it out of the maze!')
+        if (self.engine.x, self.engine.y) == self.engine.end:
+            print('You made it out of the maze!', file = self.stdout)
             stop = True
         elif not stop:
-            print(self.show_directions())
+            print(self.show_directions(), file = self.stdout)
         return stop
 
+    def reset(self):
+        """Put the player back at the start of the maze. (None)"""
+        self.engine.reset()
+
     def show_directions(self):
         """Show the ways the player can move. (str)"""
         # Get the valid moves.
-        direction_words = [self.directions[direction] for direction in self.current]
+        direction_words = [self.directions[direction] for direction in self.engine.directions()]
         # Select message based on number of valid moves.
-        if len(self.current) == 1:
+        if not direction_words:
+            message = 'You are boxed in. You can not move at all.'
+        elif len(direction_words) == 1:
             message = 'You are in a dead end. You can only move to the {}.'
-        elif len(self.current) == 2:
+        elif len(direction_words) == 2:
             message = 'You are in a hallway. You can move {} or {}.'
-        elif len(self.current) == 3:
+        elif len(direction_words) == 3:
             message = 'You are at an intersection. You can move {}, {}, or {}.'
-        elif len(self.current) == 4:
+        elif len(direction_words) == 4:
             message = 'You are in an open space. You can move {}, {}, {}, or {}'
         # Return the message.
         return message.format(*direction_words)
 
+    def snapshot(self):
+        """Get the state to check when replaying a journal. (tuple)"""
+        return (self.engine.x, self.engine.y, self.engine.rng.getstate())
+
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        grid = MazeGrid.load(sys.argv[1])
+        MAZE.update(grid = grid, start = grid.start, end = grid.end)
     maze = Maze()
     maze.cmdloop()
\ No newline at end of file
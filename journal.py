@@ -0,0 +1,459 @@
+"""
+journal.py
+
+Record menu and maze sessions, and replay them exactly.
+
+A journal is an append-only binary log of one session: everything the session
+reads from its input, the seed of the session's random number generator, and
+periodic checkpoints of its state. Sessions are Menu subclasses or cmd.Cmd
+subclasses like cmd_example2.Maze. They must take stdin, stdout, and seed
+keyword arguments, use the seed for all of their randomness, and have a
+snapshot method returning the state to check.
+
+Replaying a journal feeds the recorded input back to a new session, checking
+its state against each checkpoint, with all output thrown away. A replay that
+drifts from the recording raises a ValueError at the first checkpoint that
+doesn't match. Recording and replaying both run the session with play, so
+they take exactly the same steps, from preloop through postloop, except that
+replays don't draw the menu. Page commands depend on the page size, so menus
+using them only replay the same if they set page_size.
+
+The journal is flushed at each checkpoint. If the session crashes partway
+through writing a record, reading the journal stops before the cut off record.
+
+The file is b'JRNL' followed by records. Each record is a kind byte, the length
+of the data as a variable length integer, and the data:
+
+    SEED: The seed as decimal text.
+    LINE: A line of input as UTF-8 text.
+    CHECKPOINT: An eight byte digest of the session's snapshot.
+
+Run as a script to record or replay a session:
+
+    python journal.py record menu_test:TopMenu session.jrnl
+    python journal.py replay menu_test:TopMenu session.jrnl
+
+Constants:
+CHECKPOINT: The record kind for state checkpoints. (int)
+LINE: The record kind for lines of input. (int)
+MAGIC: The bytes that start every journal. (bytes)
+SEED: The record kind for the random seed. (int)
+
+Classes:
+JournalWriter: An append-only journal file. (object)
+NullWriter: An output file that throws away everything. (object)
+RecordingReader: An input file that records what is read from it. (object)
+ReplayReader: An input file that reads from a journal. (object)
+
+Functions:
+digest: Get the checkpoint digest of a session's state. (bytes)
+main: Record or replay a session from the command line. (None)
+play: Run a session on its own input, from start to finish. (None)
+read_records: Read the records of a journal. (generator)
+record: Run a session, recording it to a journal. (object)
+replay: Rerun a recorded session, checking its state. (int)
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+
+from menu import load_class
+
+# The record kind for state checkpoints.
+CHECKPOINT = 3
+# The record kind for lines of input.
+LINE = 2
+# The bytes that start every journal.
+MAGIC = b'JRNL'
+# The record kind for the random seed.
+SEED = 1
+
+def digest(state):
+    """
+    Get the checkpoint digest of a session's state. (bytes)
+
+    Parameters:
+    state: The session's snapshot. (object)
+    """
+    return hashlib.blake2b(repr(state).encode(), digest_size = 8).digest()
+
+class JournalWriter(object):
+    """
+    An append-only journal file. (object)
+
+    Attributes:
+    file: The open journal file. (file)
+
+    Methods:
+    checkpoint: Record a checkpoint of a session's state. (None)
+    close: Close the journal, with a final checkpoint. (None)
+    line: Record a line of input. (None)
+    write: Write a record to the journal. (None)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, path, seed):
+        """
+        Start a new journal and record the seed. (None)
+
+        Parameters:
+        path: The path of the journal file. (str)
+        seed: The seed for the session's random number generator. (int)
+        """
+        self.file = open(path, 'wb', buffering = 2 ** 16)
+        self.file.write(MAGIC)
+        self.write(SEED, str(seed).encode())
+
+    def checkpoint(self, state):
+        """
+        Record a checkpoint of a session's state. (None)
+
+        The journal is flushed at each checkpoint, so little is lost if the
+        session crashes.
+
+        Parameters:
+        state: The session's snapshot. (object)
+        """
+        self.write(CHECKPOINT, digest(state))
+        self.file.flush()
+
+    def close(self, state = None):
+        """
+        Close the journal, with a final checkpoint. (None)
+
+        Parameters:
+        state: The session's final snapshot, or None for no checkpoint. (object)
+        """
+        if state is not None:
+            self.checkpoint(state)
+        self.file.close()
+
+    def line(self, text):
+        """
+        Record a line of input. (None)
+
+        Parameters:
+        text: The line, including any line ending. (str)
+        """
+        self.write(LINE, text.encode())
+
+    def write(self, kind, data):
+        """
+        Write a record to the journal. (None)
+
+        Parameters:
+        kind: The kind of record. (int)
+        data: The data of the record. (bytes)
+        """
+        # Short records get a one byte length.
+        size = len(data)
+        if size < 128:
+            self.file.write(bytes((kind, size)) + data)
+            return
+        header = bytearray((kind,))
+        while size >= 128:
+            header.append(size & 127 | 128)
+            size >>= 7
+        header.append(size)
+        self.file.write(bytes(header) + data)
+
+class NullWriter(object):
+    """
+    An output file that throws away everything. (object)
+
+    Methods:
+    flush: Do nothing. (None)
+    write: Throw away the text. (int)
+    """
+
+    def flush(self):
+        """Do nothing. (None)"""
+        pass
+
+    def write(self, text):
+        """
+        Throw away the text. (int)
+
+        Parameters:
+        text: The text that would have been written. (str)
+        """
+        return len(text)
+
+class RecordingReader(object):
+    """
+    An input file that records what is read from it. (object)
+
+    Attributes:
+    count: The number of lines read. (int)
+    every: The number of lines between checkpoints. (int)
+    journal: The journal to record to. (JournalWriter)
+    snapshot: The function giving the session's state. (callable or None)
+    stream: The input file being recorded. (file)
+
+    Methods:
+    readline: Read and record a line. (str)
+
+    Overridden Methods:
+    __init__
+    __iter__
+    """
+
+    def __init__(self, stream, journal, every = 1000):
+        """
+        Set up the recording. (None)
+
+        Parameters:
+        stream: The input file to record. (file)
+        journal: The journal to record to. (JournalWriter)
+        every: The number of lines between checkpoints. (int)
+        """
+        self.stream = stream
+        self.journal = journal
+        self.every = every
+        self.snapshot = None
+        self.count = 0
+
+    def __iter__(self):
+        """Iterate over the lines read. (generator)"""
+        return iter(self.readline, '')
+
+    def readline(self):
+        """Read and record a line. (str)"""
+        # Check the state before every so many lines.
+        self.count += 1
+        if self.snapshot is not None and not self.count % self.every:
+            self.journal.checkpoint(self.snapshot())
+        line = self.stream.readline()
+        if line:
+            self.journal.line(line)
+        return line
+
+class ReplayReader(object):
+    """
+    An input file that reads from a journal. (object)
+
+    Checkpoints are taken just before reading a line, and once more after the
+    session finishes. A checkpoint is only checked once the record after it
+    has been read, so the last one is left for finish, after the replayed
+    session has finished too.
+
+    Attributes:
+    checkpoints: The number of checkpoints checked. (int)
+    count: The number of lines read. (int)
+    pending: The last checkpoint read, if it hasn't been checked. (bytes or None)
+    records: The remaining records of the journal. (iterator of tuple)
+    snapshot: The function giving the session's state. (callable or None)
+
+    Methods:
+    check: Check a checkpoint against the session's state. (None)
+    finish: Check any checkpoints left in the journal. (None)
+    readline: Read the next recorded line. (str)
+
+    Overridden Methods:
+    __init__
+    __iter__
+    """
+
+    def __init__(self, records):
+        """
+        Set up the replay. (None)
+
+        Parameters:
+        records: The records of the journal after the seed. (iterator of tuple)
+        """
+        self.records = records
+        self.snapshot = None
+        self.checkpoints = 0
+        self.count = 0
+        self.pending = None
+
+    def __iter__(self):
+        """Iterate over the recorded lines. (generator)"""
+        return iter(self.readline, '')
+
+    def check(self, data):
+        """
+        Check a checkpoint against the session's state. (None)
+
+        Parameters:
+        data: The digest from the checkpoint record. (bytes)
+        """
+        self.checkpoints += 1
+        if self.snapshot is not None and digest(self.snapshot()) != data:
+            raise ValueError('Replay does not match the journal at checkpoint {}.'.format(self.checkpoints))
+
+    def finish(self):
+        """Check any checkpoints left in the journal. (None)"""
+        for kind, data in self.records:
+            if kind != CHECKPOINT:
+                raise ValueError('Replay ended before the journal did.')
+            if self.pending is not None:
+                self.check(self.pending)
+            self.pending = data
+        if self.pending is not None:
+            self.check(self.pending)
+            self.pending = None
+
+    def readline(self):
+        """Read the next recorded line. (str)"""
+        for kind, data in self.records:
+            if kind not in (LINE, CHECKPOINT):
+                raise ValueError('Unexpected record in journal: {}.'.format(kind))
+            # The checkpoint before this record was taken at this read.
+            if self.pending is not None:
+                self.check(self.pending)
+                self.pending = None
+            if kind == LINE:
+                self.count += 1
+                return data.decode()
+            self.pending = data
+        return ''
+
+def main(args):
+    """
+    Record or replay a session from the command line. (None)
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Record or replay menu sessions.')
+    parser.add_argument('mode', choices = ('record', 'replay'))
+    parser.add_argument('session', help = "The session class, as 'module:name'.")
+    parser.add_argument('path', help = 'The journal file.')
+    parser.add_argument('--seed', type = int, default = None)
+    options = parser.parse_args(args)
+    session_class = load_class(options.session)
+    if options.mode == 'record':
+        record(session_class, options.path, seed = options.seed)
+    else:
+        count = replay(session_class, options.path)
+        print('Replayed {} lines, all checkpoints matched.'.format(count))
+
+def play(session, render = True):
+    """
+    Run a session on its own input, from start to finish. (None)
+
+    Menus are started, drawn and given choices until one stops the menu or
+    the input runs out, and then finished. If render is False, the menu isn't
+    drawn. Its pages are still worked out for page commands, and the status is
+    still cleared, so the session's state changes the same way. A choice
+    needing more input than is left ends the session like the end of the input
+    does. cmd.Cmd sessions are run with cmdloop, reading their own stdin.
+
+    Parameters:
+    session: The Menu or cmd.Cmd instance to run. (object)
+    render: A flag for drawing the menu before each choice. (bool)
+    """
+    if not hasattr(session, 'menuloop'):
+        session.use_rawinput = False
+        session.cmdloop()
+        return
+    stop = session.start(capture = False).stop
+    if session.intro:
+        session.print(session.intro)
+    while not stop:
+        if render:
+            session.stdout.write(session.render())
+        else:
+            # Do what drawing the menu does to the session's state.
+            session.paginate()
+            session.status = ''
+        line = session.stdin.readline()
+        if not line:
+            break
+        try:
+            stop = session.choose(line.strip(), capture = False).stop
+        except EOFError:
+            break
+    session.finish(capture = False)
+
+def read_records(path):
+    """
+    Read the records of a journal. (generator)
+
+    Each record is a tuple of the kind and the data. A record cut off by the
+    end of the file, as left by a crash, ends the records.
+
+    Parameters:
+    path: The path of the journal file. (str)
+    """
+    with open(path, 'rb') as journal_file:
+        data = journal_file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('{} is not a journal file.'.format(path))
+    view = memoryview(data)
+    index, end = len(MAGIC), len(data)
+    while index + 2 <= end:
+        kind, size = data[index], data[index + 1]
+        index += 2
+        # Decode longer lengths.
+        if size >= 128:
+            size &= 127
+            shift = 7
+            while index < end:
+                byte = data[index]
+                index += 1
+                size |= (byte & 127) << shift
+                shift += 7
+                if byte < 128:
+                    break
+            else:
+                return
+        if index + size > end:
+            return
+        yield kind, view[index:index + size].tobytes()
+        index += size
+
+def record(session_class, path, stdin = None, stdout = None, seed = None, every = 1000):
+    """
+    Run a session, recording it to a journal. (object)
+
+    The return value is the session, after it has finished.
+
+    Parameters:
+    session_class: The Menu or cmd.Cmd subclass to run. (type)
+    path: The path of the journal file. (str)
+    stdin: The input file for the session. (file)
+    stdout: The output file for the session. (file)
+    seed: The seed for the session, or None for a random one. (int)
+    every: The number of lines between checkpoints. (int)
+    """
+    seed = random.getrandbits(64) if seed is None else seed
+    journal = JournalWriter(path, seed)
+    reader = RecordingReader(sys.stdin if stdin is None else stdin, journal, every)
+    session = session_class(stdin = reader, stdout = stdout, seed = seed)
+    reader.snapshot = session.snapshot
+    try:
+        play(session)
+    finally:
+        journal.close(session.snapshot())
+    return session
+
+def replay(session_class, path):
+    """
+    Rerun a recorded session, checking its state. (int)
+
+    The return value is the number of lines replayed. A ValueError is raised
+    if the session's state doesn't match a checkpoint.
+
+    Parameters:
+    session_class: The Menu or cmd.Cmd subclass that was recorded. (type)
+    path: The path of the journal file. (str)
+    """
+    records = read_records(path)
+    kind, seed = next(records, (None, None))
+    if kind != SEED:
+        raise ValueError('{} does not start with a seed.'.format(path))
+    reader = ReplayReader(records)
+    session = session_class(stdin = reader, stdout = NullWriter(), seed = int(seed))
+    reader.snapshot = session.snapshot
+    play(session, render = False)
+    reader.finish()
+    return reader.count
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,212 @@
+"""
+maze_engine.py
+
+A headless maze game.
+
+The engine keeps track of the player in a MazeGrid and returns an event for
+each action, without formatting or printing anything. The cmd examples are
+text adapters over it, and automated players can drive it directly:
+
+    engine = MazeEngine(maze_gen.generate(1000, 1000, seed = 1))
+    event = engine.move('e', 100)
+    if event.kind == BUMPED:
+        ...
+
+Moves of any length cost one lookup in the grid's corridor lengths, and stop
+early at the exit if it is along the way. Players that send many single steps
+at once can use walk, which handles a whole string of moves in one call.
+
+Constants:
+BUMPED: The event kind for running into a wall. (str)
+MOVED: The event kind for moving the full distance asked for. (str)
+NOTHING: The event kind for an action that had no effect. (str)
+SOLVED: The event kind for reaching the exit. (str)
+TELEPORTED: The event kind for being teleported. (str)
+
+Classes:
+MazeEngine: The state and rules of a maze game. (object)
+MazeEvent: The result of an action in the maze. (tuple)
+"""
+
+from collections import namedtuple
+import random
+
+from maze_grid import DELTAS
+
+# The event kind for running into a wall, possibly after moving some steps.
+BUMPED = 'bumped'
+# The event kind for moving the full distance asked for.
+MOVED = 'moved'
+# The event kind for an action that had no effect.
+NOTHING = 'nothing'
+# The event kind for reaching the exit.
+SOLVED = 'solved'
+# The event kind for being teleported.
+TELEPORTED = 'teleported'
+
+MazeEvent = namedtuple('MazeEvent', 'kind steps x y')
+MazeEvent.__doc__ = """
+The result of an action in the maze. (tuple)
+
+Attributes:
+kind: What happened, one of the event kind constants. (str)
+steps: The number of cells moved. (int)
+x: The column of the player after the action. (int)
+y: The row of the player after the action. (int)
+"""
+
+class MazeEngine(object):
+    """
+    The state and rules of a maze game. (object)
+
+    Attributes:
+    end: The coordinates of the exit. (tuple of int)
+    grid: The maze being played. (MazeGrid)
+    moves: The offsets and corridor lengths for each direction. (dict of str: tuple)
+    rng: The random number generator for teleports. (random.Random)
+    start: The starting coordinates of the player. (tuple of int)
+    version: The version of the maze the moves were found for. (int or None)
+    x: The column of the player. (int)
+    y: The row of the player. (int)
+
+    Methods:
+    directions: Get the letters of the directions open from the player's cell. (str)
+    hint: Get the direction to move to get closer to the exit. (str or None)
+    move: Move the player in a straight line. (MazeEvent)
+    reset: Put the player back at the start. (None)
+    solve: Get the moves from the player's cell to the exit. (str or None)
+    teleport: Maybe teleport the player to a random cell. (MazeEvent)
+    update_moves: Get the corridor lengths for the current version of the maze. (dict)
+    walk: Make a series of single steps. (MazeEvent)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, grid, start = None, end = None, seed = None):
+        """
+        Set up the game. (None)
+
+        Parameters:
+        grid: The maze to play. (MazeGrid)
+        start: The starting coordinates, or None for the grid's start. (tuple of int)
+        end: The coordinates of the exit, or None for the grid's exit. (tuple of int)
+        seed: The seed for the random number generator. (object)
+        """
+        self.grid = grid
+        self.start = grid.start if start is None else tuple(start)
+        self.end = grid.end if end is None else tuple(end)
+        self.rng = random.Random(seed)
+        self.moves = {}
+        self.version = None
+        self.reset()
+
+    def directions(self):
+        """Get the letters of the directions open from the player's cell. (str)"""
+        return self.grid.directions(self.x, self.y)
+
+    def hint(self):
+        """Get the direction to move to get closer to the exit. (str or None)"""
+        return self.grid.hint(self.x, self.y, self.end)
+
+    def move(self, direction, times = 1):
+        """
+        Move the player in a straight line. (MazeEvent)
+
+        The player moves until they have gone the given number of steps, hit a
+        wall, or reached the exit.
+
+        Parameters:
+        direction: The letter of the direction to move. (str)
+        times: The number of steps to try to move. (int)
+        """
+        x, y = self.x, self.y
+        if self.version != self.grid.version:
+            self.update_moves()
+        delta_x, delta_y, width, lengths = self.moves[direction]
+        # Move as far as the corridor goes, stopping at the exit if it's on the way.
+        steps = lengths[y * width + x]
+        if steps > times:
+            steps = times
+        end_x, end_y = self.end
+        to_end = (end_x - x) * delta_x + (end_y - y) * delta_y
+        if 0 < to_end <= steps and x + to_end * delta_x == end_x and y + to_end * delta_y == end_y:
+            steps = to_end
+        self.x = x = x + delta_x * steps
+        self.y = y = y + delta_y * steps
+        # Report what happened.
+        if x == end_x and y == end_y:
+            kind = SOLVED
+        elif steps < times:
+            kind = BUMPED
+        else:
+            kind = MOVED
+        return MazeEvent(kind, steps, x, y)
+
+    def reset(self):
+        """Put the player back at the start. (None)"""
+        self.x, self.y = self.start
+
+    def solve(self):
+        """Get the moves from the player's cell to the exit. (str or None)"""
+        return self.grid.solve(self.x, self.y, self.end)
+
+    def update_moves(self):
+        """
+        Get the corridor lengths for the current version of the maze. (dict)
+
+        Keeping the lengths here saves looking them up in the grid's cache on
+        every move.
+        """
+        grid = self.grid
+        self.moves = {direction: (delta_x, delta_y, grid.width, grid.run_lengths(direction))
+            for direction, (delta_x, delta_y) in DELTAS.items()}
+        self.version = grid.version
+        return self.moves
+
+    def teleport(self, chance = 0.23):
+        """
+        Maybe teleport the player to a random cell. (MazeEvent)
+
+        Parameters:
+        chance: The probability of the teleport working. (float)
+        """
+        if self.rng.random() >= chance:
+            return MazeEvent(NOTHING, 0, self.x, self.y)
+        self.x = self.rng.randrange(self.grid.width)
+        self.y = self.rng.randrange(self.grid.height)
+        kind = SOLVED if (self.x, self.y) == self.end else TELEPORTED
+        return MazeEvent(kind, 0, self.x, self.y)
+
+    def walk(self, moves):
+        """
+        Make a series of single steps. (MazeEvent)
+
+        Steps into walls are skipped, and the walk stops at the exit. The
+        returned event has the total number of cells moved, and the kind of the
+        last step taken.
+
+        Parameters:
+        moves: The letter of the direction of each step. (iterable of str)
+        """
+        if self.version != self.grid.version:
+            self.update_moves()
+        width = self.grid.width
+        offsets = {direction: (move[1] * width + move[0], move[3]) for direction, move in self.moves.items()}
+        index = self.y * width + self.x
+        end = self.end[1] * width + self.end[0]
+        steps, kind = 0, NOTHING
+        # Work with cell indexes, so each step is a lookup and an addition.
+        for direction in moves:
+            offset, lengths = offsets[direction]
+            if lengths[index]:
+                index += offset
+                steps += 1
+                if index == end:
+                    kind = SOLVED
+                    break
+                kind = MOVED
+            else:
+                kind = BUMPED
+        self.y, self.x = divmod(index, width)
+        return MazeEvent(kind, steps, self.x, self.y)
@@ -0,0 +1,284 @@
+"""
+maze_gen.py
+
+Generate random perfect mazes.
+
+A perfect maze has exactly one path between any two cells. All of the
+algorithms here are iterative, so there is no recursion limit on maze size,
+and all take a seed so that mazes can be generated again:
+
+    backtracker: A depth first search, giving long winding corridors.
+    eller: Eller's algorithm, which works one row at a time.
+    kruskal: Kruskal's algorithm, joining random cells that aren't yet joined.
+    wilson: Wilson's algorithm, using loop-erased random walks for an unbiased maze.
+
+Eller's algorithm only keeps one row in memory, so it can stream mazes far
+bigger than memory straight to a binary maze file. The others build the whole
+maze in memory before it is written.
+
+Run as a script to write a maze file:
+
+    python maze_gen.py eller 10000 10000 big.maze --seed 801
+
+Constants:
+ALGORITHMS: The maze generating functions by name. (dict of str: callable)
+
+Functions:
+backtracker: Generate a maze with a randomized depth first search. (MazeGrid)
+eller: Generate a maze with Eller's algorithm. (MazeGrid)
+eller_rows: Generate the rows of a maze with Eller's algorithm. (generator)
+generate: Generate a maze with the named algorithm. (MazeGrid)
+kruskal: Generate a maze with Kruskal's algorithm. (MazeGrid)
+main: Write a maze file from the command line. (None)
+wilson: Generate a maze with Wilson's algorithm. (MazeGrid)
+write_maze: Write a generated maze to a binary maze file. (None)
+"""
+
+from array import array
+import argparse
+import random
+import sys
+
+from maze_grid import HEADER, MazeGrid
+
+def backtracker(width, height, seed = None):
+    """
+    Generate a maze with a randomized depth first search. (MazeGrid)
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    seed: The seed for the random number generator. (object)
+    """
+    rng = random.Random(seed)
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    visited = bytearray(width * height)
+    # Keep a stack of the path back to the start.
+    stack = array('q', [0])
+    visited[0] = 1
+    while stack:
+        index = stack[-1]
+        x, y = index % width, index // width
+        # Find the unvisited neighbours, with the bits for the walls between.
+        options = []
+        if y and not visited[index - width]:
+            options.append((index - width, 1, 4))
+        if x < width - 1 and not visited[index + 1]:
+            options.append((index + 1, 2, 8))
+        if y < height - 1 and not visited[index + width]:
+            options.append((index + width, 4, 1))
+        if x and not visited[index - 1]:
+            options.append((index - 1, 8, 2))
+        # Carve into a random neighbour, or back up if there aren't any.
+        if options:
+            neighbour, bit, back = options[rng.randrange(len(options))]
+            cells[index] |= bit
+            cells[neighbour] |= back
+            visited[neighbour] = 1
+            stack.append(neighbour)
+        else:
+            stack.pop()
+    maze.version += 1
+    return maze
+
+def eller(width, height, seed = None):
+    """
+    Generate a maze with Eller's algorithm. (MazeGrid)
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    seed: The seed for the random number generator. (object)
+    """
+    cells = bytearray()
+    for row in eller_rows(width, height, seed):
+        cells.extend(row)
+    return MazeGrid(width, height, cells)
+
+def eller_rows(width, height, seed = None):
+    """
+    Generate the rows of a maze with Eller's algorithm. (generator)
+
+    Each row is a bytearray of the directions open from its cells. Only the
+    current row and its sets are kept in memory.
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    seed: The seed for the random number generator. (object)
+    """
+    rng = random.Random(seed)
+    # Each cell in the row belongs to a set of cells joined by paths.
+    labels = list(range(width))
+    members = {label: [label] for label in labels}
+    next_label = width
+    above = bytearray(width)
+    for y in range(height):
+        last_row = y == height - 1
+        row = bytearray(1 if open_below else 0 for open_below in above)
+        # Randomly join neighbours in different sets, or all of them on the last row.
+        for x in range(width - 1):
+            if labels[x] != labels[x + 1] and (last_row or rng.random() < 0.5):
+                row[x] |= 2
+                row[x + 1] |= 8
+                # Merge the smaller set into the larger one.
+                keep, drop = labels[x], labels[x + 1]
+                if len(members[keep]) < len(members[drop]):
+                    keep, drop = drop, keep
+                for member in members[drop]:
+                    labels[member] = keep
+                members[keep].extend(members.pop(drop))
+        # Open at least one path down from each set.
+        above = bytearray(width)
+        if not last_row:
+            for label, cells in members.items():
+                down = [x for x in cells if rng.random() < 0.5] or [rng.choice(cells)]
+                for x in down:
+                    row[x] |= 4
+                    above[x] = 1
+            # Cells without a path from above start new sets.
+            members = {}
+            for x in range(width):
+                if not above[x]:
+                    labels[x] = next_label
+                    next_label += 1
+                members.setdefault(labels[x], []).append(x)
+        yield row
+
+def generate(width, height, algorithm = 'backtracker', seed = None):
+    """
+    Generate a maze with the named algorithm. (MazeGrid)
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    algorithm: The name of the algorithm to use. (str)
+    seed: The seed for the random number generator. (object)
+    """
+    return ALGORITHMS[algorithm](width, height, seed)
+
+def kruskal(width, height, seed = None):
+    """
+    Generate a maze with Kruskal's algorithm. (MazeGrid)
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    seed: The seed for the random number generator. (object)
+    """
+    rng = random.Random(seed)
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    # List the inside walls, as twice the cell index plus 0 for east or 1 for south.
+    walls = [index * 2 for index in range(width * height) if index % width < width - 1]
+    walls.extend(index * 2 + 1 for index in range(width * (height - 1)))
+    rng.shuffle(walls)
+    # Knock down walls between cells that aren't joined yet.
+    parents = array('q', range(width * height))
+    for wall in walls:
+        index, south = divmod(wall, 2)
+        neighbour = index + width if south else index + 1
+        # Find the roots of both cells, halving the paths as we go.
+        root = index
+        while parents[root] != root:
+            parents[root] = parents[parents[root]]
+            root = parents[root]
+        other = neighbour
+        while parents[other] != other:
+            parents[other] = parents[parents[other]]
+            other = parents[other]
+        if root != other:
+            parents[other] = root
+            if south:
+                cells[index] |= 4
+                cells[neighbour] |= 1
+            else:
+                cells[index] |= 2
+                cells[neighbour] |= 8
+    maze.version += 1
+    return maze
+
+def wilson(width, height, seed = None):
+    """
+    Generate a maze with Wilson's algorithm. (MazeGrid)
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    seed: The seed for the random number generator. (object)
+    """
+    rng = random.Random(seed)
+    maze = MazeGrid(width, height)
+    cells = maze.cells
+    in_maze = bytearray(width * height)
+    in_maze[rng.randrange(width * height)] = 1
+    # The direction last taken out of each cell on the current walk.
+    exits = bytearray(width * height)
+    moves = ((1, -width, 4), (2, 1, 8), (4, width, 1), (8, -1, 2))
+    for start in range(width * height):
+        # Walk randomly until hitting the maze. Later exits from a cell replace
+        # earlier ones, which erases any loops in the walk.
+        index = start
+        while not in_maze[index]:
+            x, y = index % width, index // width
+            while True:
+                move = rng.randrange(4)
+                if ((move == 0 and y) or (move == 1 and x < width - 1) or
+                    (move == 2 and y < height - 1) or (move == 3 and x)):
+                    break
+            exits[index] = move
+            index += moves[move][1]
+        # Add the loop-erased walk to the maze.
+        index = start
+        while not in_maze[index]:
+            bit, offset, back = moves[exits[index]]
+            in_maze[index] = 1
+            cells[index] |= bit
+            cells[index + offset] |= back
+            index += offset
+    maze.version += 1
+    return maze
+
+def write_maze(path, width, height, algorithm = 'eller', seed = None):
+    """
+    Write a generated maze to a binary maze file. (None)
+
+    With Eller's algorithm, each row is written as soon as it is generated.
+
+    Parameters:
+    path: The path to write the maze to. (str)
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    algorithm: The name of the algorithm to use. (str)
+    seed: The seed for the random number generator. (object)
+    """
+    if algorithm != 'eller':
+        generate(width, height, algorithm, seed).save(path)
+        return
+    with open(path, 'wb') as maze_file:
+        maze_file.write(HEADER.pack(b'MAZE', width, height, 0, 0, width - 1, height - 1))
+        for row in eller_rows(width, height, seed):
+            maze_file.write(row)
+
+def main(args):
+    """
+    Write a maze file from the command line. (None)
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Generate a random maze file.')
+    parser.add_argument('algorithm', choices = sorted(ALGORITHMS))
+    parser.add_argument('width', type = int)
+    parser.add_argument('height', type = int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type = int, default = None)
+    options = parser.parse_args(args)
+    write_maze(options.path, options.width, options.height, options.algorithm, options.seed)
+
+# The maze generating functions by name.
+ALGORITHMS = {'backtracker': backtracker, 'eller': eller, 'kruskal': kruskal, 'wilson': wilson}
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
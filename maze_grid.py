@@ -0,0 +1,460 @@
+"""
+maze_grid.py
+
+A compact grid for maze maps.
+
+Each cell of the maze is one byte, with a bit set for each direction you can
+move from that cell. The cells are stored row by row in a bytearray, or in a
+memory map of a binary maze file, so mazes with tens of millions of cells
+take tens of megabytes.
+
+Mazes can be read from ASCII art like this:
+
++   +---+---+
+|           |
++   +---+   +
+|   |       |
++---+---+   +
+
+Each cell is three characters wide and one line tall, with walls shown by
+'---' and '|'. Gaps in the outer wall mark the start and the end of the maze.
+
+Distances to the exit are found with a breadth first search, and cached until
+the maze changes, so hints and solutions only cost a lookup per step. The
+lengths of the straight corridors out of each cell are cached the same way, so
+a move of any number of steps only costs one lookup.
+
+The binary format is a header of b'MAZE' followed by the width, height, start
+x, start y, end x, and end y as little-endian 32 bit unsigned integers. That is
+followed by one byte per cell, row by row.
+
+Searches and moves step between cells by index, trusting the walls to keep
+them inside the maze. So mazes read from files or maps are checked as they are
+loaded, and a ValueError is raised if any cell is open through the outer wall.
+
+Constants:
+BITS: The bit for each direction. (dict of str: int)
+CELL_VALUES: The valid cell values. (bytes)
+DELTAS: The change in x and y for each direction. (dict of str: tuple of int)
+HEADER: The layout of the binary maze header. (struct.Struct)
+LETTERS: The direction letters for each cell value. (list of str)
+OPPOSITES: The opposite of each direction. (dict of str: str)
+
+Classes:
+MazeGrid: A maze stored as one byte per cell. (object)
+"""
+
+from array import array
+import mmap
+import struct
+
+# The bit for each direction.
+BITS = {'n': 1, 'e': 2, 's': 4, 'w': 8}
+# The valid cell values.
+CELL_VALUES = bytes(range(16))
+# The change in x and y for each direction.
+DELTAS = {'n': (0, -1), 'e': (1, 0), 's': (0, 1), 'w': (-1, 0)}
+# The layout of the binary maze header.
+HEADER = struct.Struct('<4s6I')
+# The direction letters for each cell value.
+LETTERS = [''.join(letter for letter in 'nesw' if value & BITS[letter]) for value in range(16)]
+# The opposite of each direction.
+OPPOSITES = {'n': 's', 'e': 'w', 's': 'n', 'w': 'e'}
+
+class MazeGrid(object):
+    """
+    A maze stored as one byte per cell. (object)
+
+    Attributes:
+    cells: The directions open from each cell, row by row. (bytearray or memoryview)
+    end: The coordinates of the exit of the maze. (tuple of int)
+    fields: The cached distance fields, by target. (dict of tuple: tuple)
+    height: The number of rows in the maze. (int)
+    map: The memory map of the maze file, if any. (mmap.mmap or None)
+    runs: The cached corridor lengths, by direction. (dict of str: tuple)
+    start: The starting coordinates of the maze. (tuple of int)
+    version: The number of changes made to the maze. (int)
+    width: The number of columns in the maze. (int)
+
+    Class Methods:
+    from_ascii: Create a maze from ASCII art. (MazeGrid)
+    from_map: Create a maze from rows of direction strings. (MazeGrid)
+    load: Load a maze from a file. (MazeGrid)
+
+    Methods:
+    cell: Get the directions open from a cell. (int)
+    close: Close the maze file, if any. (None)
+    directions: Get the letters of the directions open from a cell. (str)
+    distance_field: Get the distance from every cell to a target cell. (array)
+    hint: Get the direction to move to get closer to the exit. (str or None)
+    open_wall: Open the wall on one side of a cell. (None)
+    run_length: Get how far you can move in a straight line from a cell. (int)
+    run_lengths: Get how far you can move in a straight line from every cell. (array)
+    save: Write the maze to a binary file. (None)
+    set_cell: Set the directions open from a cell. (None)
+    solve: Get the moves from a cell to the exit. (str or None)
+    to_ascii: Draw the maze as ASCII art. (str)
+    validate: Check that the maze stays inside its outer wall. (None)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, width, height, cells = None, start = (0, 0), end = None):
+        """
+        Set up the maze. (None)
+
+        Parameters:
+        width: The number of columns in the maze. (int)
+        height: The number of rows in the maze. (int)
+        cells: The directions open from each cell, or None for all walls. (bytearray)
+        start: The starting coordinates of the maze. (tuple of int)
+        end: The coordinates of the exit, or None for the bottom right. (tuple of int)
+        """
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height) if cells is None else cells
+        self.start = tuple(start)
+        self.end = (width - 1, height - 1) if end is None else tuple(end)
+        self.map = None
+        self.version = 0
+        self.fields = {}
+        self.runs = {}
+
+    @classmethod
+    def from_ascii(cls, text):
+        """
+        Create a maze from ASCII art. (MazeGrid)
+
+        Any lines before or after the drawing of the maze are ignored.
+
+        Parameters:
+        text: The ASCII art of the maze. (str)
+        """
+        # Find the lines of the drawing.
+        lines = [line.rstrip() for line in text.split('\n')]
+        lines = [line for line in lines if line.strip()[:1] in ('+', '|')]
+        width = (max(len(line) for line in lines) - 1) // 4
+        height = (len(lines) - 1) // 2
+        lines = [line.ljust(width * 4 + 1) for line in lines]
+        maze = cls(width, height)
+        # Read the walls around each cell.
+        for y in range(height):
+            above, middle, below = lines[2 * y], lines[2 * y + 1], lines[2 * y + 2]
+            for x in range(width):
+                value = 0
+                if y and not above[4 * x + 1:4 * x + 4].strip():
+                    value |= BITS['n']
+                if x < width - 1 and middle[4 * x + 4] == ' ':
+                    value |= BITS['e']
+                if y < height - 1 and not below[4 * x + 1:4 * x + 4].strip():
+                    value |= BITS['s']
+                if x and middle[4 * x] == ' ':
+                    value |= BITS['w']
+                maze.cells[y * width + x] = value
+        # Find the gaps in the outer wall.
+        gaps = [(x, 0) for x in range(width) if not lines[0][4 * x + 1:4 * x + 4].strip()]
+        for y in range(height):
+            if lines[2 * y + 1][0] == ' ':
+                gaps.append((0, y))
+            if lines[2 * y + 1][4 * width] == ' ':
+                gaps.append((width - 1, y))
+        gaps.extend((x, height - 1) for x in range(width) if not lines[-1][4 * x + 1:4 * x + 4].strip())
+        if len(gaps) >= 2:
+            maze.start, maze.end = gaps[0], gaps[-1]
+        maze.validate()
+        return maze
+
+    @classmethod
+    def from_map(cls, rows, start = (0, 0), end = None):
+        """
+        Create a maze from rows of direction strings. (MazeGrid)
+
+        Parameters:
+        rows: The letters of the directions open from each cell. (list of list of str)
+        start: The starting coordinates of the maze. (tuple of int)
+        end: The coordinates of the exit, or None for the bottom right. (tuple of int)
+        """
+        maze = cls(len(rows[0]), len(rows), start = start, end = end)
+        index = 0
+        for row in rows:
+            for directions in row:
+                maze.cells[index] = sum(BITS[letter] for letter in set(directions))
+                index += 1
+        maze.validate()
+        return maze
+
+    @classmethod
+    def load(cls, path, use_mmap = False):
+        """
+        Load a maze from a file. (MazeGrid)
+
+        Files starting with b'MAZE' are read as binary mazes, and anything else
+        as ASCII art. Binary mazes may be memory mapped instead of read into
+        memory, in which case changes to the maze change the file. A ValueError
+        is raised if the maze doesn't pass validate.
+
+        Parameters:
+        path: The path to the maze file. (str)
+        use_mmap: A flag for memory mapping binary mazes. (bool)
+        """
+        with open(path, 'r+b' if use_mmap else 'rb') as maze_file:
+            header = maze_file.read(HEADER.size)
+            if header[:4] != b'MAZE':
+                return cls.from_ascii((header + maze_file.read()).decode())
+            magic, width, height, start_x, start_y, end_x, end_y = HEADER.unpack(header)
+            if use_mmap:
+                maze_map = mmap.mmap(maze_file.fileno(), 0)
+                cells = memoryview(maze_map)[HEADER.size:HEADER.size + width * height]
+            else:
+                maze_map = None
+                cells = bytearray(maze_file.read(width * height))
+        maze = cls(width, height, cells, (start_x, start_y), (end_x, end_y))
+        maze.map = maze_map
+        try:
+            maze.validate()
+        except ValueError:
+            maze.close()
+            raise
+        return maze
+
+    def cell(self, x, y):
+        """
+        Get the directions open from a cell. (int)
+
+        Parameters:
+        x: The column of the cell. (int)
+        y: The row of the cell. (int)
+        """
+        return self.cells[y * self.width + x]
+
+    def close(self):
+        """Close the maze file, if any. (None)"""
+        if self.map is not None:
+            self.cells.release()
+            self.map.close()
+            self.map = None
+
+    def directions(self, x, y):
+        """
+        Get the letters of the directions open from a cell. (str)
+
+        Parameters:
+        x: The column of the cell. (int)
+        y: The row of the cell. (int)
+        """
+        return LETTERS[self.cells[y * self.width + x]]
+
+    def distance_field(self, target = None):
+        """
+        Get the distance from every cell to a target cell. (array)
+
+        The distances are in the same order as the cells, with -1 for cells that
+        can't reach the target. The field for each target is cached until the
+        maze changes.
+
+        Parameters:
+        target: The coordinates of the target cell, or None for the exit. (tuple of int)
+        """
+        target = self.end if target is None else tuple(target)
+        version, distances = self.fields.get(target, (None, None))
+        if version == self.version:
+            return distances
+        # Search out from the target, one step further each time.
+        width, cells = self.width, self.cells
+        distances = array('i', [-1]) * len(cells)
+        queue = array('i', [0]) * len(cells)
+        start = target[1] * width + target[0]
+        distances[start] = 0
+        queue[0] = start
+        head, tail = 0, 1
+        while head < tail:
+            index = queue[head]
+            head += 1
+            value = cells[index]
+            distance = distances[index] + 1
+            for bit, offset in ((1, -width), (2, 1), (4, width), (8, -1)):
+                if value & bit and distances[index + offset] < 0:
+                    distances[index + offset] = distance
+                    queue[tail] = index + offset
+                    tail += 1
+        self.fields[target] = (self.version, distances)
+        return distances
+
+    def hint(self, x, y, target = None):
+        """
+        Get the direction to move to get closer to the exit. (str or None)
+
+        The return value is None at the exit, or if the exit can't be reached.
+
+        Parameters:
+        x: The column of the cell to move from. (int)
+        y: The row of the cell to move from. (int)
+        target: The coordinates to head for, or None for the exit. (tuple of int)
+        """
+        distances = self.distance_field(target)
+        index = y * self.width + x
+        if distances[index] <= 0:
+            return None
+        value = self.cells[index]
+        for letter, offset in (('n', -self.width), ('e', 1), ('s', self.width), ('w', -1)):
+            if value & BITS[letter] and distances[index + offset] == distances[index] - 1:
+                return letter
+
+    def open_wall(self, x, y, direction):
+        """
+        Open the wall on one side of a cell. (None)
+
+        The matching wall of the neighbouring cell is opened too.
+
+        Parameters:
+        x: The column of the cell. (int)
+        y: The row of the cell. (int)
+        direction: The letter of the side to open. (str)
+        """
+        delta_x, delta_y = DELTAS[direction]
+        self.cells[y * self.width + x] |= BITS[direction]
+        self.cells[(y + delta_y) * self.width + x + delta_x] |= BITS[OPPOSITES[direction]]
+        self.version += 1
+
+    def run_length(self, x, y, direction):
+        """
+        Get how far you can move in a straight line from a cell. (int)
+
+        Parameters:
+        x: The column of the cell. (int)
+        y: The row of the cell. (int)
+        direction: The letter of the direction to move. (str)
+        """
+        return self.run_lengths(direction)[y * self.width + x]
+
+    def run_lengths(self, direction):
+        """
+        Get how far you can move in a straight line from every cell. (array)
+
+        The lengths are in the same order as the cells, and are cached until
+        the maze changes.
+
+        Parameters:
+        direction: The letter of the direction to move. (str)
+        """
+        version, lengths = self.runs.get(direction, (None, None))
+        if version == self.version:
+            return lengths
+        cells, bit = self.cells, BITS[direction]
+        delta_x, delta_y = DELTAS[direction]
+        offset = delta_y * self.width + delta_x
+        # Work back from the far side, so each cell extends the run of the next one.
+        lengths = array('i', [0]) * len(cells)
+        indexes = range(len(cells) - 1, -1, -1) if offset > 0 else range(len(cells))
+        for index in indexes:
+            if cells[index] & bit:
+                lengths[index] = lengths[index + offset] + 1
+        self.runs[direction] = (self.version, lengths)
+        return lengths
+
+    def save(self, path):
+        """
+        Write the maze to a binary file. (None)
+
+        Parameters:
+        path: The path to write the maze to. (str)
+        """
+        with open(path, 'wb') as maze_file:
+            maze_file.write(HEADER.pack(b'MAZE', self.width, self.height, *self.start + self.end))
+            maze_file.write(self.cells)
+
+    def set_cell(self, x, y, value):
+        """
+        Set the directions open from a cell. (None)
+
+        Parameters:
+        x: The column of the cell. (int)
+        y: The row of the cell. (int)
+        value: The bits of the directions open from the cell. (int)
+        """
+        self.cells[y * self.width + x] = value
+        self.version += 1
+
+    def solve(self, x, y, target = None):
+        """
+        Get the moves from a cell to the exit. (str or None)
+
+        The return value is the letter of each move, or None if the exit can't
+        be reached.
+
+        Parameters:
+        x: The column of the cell to start from. (int)
+        y: The row of the cell to start from. (int)
+        target: The coordinates to head for, or None for the exit. (tuple of int)
+        """
+        target = self.end if target is None else tuple(target)
+        if self.distance_field(target)[y * self.width + x] < 0:
+            return None
+        moves = []
+        while (x, y) != target:
+            letter = self.hint(x, y, target)
+            moves.append(letter)
+            x += DELTAS[letter][0]
+            y += DELTAS[letter][1]
+        return ''.join(moves)
+
+    def to_ascii(self):
+        """Draw the maze as ASCII art. (str)"""
+        # Find the gaps in the outer wall for the start and the end.
+        gaps = set()
+        for x, y in (self.start, self.end):
+            if y == 0:
+                gaps.add((x, y, 'n'))
+            elif y == self.height - 1:
+                gaps.add((x, y, 's'))
+            elif x == 0:
+                gaps.add((x, y, 'w'))
+            elif x == self.width - 1:
+                gaps.add((x, y, 'e'))
+        lines = []
+        for y in range(self.height):
+            row = self.cells[y * self.width:(y + 1) * self.width]
+            # Draw the walls above the row.
+            tops = ['   ' if value & BITS['n'] or (x, y, 'n') in gaps else '---'
+                for x, value in enumerate(row)]
+            lines.append('+' + '+'.join(tops) + '+')
+            # Draw the walls between the cells.
+            middle = [' ' if (0, y, 'w') in gaps else '|']
+            for x, value in enumerate(row):
+                middle.append('   ')
+                middle.append(' ' if value & BITS['e'] or (x, y, 'e') in gaps else '|')
+            lines.append(''.join(middle))
+        # Draw the bottom wall.
+        y = self.height - 1
+        bottoms = ['   ' if (x, y, 's') in gaps else '---' for x in range(self.width)]
+        lines.append('+' + '+'.join(bottoms) + '+')
+        return '\n'.join(lines)
+
+    def validate(self):
+        """
+        Check that the maze stays inside its outer wall. (None)
+
+        A ValueError is raised if the maze is the wrong size, if any cell has
+        bits set other than the four directions, if any cell is open through
+        the outer wall, or if the start or the exit is outside the maze.
+        """
+        width, height, cells = self.width, self.height, self.cells
+        if not width or not height or len(cells) != width * height:
+            raise ValueError('A {} by {} maze needs {} cells, not {}.'.format(width, height, width * height, len(cells)))
+        # Check the cells a block at a time, so memory mapped mazes aren't copied whole.
+        block = 2 ** 20
+        for start in range(0, len(cells), block):
+            if bytes(cells[start:start + block]).translate(None, CELL_VALUES):
+                raise ValueError('The maze has cell values that are not directions.')
+        # Check each edge for openings through the outer wall. The edges are copied,
+        # so no views of a memory map are left open.
+        edges = (('north', 'n', bytes(cells[:width])), ('south', 's', bytes(cells[len(cells) - width:])),
+            ('west', 'w', bytes(cells[::width])), ('east', 'e', bytes(cells[width - 1::width])))
+        for name, letter, edge in edges:
+            bit = BITS[letter]
+            if any(value & bit for value in edge):
+                raise ValueError('The maze is open through its {} wall.'.format(name))
+        for name, (x, y) in (('start', self.start), ('exit', self.end)):
+            if not (0 <= x < width and 0 <= y < height):
+                raise ValueError('The {} of the maze, {}, is outside the maze.'.format(name, (x, y)))
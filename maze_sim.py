@@ -0,0 +1,201 @@
+"""
+maze_sim.py
+
+Simulate huge numbers of random players in a maze at once.
+
+Each player wanders the maze at random, one turn at a time, until they find
+the exit. On each turn a player either moves one step in a random direction,
+or says the magic word from cmd_example2.Maze's xyzzy command, which teleports
+them to a random cell 23% of the time. The positions of all of the players are
+kept in NumPy arrays, so a turn for a million players is a handful of array
+operations against the maze's cell bytes:
+
+    steps = simulate(grid, 10 ** 6, teleport_rate = 0.1, seed = 1)
+    for low, high, count in histogram(steps):
+        ...
+
+The result is the number of turns each player took to get out, giving the
+distribution of escape times. NumPy is required.
+
+Run as a script to simulate the cmd_example2 maze, or a maze file:
+
+    python maze_sim.py --agents 1000000 --teleport-rate 0.05
+    python maze_sim.py --maze big.maze --agents 100000 --max-steps 10000000
+
+Constants:
+TELEPORT_CHANCE: The chance of the magic word teleporting a player. (float)
+
+Functions:
+histogram: Count the escape times in ranges. (list of tuple)
+main: Simulate a maze from the command line. (None)
+simulate: Find the number of turns random players take to escape a maze. (numpy.ndarray)
+summarize: Get statistics of the escape times. (dict)
+"""
+
+import argparse
+import sys
+
+import numpy
+
+from cmd_example2 import MAZE
+from maze_grid import BITS, DELTAS, MazeGrid
+
+# The chance of the magic word teleporting a player, as in MazeEngine.teleport.
+TELEPORT_CHANCE = 0.23
+
+def histogram(steps, bins = 20):
+    """
+    Count the escape times in ranges. (list of tuple)
+
+    The return value is a tuple of the lowest time, the highest time, and the
+    number of players for each range. The ranges are spaced evenly on a log
+    scale, since the times have a long tail. Players that never escaped are
+    left out.
+
+    Parameters:
+    steps: The escape time of each player, or -1 if they didn't escape. (numpy.ndarray)
+    bins: The number of ranges. (int)
+    """
+    escaped = steps[steps >= 0]
+    if not len(escaped):
+        return []
+    low, high = max(int(escaped.min()), 1), int(escaped.max())
+    edges = numpy.unique(numpy.geomspace(low, high + 1, bins + 1).astype(numpy.int64))
+    if len(edges) < 2:
+        edges = numpy.array([low, high + 1])
+    counts, edges = numpy.histogram(escaped, edges)
+    return [(int(edges[index]), int(edges[index + 1]) - 1, int(count)) for index, count in enumerate(counts)]
+
+def main(args):
+    """
+    Simulate a maze from the command line. (None)
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Simulate random players in a maze.')
+    parser.add_argument('--maze', default = None, help = 'A maze file, instead of the cmd_example2 maze.')
+    parser.add_argument('--agents', type = int, default = 10 ** 6)
+    parser.add_argument('--teleport-rate', type = float, default = 0.0,
+        help = 'The chance of a player saying the magic word on each turn.')
+    parser.add_argument('--max-steps', type = int, default = 10 ** 6)
+    parser.add_argument('--bins', type = int, default = 20)
+    parser.add_argument('--bump', action = 'store_true', help = 'Pick from all four directions, bumping walls.')
+    parser.add_argument('--seed', type = int, default = None)
+    options = parser.parse_args(args)
+    if options.maze is None:
+        grid, start, end = MAZE['grid'], MAZE['start'], MAZE['end']
+    else:
+        grid = MazeGrid.load(options.maze, use_mmap = True)
+        start, end = grid.start, grid.end
+    steps = simulate(grid, options.agents, start, end, options.teleport_rate, options.max_steps,
+        not options.bump, options.seed)
+    for key, value in summarize(steps).items():
+        print('{}: {}'.format(key, value))
+    # Show the histogram as bars.
+    counts = histogram(steps, options.bins)
+    most = max((count for low, high, count in counts), default = 0)
+    for low, high, count in counts:
+        print('{:>9} - {:<9} {:>9} {}'.format(low, high, count, '#' * (count * 50 // most)))
+
+def simulate(grid, agents, start = None, end = None, teleport_rate = 0.0, max_steps = 10 ** 6, open_only = True,
+    seed = None, batch_size = 2 ** 20):
+    """
+    Find the number of turns random players take to escape a maze. (numpy.ndarray)
+
+    On each turn, a player says the magic word with a chance of teleport_rate.
+    Otherwise they move in a random direction. If open_only is True, they only
+    pick from the directions they can move. If it is False, they pick from all
+    four, and lose the turn if they bump into a wall.
+
+    One random number per player decides the whole turn. Below teleport_rate
+    the word is said, and below teleport_rate * TELEPORT_CHANCE it works, so
+    players teleport with that chance and lose the turn when the word fails.
+    The rest of the range picks the direction. Only the cell a player
+    teleports to takes another random number.
+
+    The return value has the number of turns each player took to reach the
+    exit, or -1 if they were still in the maze after max_steps turns. Players
+    are simulated batch_size at a time, to limit the memory used.
+
+    Parameters:
+    grid: The maze to simulate. (MazeGrid)
+    agents: The number of players. (int)
+    start: The starting coordinates, or None for the grid's start. (tuple of int)
+    end: The coordinates of the exit, or None for the grid's exit. (tuple of int)
+    teleport_rate: The chance of saying the magic word each turn. (float)
+    max_steps: The most turns to simulate. (int)
+    open_only: A flag for only moving in open directions. (bool)
+    seed: The seed for the random number generator. (int or None)
+    batch_size: The most players to simulate at once. (int)
+    """
+    rng = numpy.random.default_rng(seed)
+    width = grid.width
+    cells = numpy.frombuffer(grid.cells, dtype = numpy.uint8, count = width * grid.height)
+    start_x, start_y = grid.start if start is None else start
+    end_x, end_y = grid.end if end is None else end
+    start_index, end_index = start_y * width + start_x, end_y * width + end_x
+    # Find the offset of each step, and the open ones by cell value.
+    directions = 'nesw'
+    offsets = numpy.array([DELTAS[letter][1] * width + DELTAS[letter][0] for letter in directions])
+    bits = numpy.array([BITS[letter] for letter in directions])
+    open_offsets = numpy.zeros((16, 4), dtype = numpy.int64)
+    open_counts = numpy.zeros(16, dtype = numpy.int64)
+    for value in range(16):
+        open_here = offsets[value & bits != 0]
+        open_offsets[value, :len(open_here)] = open_here
+        open_counts[value] = len(open_here)
+    # Simulate the players a batch at a time.
+    steps = numpy.full(agents, -1, dtype = numpy.int64)
+    if start_index == end_index:
+        steps[:] = 0
+        return steps
+    for batch_start in range(0, agents, batch_size):
+        players = numpy.arange(batch_start, min(batch_start + batch_size, agents))
+        positions = numpy.full(len(players), start_index, dtype = numpy.int64)
+        for turn in range(1, max_steps + 1):
+            # One random number per player picks between teleporting, the word failing, and each direction.
+            roll = rng.random(len(positions))
+            values = cells[positions]
+            moving = roll >= teleport_rate
+            teleported = numpy.flatnonzero(roll < teleport_rate * TELEPORT_CHANCE) if teleport_rate else None
+            if 0 < teleport_rate < 1:
+                roll = (roll - teleport_rate) / (1 - teleport_rate)
+            if open_only:
+                choice = (roll * open_counts[values]).astype(numpy.int64)
+                moves = open_offsets[values, numpy.minimum(choice, 3)]
+            else:
+                choice = (roll * 4).astype(numpy.int64)
+                moves = numpy.where(values & bits[choice], offsets[choice], 0)
+            positions += numpy.where(moving, moves, 0)
+            # Teleport the players whose magic word worked.
+            if teleported is not None:
+                positions[teleported] = rng.integers(0, len(cells), len(teleported))
+            # Record the players who got out, and stop simulating them.
+            out = positions == end_index
+            if out.any():
+                steps[players[out]] = turn
+                staying = ~out
+                positions, players = positions[staying], players[staying]
+                if not len(positions):
+                    break
+    return steps
+
+def summarize(steps):
+    """
+    Get statistics of the escape times. (dict)
+
+    Parameters:
+    steps: The escape time of each player, or -1 if they didn't escape. (numpy.ndarray)
+    """
+    escaped = steps[steps >= 0]
+    summary = {'agents': len(steps), 'escaped': len(escaped)}
+    if len(escaped):
+        summary['mean'] = float(escaped.mean())
+        for percentile in (50, 90, 99):
+            summary['p{}'.format(percentile)] = int(numpy.percentile(escaped, percentile))
+        summary['max'] = int(escaped.max())
+    return summary
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -13,8 +13,15 @@ Menu class work as follows:
 	be executed. The selection is case insensitive.
 3. Typing in an empty line repeats the last selection by default. This can be
 	changed by overriding the emptyline method.
-4. If the selection is not recognized, it is passed to the unrecognized
-	method.
+4. Any unique prefix of a selection may be used instead of the whole thing.
+	Frex, if no other selection starts with 'sp', 'sp' selects 'spam'.
+5. If the selection is not recognized, it is passed to the unrecognized
+	method. By default that reports any selections it could be short for,
+	or the selections closest to what was typed.
+6. Selections starting with '!' are commands for timing and profiling the
+	menu handlers. See menu_stats.py for the details. Setting the
+	stats_commands attribute to False turns them off, for menus the user
+	shouldn't control the process from, such as menus served to clients.
 
 The Menu class is not meant to be instantiated itself. It would just sit 
 there doing nothing if you did. Instead, you can subclass the Menu class
@@ -28,20 +35,318 @@ the menu processing:
     postmenu: Add processing after the menu choice is processed.
     postloop: Add processing before the application closes.
 
-There are also three class attributes that are also meant to be overridden:
+There are also four class attributes that are also meant to be overridden:
 
     intro: Text displayed at the beginning of the menu loop.
     prompt: The text displayed when getting user input.
     sort_key: The sort key for menu items, for non-alphabetical menu choices.
+    redraw_menu: If false, the menu is only shown again when it changes.
+
+The menu text and the mapping of choices to method names are built once per
+class, the first time an instance is created, and shared by every instance of
+that class. They are rebuilt if a menu_ method or sort_menu is set or deleted
+on the class. Changes made any other way are not noticed: editing a method's
+docstring in place, or setting a menu_ method on an instance, leaves the menu
+text as it was. Each menu's methods attribute is its own read-only view of the
+shared mapping, giving bound methods, so menus can't change each other's.
+
+Menus can also be driven from code, without any text interface. The start
+method runs preloop, choose processes one choice, and finish runs postloop.
+Each returns a ChoiceResult with the stop flag, the status, and the text the
+menu printed. The menuloop and batchloop methods are text frontends built on
+these methods.
+
+Submenus can be declared with Submenu, which only imports the submenu's module
+when it is first chosen, and keeps the submenu to be reused. Modules that are
+never chosen are never imported, which can be checked with
+`python -X importtime menu_test.py`.
+
+Long menus are shown a page at a time, sized to the page_size class attribute,
+to a screen size passed to render by the frontend, or to fit the terminal if the
+menu's output file is one. Otherwise they are shown whole. Only the lines on the
+page are formatted, and each page is kept for the next time it is shown, until
+the page size changes, so showing a menu takes the same time however long it
+is. These commands move between pages:
+
+    >: The next page.
+    <: The previous page.
+    #n: Page n.
+    /text: The next page with a choice containing the text.
+
+Reading input can time out. Setting the idle_timeout class attribute closes
+menus left waiting too long, and handlers can pass a timeout to input, or the
+time left on a timed_input.Deadline for a whole action. The menu's input file
+is only wrapped for timed reads once one of these timeouts is used.
+
+A MenuStack runs a menu and its submenus in one loop, with the open menus kept
+on a list instead of the call stack. Typing 'back' closes the current submenu,
+and 'top' closes all of them, however deep they go.
 
 Classes:
+ChoiceResult: The result of processing a menu choice. (tuple)
+ChoiceTrie: A prefix tree of menu choices. (object)
 Menu: A simple framework for writing command line menus. (object)
+MenuMeta: A metaclass tracking changes to menu classes. (type)
+MenuMethods: A read-only view of a menu's choices as bound methods. (Mapping)
+MenuStack: A loop running nested menus without nesting calls. (object)
+Submenu: A submenu that is only loaded when it is chosen. (object)
+
+Functions:
+load_class: Load a class from a 'module:name' path. (type)
 """
 
+import bisect
+from collections import deque, namedtuple
+from collections.abc import Mapping
+import heapq
+import importlib
+import io
+import itertools
+import random
+import shutil
 import string
 import sys
+from types import MappingProxyType
+
+from menu_stats import STATS
+from timed_input import InputTimeout, TimedReader, is_terminal, timed_input
+
+ChoiceResult = namedtuple('ChoiceResult', 'stop status output')
+ChoiceResult.__doc__ = """
+The result of processing a menu choice. (tuple)
+
+Attributes:
+stop: A flag for the menu loop being done. (bool)
+status: The status of the menu after the choice. (str)
+output: The text printed while processing, or None if not captured. (str or None)
+"""
+
+class ChoiceTrie(object):
+    """
+    A prefix tree of menu choices. (object)
+
+    Each node is a list of the child nodes keyed by character, the number of
+    choices at or below the node, and the choice ending at the node (or None).
+    Prefix lookups take time proportional to the length of the prefix, no
+    matter how many choices there are.
+
+    Attributes:
+    root: The root node of the tree. (list)
+
+    Methods:
+    add: Add a choice to the tree. (None)
+    complete: Find the choices starting with a prefix. (tuple)
+    suggest: Find the choices closest to some text. (list of str)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, choices = ()):
+        """
+        Build the tree. (None)
+
+        Parameters:
+        choices: The choices to put in the tree. (iterable of str)
+        """
+        self.root = [{}, 0, None]
+        for choice in choices:
+            self.add(choice)
+
+    def add(self, choice):
+        """
+        Add a choice to the tree. (None)
+
+        Parameters:
+        choice: The choice to add. (str)
+        """
+        # Walk down the tree, counting the choice in each node.
+        node = self.root
+        node[1] += 1
+        for char in choice:
+            node = node[0].setdefault(char, [{}, 0, None])
+            node[1] += 1
+        node[2] = choice
+
+    def complete(self, prefix, limit = 5):
+        """
+        Find the choices starting with a prefix. (tuple)
+
+        The return value is the number of choices starting with the prefix and a
+        sorted list of up to limit of those choices.
+
+        Parameters:
+        prefix: The start of the choices to find. (str)
+        limit: The maximum number of choices to return. (int)
+        """
+        # Find the node for the prefix.
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return 0, []
+        # Collect the first few choices below that node.
+        count = node[1]
+        found = []
+        stack = [node]
+        while stack and len(found) < limit:
+            node = stack.pop()
+            if node[2] is not None:
+                found.append(node[2])
+            stack.extend(node[0][char] for char in sorted(node[0], reverse = True))
+        return count, found
+
+    def suggest(self, text, limit = 3, max_distance = 2, max_nodes = 4000):
+        """
+        Find the choices closest to some text. (list of str)
+
+        Choices are ranked by edit distance, and then alphabetically. Choices
+        that have nothing in common with the text are not suggested. The most
+        promising branches of the tree are searched first, branches that can't be
+        within max_distance are never searched, and the search stops after
+        max_nodes nodes, so big menus can't make it slow.
+
+        Parameters:
+        text: The text to find choices close to. (str)
+        limit: The maximum number of choices to return. (int)
+        max_distance: The maximum edit distance of a suggestion. (int)
+        max_nodes: The maximum number of nodes to search. (int)
+        """
+        found = []
+        # Each entry is the lowest possible distance below the node, a tie
+        # breaker, the node, its character, and its parent's distance row.
+        first_row = list(range(len(text) + 1))
+        heap = [(0, index, child, char, first_row)
+            for index, (char, child) in enumerate(self.root[0].items())]
+        count = len(heap)
+        while heap and max_nodes:
+            bound, index, node, char, previous = heapq.heappop(heap)
+            # Stop when nothing left could beat what has been found.
+            if len(found) >= limit and bound > found[limit - 1][0]:
+                break
+            max_nodes -= 1
+            # Calculate the node's row of the edit distance table.
+            row = [previous[0] + 1]
+            for column in range(1, len(text) + 1):
+                cost = 0 if text[column - 1] == char else 1
+                row.append(min(row[column - 1] + 1, previous[column] + 1,
+                    previous[column - 1] + cost))
+            # Choices that differ completely from the text are not suggested.
+            distance = row[-1]
+            if node[2] is not None and distance <= max_distance:
+                if distance < max(len(text), len(node[2])):
+                    found.append((distance, node[2]))
+                    found.sort()
+            # Only search deeper if something below could be close enough.
+            bound = min(row)
+            if bound <= max_distance:
+                for next_char, child in node[0].items():
+                    count += 1
+                    heapq.heappush(heap, (bound, count, child, next_char, row))
+        return [choice for distance, choice in found[:limit]]
+
+class MenuMeta(type):
+    """
+    A metaclass tracking changes to menu classes. (type)
+
+    Any change to a menu_ method or to sort_menu on any menu class bumps the
+    generation, which marks every cached menu as out of date. Only attributes
+    set or deleted on the class are seen. Changes to the methods themselves,
+    like a docstring edited in place, can be applied with MenuMeta.generation += 1.
+
+    Class Attributes:
+    generation: The number of changes made to menu classes. (int)
+
+    Overridden Methods:
+    __delattr__
+    __setattr__
+    """
+
+    # The number of changes made to menu classes.
+    generation = 0
+
+    def __delattr__(cls, name):
+        """
+        Delete an attribute, tracking menu changes. (None)
+
+        Parameters:
+        name: The name of the attribute. (str)
+        """
+        super().__delattr__(name)
+        if name.startswith('menu_') or name == 'sort_menu':
+            MenuMeta.generation += 1
+
+    def __setattr__(cls, name, value):
+        """
+        Set an attribute, tracking menu changes. (None)
+
+        Parameters:
+        name: The name of the attribute. (str)
+        value: The new value of the attribute. (object)
+        """
+        super().__setattr__(name, value)
+        if name.startswith('menu_') or name == 'sort_menu':
+            MenuMeta.generation += 1
+
+class MenuMethods(Mapping):
+    """
+    A read-only view of a menu's choices as bound methods. (Mapping)
+
+    The mapping of choices to method names is shared by every instance of a
+    menu class. Each menu gets its own view of it, which looks the method up
+    on the menu when a choice is accessed, so menu.methods[choice]() runs the
+    handler for that menu.
+
+    Attributes:
+    menu: The menu the methods are looked up on. (Menu)
+    names: The mapping of choices to method names. (MappingProxyType of str: str)
+
+    Overridden Methods:
+    __init__
+    __contains__
+    __getitem__
+    __iter__
+    __len__
+    """
+
+    def __init__(self, menu, names):
+        """
+        Set up the view. (None)
+
+        Parameters:
+        menu: The menu the methods are looked up on. (Menu)
+        names: The mapping of choices to method names. (MappingProxyType of str: str)
+        """
+        self.menu = menu
+        self.names = names
+
+    def __contains__(self, choice):
+        """
+        Check for a choice without looking up its method. (bool)
+
+        Parameters:
+        choice: The choice to check for. (str)
+        """
+        return choice in self.names
+
+    def __getitem__(self, choice):
+        """
+        Get the method for a choice. (bound method)
+
+        Parameters:
+        choice: The choice, in lower case. (str)
+        """
+        return getattr(self.menu, self.names[choice])
+
+    def __iter__(self):
+        """Iterate over the choices. (iterator)"""
+        return iter(self.names)
 
-class Menu(object):
+    def __len__(self):
+        """The number of choices. (int)"""
+        return len(self.names)
+
+class Menu(object, metaclass = MenuMeta):
     """
     A simple framework for writing command line menus. (object)
 
@@ -49,62 +354,197 @@ class Menu(object):
     parent class for a menu system that you define yourself.
 
     Class Attributes:
+    idle_timeout: The seconds to wait for input before giving up, or None. (float or None)
     intro: Text displayed at the beginning of the menu loop. (str)
+    page_size: The choices on each page, or None to fit the screen. (int or None)
     prompt: Text displayed when getting user choices. (str)
+    redraw_menu: A flag for showing the menu text before every choice. (bool)
+    stats_commands: A flag for accepting '!' timing and profiling commands. (bool)
 
     Attributes:
-    choice_queue: Automatic commands yet to be proccessed. (list of str)
+    choice_queue: Automatic commands yet to be proccessed. (deque of str)
     lastchoice: The last choice made by the user. (str)
-    methods: The mapping of menu choices to methods. (dict of str:bound method)
+    choices: The menu choices, for finding abbreviations. (ChoiceTrie)
+    drawn_text: The menu text last shown to the user. (str or None)
+    line_starts: The index of each line in search_text. (list of int)
+    lines: The lines of the menu text. (list of str)
+    methods: The mapping of menu choices to methods. (MenuMethods of str: bound method)
+    navigator: The MenuStack running the menu, if any. (MenuStack or None)
+    page: The index of the page of the menu being shown. (int)
+    page_count: The number of pages the menu was last shown in. (int)
+    page_rows: The choices on each page when the menu was last shown. (int or None)
+    page_shape: The rows and columns the kept pages were made for. (tuple or None)
+    pages: The text of each page shown, by page. (dict of int: str)
+    rng: The menu's random number generator, for any randomness. (random.Random)
+    search_text: The lines of the menu text in lower case, for finding text. (str)
+    seed: The seed for the random number generator. (int)
     status: The status of the menu system, if any. (str)
-    stdin_save: Storage for when stdin is redirected. (file)
-    stdout_save: Storage for when stdout is redirected. (file)
+    stdin: The input file for the menu interface. (file)
+    stdout: The output file for the menu interface. (file)
+    submenus: The submenus that have been loaded, by attribute name. (dict of str: object)
     text: The text of the menu. (str)
 
     Methods:
+    batchloop: Process a stream of choices without showing the menu. (int)
+    build_menu: Build the menu text, dictionary, and choices from the class. (tuple)
+    choose: Process a choice and any choices it queues. (ChoiceResult)
     emptyline: Handle blank choices. (bool)
+    finish: Run the processing done after the menu loop. (ChoiceResult)
+    input: Get a line of input from the user. (str)
     menuloop: Repeatedly display a menu, get a choice, and process tit. (None)
     onechoice: Act on a single menu choice. (bool)
+    paginate: Work out the pages of the menu, without drawing any of them. (tuple or None)
     postchoice: Common processing after the choice is proccessed. (bool)
     postloop: Processing done after the menu loop ends. (None)
     prechoice: Process the choice before acting on it. (str)
     preloop: Processing done before starting the menu loop. (None)
+    print: Print to the menu's output file. (None)
+    process_choice: Run a choice through the choice hooks. (bool)
+    render: Build the display shown before getting a choice. (str)
+    reset: Clear the choice tracking, so the menu can be run again. (None)
     set_menu: Set up the menu text and dictionary. (None)
+    snapshot: Get the state to check when replaying a journal. (tuple)
     sort_menu: Sort the lines of the menu text. (None)
+    start: Run the processing done before the menu loop. (ChoiceResult)
+    turn_page: Handle a page command. (bool)
     unrecognized: Handle choices not in the menu. (bool)
+    window: Get the menu text to show, one page of it for long menus. (str)
 
     Overridden Methods:
     __init__
     """
 
+    # The seconds to wait for input before giving up, or None to wait forever.
+    idle_timeout = None
     # Text displayed at the beginning of the menu loop.
     intro = ''
+    # The choices on each page, or None to fit the screen.
+    page_size = None
     # Text displayed when getting user choices.
     prompt = 'Please enter your selection: '
+    # A flag for showing the menu text before every choice.
+    redraw_menu = True
+    # A flag for accepting '!' timing and profiling commands.
+    stats_commands = True
 
-    def __init__(self, stdin=None, stdout=None):
+    def __init__(self, stdin=None, stdout=None, seed = None):
         """
         Initialize the file interface for the menu system. (None)
 
+        A random seed is picked if none is given, so that it can be recorded.
+
         Parameters:
-        sort_key: The key parameter when sorting menu choices. (callable)
         stdin: The input file for the menu interface. (file)
         stdout: The output file for the menu interface. (file)
+        seed: The seed for the menu's random number generator. (int or None)
         """
-        # Save the stdin before redirecting.
-        self.stdin_save = sys.__stdin__
-        if stdin is not None:
-            sys.stdin = stdin
-        # Save the stdout before redirecting.
-        self.stdout_save = sys.__stdout__
-        if stdout is not None:
-            sys.stdout = stdout
+        # Store the files, defaulting to the current standard ones.
+        self.stdin = sys.stdin if stdin is None else stdin
+        self.stdout = sys.stdout if stdout is None else stdout
+        # Seed the menu's own random numbers.
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
         # Set up the menu.
         self.set_menu()
         # Set up the tracking attributes.
         self.lastchoice = ''
         self.status = ''
-        self.choice_queue = []
+        self.choice_queue = deque()
+        self.drawn_text = None
+        self.submenus = {}
+        self.navigator = None
+        self.page = 0
+        self.page_count = 1
+        self.page_rows = None
+
+    def batchloop(self, choices, verbose = False):
+        """
+        Process a stream of choices without showing the menu. (int)
+
+        The choices are read lazily, so choices may be an open file, a pipe, or
+        any other iterable of strings. The menu is never displayed, and the
+        status is only shown if verbose is True. Any queued choices are still
+        processed, but not counted. The loop ends when a choice stops the menu
+        or when the choices run out. The return value is the number of choices
+        read from the stream.
+
+        To have choices that ask for more input read it from the same stream,
+        pass that stream as both the menu's stdin and choices.
+
+        Parameters:
+        choices: The choices to process. (iterable of str)
+        verbose: A flag for showing the status after each choice. (bool)
+        """
+        # User defined processing before the loop starts.
+        stop = self.start(capture = False).stop
+        count = 0
+        # Loop through the menu choices, reading no further than the one that stops.
+        if not stop:
+            for choice in choices:
+                stop, status, output = self.choose(choice.strip(), capture = False)
+                count += 1
+                # Show the status.
+                if verbose and status:
+                    self.print('Status:', status)
+                if stop:
+                    break
+        # Clean up after the menu loop.
+        self.finish(capture = False)
+        return count
+
+    def build_menu(self):
+        """
+        Build the menu text, dictionary, and choices from the class. (tuple)
+
+        The return value is a read-only mapping of choices to method names, the
+        text of the menu, and a tree of the choices for abbreviations and
+        suggestions.
+        """
+        menu_lines = []
+        methods = {}
+        menu_class = type(self)
+        for attribute in dir(menu_class):
+            if attribute.startswith('menu_'):
+                attr = getattr(menu_class, attribute)
+                if getattr(attr, '__doc__', None):
+                    menu_lines.append(attr.__doc__.strip().split('\n')[0].strip())
+                    methods[attr.__doc__.split(':')[0].strip().lower()] = attribute
+        self.sort_menu(menu_lines)
+        return MappingProxyType(methods), '\n' + '\n'.join(menu_lines), ChoiceTrie(methods)
+
+    def choose(self, choice, capture = True):
+        """
+        Process a choice and any choices it queues. (ChoiceResult)
+
+        The status is cleared before the choice is processed, so the status in
+        the result is only from this choice. If capture is True, what the menu
+        prints is collected for the result instead of going to its output file.
+
+        Parameters:
+        choice: The user's choice. (str)
+        capture: A flag for collecting the menu's output. (bool)
+        """
+        self.status = ''
+        if capture:
+            return self._capture(self.process_choice, choice)
+        return ChoiceResult(self.process_choice(choice), self.status, None)
+
+    def _capture(self, func, *args):
+        """
+        Run a function, collecting what the menu prints. (ChoiceResult)
+
+        Parameters:
+        func: The function to run, returning the stop flag. (callable)
+        *args: The arguments to the function.
+        """
+        stdout = self.stdout
+        self.stdout = io.StringIO()
+        try:
+            stop = func(*args)
+            output = self.stdout.getvalue()
+        finally:
+            self.stdout = stdout
+        return ChoiceResult(stop, self.status, output)
 
     def emptyline(self):
         """Handle blank choices. (bool)"""
@@ -114,49 +554,66 @@ class Menu(object):
         else:
             return False
 
+    def finish(self, capture = True):
+        """
+        Run the processing done after the menu loop. (ChoiceResult)
+
+        Parameters:
+        capture: A flag for collecting the menu's output. (bool)
+        """
+        if capture:
+            return self._capture(self._finish)
+        return ChoiceResult(self._finish(), self.status, None)
+
+    def _finish(self):
+        """Run postloop, for finish. (bool)"""
+        self.postloop()
+        return True
+
+    def input(self, prompt = '', timeout = None):
+        """
+        Get a line of input from the user. (str)
+
+        This works like the built-in input function, but uses the menu's files.
+        If the user takes longer than the timeout, InputTimeout is raised. See
+        timed_input.timed_input for when line editing is available.
+
+        Parameters:
+        prompt: The text displayed when getting the input. (str)
+        timeout: The seconds to wait, or None for the idle timeout. (float or None)
+        """
+        return timed_input(prompt, self.idle_timeout if timeout is None else timeout, self.stdin, self.stdout)
+
     def menuloop(self, intro=None):
         """
         Repeatedly display a menu, get a choice, and process that choice. (None)
 
         If the intro parameter is None, the intro attribute of the class is used
-        instead.
+        instead. If the user is idle for longer than the idle timeout, the loop
+        ends as if the menu had stopped.
 
         Parameters:
         intro: The text to display before the loop begins. (str or None)
         """
         # User defined processing before the loop starts.
-        self.preloop()
+        stop = self.start(capture = False).stop
         # Display any introductory text.
         if intro is not None:
             self.intro = intro
         if self.intro:
-            print(self.intro)
+            self.print(self.intro)
         # Loop through the menu choices.
-        while True:
-            # Process any queued tasks first.
-            if self.choice_queue:
-                choice = self.choice_queue.pop(0)
-            else:
-                # Display the menu, with any status.
-                print(self.text)
-                print()
-                if self.status:
-                    print('Status:', self.status)
-                    print()
-                    self.status = ''
-                # Get the user's choice.
-                choice = input(self.prompt).strip()
-            # Process the choice.
-            choice = self.prechoice(choice)
-            stop = self.onechoice(choice)
-            stop = self.postchoice(stop, choice)
-            # Check for loop termination.
-            if stop:
+        while not stop:
+            try:
+                # Display the menu, with any status, in one write, and get the user's choice.
+                choice = timed_input(self.render(), self.idle_timeout, self.stdin, self.stdout)
+                # Process the choice, leaving the status for the next display.
+                stop = self.choose(choice.strip(), capture = False).stop
+            except InputTimeout:
+                self.print('\nTimed out waiting for input.')
                 break
         # Clean up after the menu loop.
-        self.postloop()
-        sys.stdin = self.stdin_save
-        sys.stdout = self.stdout_save
+        self.finish(capture = False)
 
     def onechoice(self, choice):
         """
@@ -165,15 +622,60 @@ class Menu(object):
         Parameters:
         choice: The user's menu choice. (str)
         """
+        key = choice.lower()
+        # Handle timing and profiling commands.
+        if key.startswith('!') and self.stats_commands:
+            STATS.command(self, choice[1:])
+            return False
+        # Handle page commands, if the menu has pages.
+        if self.page_count > 1 and self.turn_page(choice):
+            return False
+        # Abbreviations are fine as long as they only match one choice.
+        names = self.methods.names
+        if key and key not in names:
+            count, matches = self.choices.complete(key, 1)
+            if count == 1:
+                key = matches[0]
         if not choice:
             stop = self.emptyline()
-        elif choice.lower() in self.methods:
-            stop = self.methods[choice.lower()]()
+        elif key in names:
+            if STATS.enabled:
+                stop = STATS.call(self, names[key])
+            else:
+                stop = getattr(self, names[key])()
             self.lastchoice = choice
         else:
             stop = self.unrecognized(choice)
         return stop
 
+    def paginate(self, size = None):
+        """
+        Work out the pages of the menu, without drawing any of them. (tuple or None)
+
+        This sets the page count and rows that page commands use, and keeps the
+        current page in range, in case the menu or the screen has changed. The
+        return value is the rows and columns of each page, or None if the menu
+        is shown whole. See window for how the page size is chosen.
+
+        Parameters:
+        size: The columns and lines of the user's screen, or None. (tuple of int)
+        """
+        rows, columns = self.page_size, None
+        if size is None and rows is None and is_terminal(self.stdout):
+            size = shutil.get_terminal_size()
+        if size is not None:
+            columns, height = size
+            if rows is None:
+                # Leave room for the blank lines, page line, status, and prompt.
+                rows = max(height - 7, 5)
+        if rows is None or len(self.lines) <= rows:
+            self.page_count = 1
+            return None
+        self.page_rows = rows
+        self.page_count = (len(self.lines) + rows - 1) // rows
+        self.page = min(self.page, self.page_count - 1)
+        return rows, columns
+
     def postchoice(self, stop, choice):
         """
         Common processing after the choice is proccessed. (bool)
@@ -201,18 +703,105 @@ class Menu(object):
         """Processing done before starting the menu loop. (None)"""
         pass
 
+    def print(self, *args, sep = ' ', end = '\n'):
+        """
+        Print to the menu's output file. (None)
+
+        This works like the built-in print function, but uses the menu's files.
+
+        Parameters:
+        *args: The objects to print.
+        sep: The text printed between the objects. (str)
+        end: The text printed after the objects. (str)
+        """
+        print(*args, sep = sep, end = end, file = self.stdout)
+
+    def process_choice(self, choice):
+        """
+        Run a choice through the choice hooks. (bool)
+
+        The choice goes through prechoice, onechoice, and postchoice, followed
+        by any choices queued along the way, until the queue is empty or a
+        choice stops the menu.
+
+        Parameters:
+        choice: The user's choice. (str)
+        """
+        while True:
+            choice = self.prechoice(choice)
+            stop = self.onechoice(choice)
+            stop = self.postchoice(stop, choice)
+            if stop or not self.choice_queue:
+                return stop
+            choice = self.choice_queue.popleft()
+
+    def render(self, size = None):
+        """
+        Build the display shown before getting a choice. (str)
+
+        The display is the menu text, or the current page of it, the status if
+        there is one, and the prompt. If the redraw_menu attribute is false, the
+        menu text is left out when it has not changed since it was last shown.
+        Rendering clears the status.
+
+        Parameters:
+        size: The columns and lines of the user's screen, or None. (tuple of int)
+        """
+        # Add the menu text if needed.
+        lines = []
+        text = self.window(size)
+        if self.redraw_menu or text != self.drawn_text:
+            lines.append(text)
+            lines.append('')
+            self.drawn_text = text
+        # Add the status if there is one.
+        if self.status:
+            lines.append('Status: {}'.format(self.status))
+            lines.append('')
+            self.status = ''
+        # Add the prompt.
+        lines.append(self.prompt)
+        return '\n'.join(lines)
+
+    def reset(self):
+        """
+        Clear the choice tracking, so the menu can be run again. (None)
+
+        Submenus are reset before they are reused. Subclasses should clear any
+        other state that preloop doesn't set up again.
+        """
+        self.lastchoice = ''
+        self.status = ''
+        self.choice_queue.clear()
+        self.drawn_text = None
+        self.page = 0
+
     def set_menu(self):
         """Set up the menu text and dictionary. (None)"""
-        menu_lines = []
-        self.methods = {}
-        for attribute in dir(self):
-            if attribute.startswith('menu_'):
-                attr = getattr(self, attribute)
-                if hasattr(attr, '__doc__'):
-                    menu_lines.append(attr.__doc__.strip().split('\n')[0].strip())
-                    self.methods[attr.__doc__.split(':')[0].strip().lower()] = attr
-        self.sort_menu(menu_lines)
-        self.text = '\n' + '\n'.join(menu_lines)
+        # Rebuild the class's cached menu if it is missing or out of date.
+        menu_class = type(self)
+        cache = menu_class.__dict__.get('_menu_cache')
+        if cache is None or cache[0] != MenuMeta.generation:
+            methods, text, choices = self.build_menu()
+            lines = text.split('\n')[1:]
+            # Index the lines for searching them all at once.
+            search_text = '\n'.join(lines).lower()
+            line_starts = list(itertools.accumulate([0] + [len(line) + 1 for line in lines[:-1]]))
+            cache = (MenuMeta.generation, methods, text, choices, lines, search_text, line_starts)
+            menu_class._menu_cache = cache
+        # Share the cached menu, but keep pages for this menu's screen.
+        names, self.text, self.choices, self.lines, self.search_text, self.line_starts = cache[1:]
+        self.methods = MenuMethods(self, names)
+        self.pages = {}
+        self.page_shape = None
+
+    def snapshot(self):
+        """
+        Get the state to check when replaying a journal. (tuple)
+
+        Subclasses should add any state their choices change.
+        """
+        return (self.lastchoice, self.rng.getstate())
 
     def sort_menu(self, menu_lines):
         """
@@ -223,6 +812,57 @@ class Menu(object):
         """
         menu_lines.sort(key = lambda line: line.split(':')[0])
 
+    def start(self, capture = True):
+        """
+        Run the processing done before the menu loop. (ChoiceResult)
+
+        This runs preloop, and then any choices it queued.
+
+        Parameters:
+        capture: A flag for collecting the menu's output. (bool)
+        """
+        if capture:
+            return self._capture(self._start)
+        return ChoiceResult(self._start(), self.status, None)
+
+    def _start(self):
+        """Run preloop and any queued choices, for start. (bool)"""
+        self.preloop()
+        if self.choice_queue:
+            return self.process_choice(self.choice_queue.popleft())
+        return False
+
+    def turn_page(self, choice):
+        """
+        Handle a page command. (bool)
+
+        The return value is False if the choice isn't a page command.
+
+        Parameters:
+        choice: The user's menu choice. (str)
+        """
+        last_page = self.page_count - 1
+        if choice == '>':
+            self.page = min(self.page + 1, last_page)
+        elif choice == '<':
+            self.page = max(self.page - 1, 0)
+        elif choice[:1] == '#' and choice[1:].isdigit():
+            self.page = min(max(int(choice[1:]) - 1, 0), last_page)
+        elif choice[:1] == '/' and len(choice) > 1:
+            # Search from the next page on, wrapping around to the start.
+            text = choice[1:].lower()
+            start = (self.page + 1) * self.page_rows % len(self.lines)
+            found = self.search_text.find(text, self.line_starts[start])
+            if found < 0:
+                found = self.search_text.find(text)
+            if found < 0:
+                self.status = 'No choice contains {!r}.'.format(choice[1:])
+            else:
+                self.page = (bisect.bisect_right(self.line_starts, found) - 1) // self.page_rows
+        else:
+            return False
+        return True
+
     def unrecognized(self, choice):
         """
         Handle choices not in the menu. (bool)
@@ -230,5 +870,349 @@ class Menu(object):
         Parameters:
         choice: The user's menu choice. (str)
         """
-        self.status = 'I do not recognize the choice {!r}. Please make another choice.'.format(choice)
+        # Check for an ambiguous abbreviation.
+        count, matches = self.choices.complete(choice.lower())
+        if count > 1:
+            if count > len(matches):
+                matches.append('...')
+            status = 'The choice {!r} could be any of {}. Please make another choice.'
+            self.status = status.format(choice, ', '.join(matches))
+        else:
+            # Suggest the closest choices.
+            self.status = 'I do not recognize the choice {!r}. Please make another choice.'.format(choice)
+            suggestions = self.choices.suggest(choice.lower())
+            if suggestions:
+                self.status = '{} Did you mean {}?'.format(self.status, ' or '.join(suggestions))
+        return False
+
+    def window(self, size = None):
+        """
+        Get the menu text to show, one page of it for long menus. (str)
+
+        Menus that fit on one page are shown whole. Otherwise the page is built
+        from just its own lines, and kept to be shown again until the page size
+        changes. The page size is page_size, if it is set. If it isn't, the
+        pages fit the screen size passed in, or the terminal if the output file
+        is one, with lines cut off at the screen's width. With no page_size and
+        no screen, the menu is shown whole.
+
+        Parameters:
+        size: The columns and lines of the user's screen, or None. (tuple of int)
+        """
+        shape = self.paginate(size)
+        if shape is None:
+            return self.text
+        rows, columns = shape
+        if self.page_shape != shape:
+            self.pages.clear()
+            self.page_shape = shape
+        text = self.pages.get(self.page)
+        if text is None:
+            start = self.page * rows
+            lines = self.lines[start:start + rows]
+            footer = 'Page {} of {}. > next, < back, #n page n, /text find.'.format(self.page + 1, self.page_count)
+            if columns is not None:
+                lines = [line[:columns] for line in lines]
+                footer = footer[:columns]
+            text = '\n{}\n\n{}'.format('\n'.join(lines), footer)
+            self.pages[self.page] = text
+        return text
+
+class Submenu(object):
+    """
+    A submenu that is only loaded when it is chosen. (object)
+
+    A Submenu is assigned to a menu_ attribute of a Menu subclass, in place of
+    a method. The first line of its docstring works the same way:
+
+        menu_maze = Submenu('cmd_example2:Maze', 'A: Play in a maze.')
+
+    The submenu's module is imported the first time the choice is made, and
+    the submenu is created then, with the parent menu's files and a seed from
+    the parent's random numbers. The instance is kept by the parent menu, and
+    reset and run again each time the choice is made. Submenus may be Menu or
+    cmd.Cmd subclasses. A cmd.Cmd submenu reading from anything other than the
+    real standard input has use_rawinput turned off, so it reads that file. If
+    timed reads have wrapped the file, the submenu reads through the wrapper,
+    so it gets any input read ahead, unless the file is a terminal with nothing
+    read ahead.
+
+    If the parent menu is being run by a MenuStack, the submenu is pushed onto
+    the stack instead of being run inside the parent's choice.
+
+    Attributes:
+    name: The name of the attribute the submenu is assigned to. (str)
+    module: The name of the module defining the owner class. (str)
+    path: The submenu class as 'module:name', or just the name for the owner's module. (str)
+    submenu_class: The submenu class, once it has been loaded. (type or None)
+
+    Methods:
+    load: Import the submenu class. (type)
+    run: Run the submenu for a parent menu, or push it onto the parent's stack. (bool)
+
+    Overridden Methods:
+    __init__
+    __get__
+    __set_name__
+    """
+
+    def __init__(self, path, doc):
+        """
+        Set up the submenu without loading it. (None)
+
+        Parameters:
+        path: The submenu class as 'module:name', or just the name for the owner's module. (str)
+        doc: The docstring, giving the choice and the menu text. (str)
+        """
+        self.path = path
+        self.__doc__ = doc
+        self.name = None
+        self.module = None
+        self.submenu_class = None
+
+    def __get__(self, menu, menu_class = None):
+        """
+        Get the submenu's handler for a menu. (Submenu or callable)
+
+        Parameters:
+        menu: The menu the submenu was accessed from, or None for the class. (Menu)
+        menu_class: The class the submenu was accessed from. (type)
+        """
+        if menu is None:
+            return self
+        return lambda: self.run(menu)
+
+    def __set_name__(self, owner, name):
+        """
+        Note where the submenu was assigned. (None)
+
+        Parameters:
+        owner: The menu class the submenu is assigned in. (type)
+        name: The attribute name the submenu is assigned to. (str)
+        """
+        self.name = name
+        self.module = owner.__module__
+
+    def load(self):
+        """Import the submenu class. (type)"""
+        if self.submenu_class is None:
+            self.submenu_class = load_class(self.path, self.module)
+        return self.submenu_class
+
+    def run(self, menu):
+        """
+        Run the submenu for a parent menu, or push it onto the parent's stack. (bool)
+
+        The return value is always False, so the parent carries on.
+
+        Parameters:
+        menu: The parent menu. (Menu)
+        """
+        submenu = menu.submenus.get(self.name)
+        if submenu is None:
+            submenu_class = self.load()
+            submenu = submenu_class(stdin = menu.stdin, stdout = menu.stdout, seed = menu.rng.getrandbits(64))
+            menu.submenus[self.name] = submenu
+        elif hasattr(submenu, 'reset'):
+            submenu.reset()
+        # Let the stack run the submenu, if there is one.
+        if menu.navigator is not None:
+            menu.navigator.push(submenu)
+            return False
+        # Use the parent's current files, which change when output is captured.
+        submenu.stdin, submenu.stdout = menu.stdin, menu.stdout
+        if hasattr(submenu, 'menuloop'):
+            submenu.menuloop()
+        else:
+            # Input read ahead for timed reads is only in the reader.
+            reader = TimedReader.find(submenu.stdin)
+            if reader is not None and (reader.pending() or not is_terminal(submenu.stdin)):
+                submenu.stdin = reader
+            # Only the real standard input can use input() and its line editing.
+            if submenu.stdin is not sys.stdin:
+                submenu.use_rawinput = False
+            submenu.cmdloop()
         return False
+
+class MenuStack(object):
+    """
+    A loop running nested menus without nesting calls. (object)
+
+    The open menus are kept on a list, with the current one at the end. When a
+    Submenu is chosen, it is pushed onto the list, and the loop carries on with
+    it. When a menu stops, it is popped off, and the loop carries on with the
+    menu under it. Two commands work in any menu, ahead of its own choices:
+
+        back: Close the current menu and go back to the one under it.
+        top: Close every menu but the first.
+
+    So however deep the menus go, the call stack stays the same depth, and no
+    handler is left waiting for a submenu to finish. Menus can be Menu or
+    cmd.Cmd instances, and all of them use the stack's files. The idle timeout
+    of the current menu applies while waiting for input.
+
+    Class Attributes:
+    back_words: The commands going back one menu. (tuple of str)
+    top_words: The commands going back to the first menu. (tuple of str)
+
+    Attributes:
+    menus: The open menus, with the current one last. (list of object)
+    stdin: The input file for the menus. (file)
+    stdout: The output file for the menus. (file)
+
+    Methods:
+    choose: Process a line of input with the current menu. (bool)
+    pop: Close the current menu. (None)
+    prompt: Build the display shown before getting input. (str)
+    push: Open a menu on top of the current one. (None)
+    run: Run the menus until the first one stops. (None)
+    tell: Give the user a message from the stack. (None)
+
+    Overridden Methods:
+    __init__
+    """
+
+    # The commands going back one menu.
+    back_words = ('back',)
+    # The commands going back to the first menu.
+    top_words = ('top',)
+
+    def __init__(self, stdin = None, stdout = None):
+        """
+        Set up an empty stack. (None)
+
+        Parameters:
+        stdin: The input file for the menus. (file)
+        stdout: The output file for the menus. (file)
+        """
+        self.stdin = sys.stdin if stdin is None else stdin
+        self.stdout = sys.stdout if stdout is None else stdout
+        self.menus = []
+
+    def choose(self, line):
+        """
+        Process a line of input with the current menu. (bool)
+
+        The return value is the menu's flag for stopping.
+
+        Parameters:
+        line: The line of input, without the line ending. (str)
+        """
+        menu = self.menus[-1]
+        if isinstance(menu, Menu):
+            return menu.choose(line, capture = False).stop
+        # Run the line through the cmd.Cmd hooks.
+        line = menu.precmd(line)
+        stop = menu.onecmd(line)
+        return menu.postcmd(stop, line)
+
+    def pop(self):
+        """Close the current menu. (None)"""
+        menu = self.menus.pop()
+        if isinstance(menu, Menu):
+            menu.finish(capture = False)
+            menu.navigator = None
+        else:
+            menu.postloop()
+
+    def prompt(self):
+        """Build the display shown before getting input. (str)"""
+        menu = self.menus[-1]
+        if isinstance(menu, Menu):
+            return menu.render()
+        return menu.prompt
+
+    def push(self, menu):
+        """
+        Open a menu on top of the current one. (None)
+
+        The menu is started and its intro is shown. If starting it stops it,
+        it is closed again straight away.
+
+        Parameters:
+        menu: The Menu or cmd.Cmd instance to open. (object)
+        """
+        menu.stdin, menu.stdout = self.stdin, self.stdout
+        self.menus.append(menu)
+        if isinstance(menu, Menu):
+            menu.navigator = self
+            stop = menu.start(capture = False).stop
+        else:
+            menu.preloop()
+            stop = False
+        if menu.intro:
+            print(menu.intro, file = self.stdout)
+        if stop:
+            self.pop()
+
+    def run(self, menu):
+        """
+        Run the menus until the first one stops. (None)
+
+        If the input runs out or the user is idle too long, all of the open
+        menus are closed. This includes the input running out while a choice
+        is asking for more of it, which is reported before the menus close.
+
+        Parameters:
+        menu: The first menu. (Menu or cmd.Cmd)
+        """
+        self.push(menu)
+        while self.menus:
+            try:
+                # Show the current menu and get a line of input.
+                timeout = getattr(self.menus[-1], 'idle_timeout', None)
+                try:
+                    line = timed_input(self.prompt(), timeout, self.stdin, self.stdout).strip()
+                except EOFError:
+                    break
+                # Handle the navigation commands.
+                depth = len(self.menus)
+                word = line.lower()
+                if word in self.back_words or word in self.top_words:
+                    if depth == 1:
+                        self.tell('You are already at the top menu.')
+                    keep = depth - 1 if word in self.back_words else 1
+                    while len(self.menus) > max(keep, 1):
+                        self.pop()
+                    continue
+                try:
+                    stop = self.choose(line)
+                except EOFError:
+                    print('\nThe input ran out partway through that choice.', file = self.stdout)
+                    break
+                # Close the menu that stopped, along with any submenus it opened.
+                if stop:
+                    while len(self.menus) >= depth:
+                        self.pop()
+            except InputTimeout:
+                print('\nTimed out waiting for input.', file = self.stdout)
+                break
+        # Close anything left open.
+        while self.menus:
+            self.pop()
+
+    def tell(self, message):
+        """
+        Give the user a message from the stack. (None)
+
+        Menus show the message as their status, cmd.Cmd instances print it.
+
+        Parameters:
+        message: The message to give. (str)
+        """
+        menu = self.menus[-1]
+        if isinstance(menu, Menu):
+            menu.status = message
+        else:
+            print(message, file = self.stdout)
+
+def load_class(path, module = None):
+    """
+    Load a class from a 'module:name' path. (type)
+
+    Parameters:
+    path: The module and class name, separated by a colon. (str)
+    module: The module to use if the path is just a class name. (str or None)
+    """
+    module_name, colon, class_name = path.rpartition(':')
+    return getattr(importlib.import_module(module_name or module), class_name)
@@ -0,0 +1,739 @@
+"""
+menu_bench.py
+
+Benchmarks for the menu and maze code.
+
+Run with the names of the benchmarks to run, or with no arguments to run all of
+them. Each benchmark prints one line per measurement. The results can also be
+saved as JSON, and compared to saved results to find regressions:
+
+    python menu_bench.py --json baseline.json
+    python menu_bench.py --compare baseline.json --tolerance 0.2
+
+Measurements in units per second are better when higher, and all others are
+better when lower. The exit status is 1 if any measurement got worse by more
+than the tolerance.
+
+The scripted benchmarks drive each kind of menu and maze through its normal
+text interface, feeding it input from a TimedInput. The time between reads
+gives the latency of each choice, including drawing the menu.
+
+Constants:
+BENCHMARKS: The registered benchmarks. (OrderedDict of str: callable)
+
+Classes:
+TimedInput: An input file of scripted lines that times each read. (object)
+
+Functions:
+bench_batch: Time choices processed by the batch loop. (list)
+bench_function_menus: Drive the function and simple class menus with scripts. (list)
+bench_bfs: Time and measure the maze distance field as mazes grow. (list)
+bench_choices: Time choices through the menu engine and the text frontend. (list)
+bench_collatz: Time Collatz stopping times for ranges of numbers. (list)
+bench_engine: Time moves made by the headless maze engine. (list)
+bench_generate: Time maze generation for each algorithm. (list)
+bench_journal: Time recording and replaying a session journal. (list)
+bench_lookup: Time resolving choices as the number of menu_ methods grows. (list)
+bench_mazes: Drive both cmd mazes through their solutions as mazes grow. (list)
+bench_number_game: Time exploring the number game as the limit grows. (list)
+bench_next_prime: Time finding the next prime at different magnitudes. (list)
+bench_menu_size: Time menu creation as the number of menu_ methods grows. (list)
+bench_menus: Drive the Menu subclasses with scripts. (list)
+bench_navigator: Drive nested menus recursively and with a MenuStack. (list)
+bench_simulate: Time random players escaping the cmd_example2 maze. (list)
+bench_pages: Drive long menus shown whole and a page at a time. (list)
+bench_sequence: Compare memory for a list and a NumberSequence. (list)
+bench_timed_input: Time reading lines and timing out on a pipe. (list)
+benchmark: Register a benchmark function. (callable)
+compare: Find the measurements that got worse than a baseline. (list of str)
+drive: Run a scripted session and measure it. (list)
+main: Run the benchmarks. (int)
+make_serpentine: Create a maze that winds back and forth across every row. (MazeGrid)
+maze_script: Get the commands that walk out of a maze. (list of str)
+time_call: Time the average run of a function. (float)
+"""
+
+import argparse
+from collections import OrderedDict
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import cmd_example
+import cmd_example2
+import journal
+from maze_engine import SOLVED, MazeEngine
+import maze_gen
+from maze_grid import MazeGrid
+from menu import MenuStack
+import menu_args
+import menu_class
+import menu_funcs
+from number_game import NumberGame
+from menu_stats import STATS
+from menu_test import DeepMenu, NumberMenu, TopMenu, make_menu_class
+import primes
+import sequences
+from timed_input import InputTimeout, TimedReader
+
+# The registered benchmarks.
+BENCHMARKS = OrderedDict()
+
+def benchmark(func):
+    """
+    Register a benchmark function. (callable)
+
+    The function is registered under its name without the 'bench_' prefix. It
+    should return a list of (measurement, value, unit) tuples.
+
+    Parameters:
+    func: The benchmark function. (callable)
+    """
+    BENCHMARKS[func.__name__[6:]] = func
+    return func
+
+class TimedInput(object):
+    """
+    An input file of scripted lines that times each read. (object)
+
+    Attributes:
+    lines: The lines left to read. (iterator of str)
+    times: The time of each read. (list of float)
+
+    Methods:
+    latencies: Get the time between each read and the next. (list of float)
+    readline: Read the next line, noting the time. (str)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, lines):
+        """
+        Set up the script. (None)
+
+        Parameters:
+        lines: The lines to read, without line endings. (iterable of str)
+        """
+        self.lines = iter(lines)
+        self.times = []
+
+    def latencies(self):
+        """Get the time between each read and the next. (list of float)"""
+        return [end - start for start, end in zip(self.times, self.times[1:])]
+
+    def readline(self):
+        """Read the next line, noting the time. (str)"""
+        self.times.append(time.perf_counter())
+        line = next(self.lines, None)
+        return '' if line is None else line + '\n'
+
+def compare(results, baseline, tolerance):
+    """
+    Find the measurements that got worse than a baseline. (list of str)
+
+    Parameters:
+    results: The new results, as saved to JSON. (dict)
+    baseline: The saved results to compare to. (dict)
+    tolerance: The fraction a measurement may get worse by. (float)
+    """
+    regressions = []
+    for name, measurements in results.items():
+        for measurement, (value, unit) in measurements.items():
+            old = baseline.get(name, {}).get(measurement)
+            if old is None or old[1] != unit:
+                continue
+            # Rates should stay high, everything else should stay low.
+            if unit.endswith('/sec'):
+                worse = value < old[0] * (1 - tolerance)
+            else:
+                worse = value > old[0] * (1 + tolerance)
+            if worse:
+                text = '{}: {}: {:.3f} {} (was {:.3f})'
+                regressions.append(text.format(name, measurement, value, unit, old[0]))
+    return regressions
+
+def drive(label, session, lines, builtin_io = False):
+    """
+    Run a scripted session and measure it. (list)
+
+    The session is timed once, and run again under tracemalloc for its peak
+    memory. The measurements are the startup time to the first read, reads
+    per second after that, latency percentiles, and peak memory.
+
+    Parameters:
+    label: The name of the session for the measurements. (str)
+    session: A function taking input and output files and running a session. (callable)
+    lines: The scripted input. (list of str)
+    builtin_io: A flag for sessions using the built-in input and print. (bool)
+    """
+    def run():
+        stdin, stdout = TimedInput(lines), journal.NullWriter()
+        if builtin_io:
+            old_files = sys.stdin, sys.stdout
+            sys.stdin, sys.stdout = stdin, stdout
+        try:
+            session(stdin, stdout)
+        finally:
+            if builtin_io:
+                sys.stdin, sys.stdout = old_files
+        return stdin
+    start = time.perf_counter()
+    stdin = run()
+    end = time.perf_counter()
+    tracemalloc.start()
+    run()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Work out the measurements.
+    latencies = sorted(stdin.latencies())
+    results = [('{} startup'.format(label), (stdin.times[0] - start) * 1e6, 'usec'),
+        ('{} choices'.format(label), len(latencies) / (end - stdin.times[0]), 'choices/sec')]
+    for percentile in (50, 90, 99):
+        index = min(len(latencies) - 1, len(latencies) * percentile // 100)
+        results.append(('{} p{}'.format(label, percentile), latencies[index] * 1e6, 'usec'))
+    results.append(('{} peak memory'.format(label), peak / 2 ** 20, 'MiB'))
+    return results
+
+def make_serpentine(width, height):
+    """
+    Create a maze that winds back and forth across every row. (MazeGrid)
+
+    This gives the longest possible path through the maze.
+
+    Parameters:
+    width: The number of columns in the maze. (int)
+    height: The number of rows in the maze. (int)
+    """
+    maze = MazeGrid(width, height, end = (0, height - 1) if height % 2 == 0 else (width - 1, height - 1))
+    for y in range(height):
+        for x in range(width - 1):
+            maze.open_wall(x, y, 'e')
+        if y < height - 1:
+            maze.open_wall(width - 1 if y % 2 == 0 else 0, y, 's')
+    return maze
+
+def maze_script(grid):
+    """
+    Get the commands that walk out of a maze. (list of str)
+
+    Parameters:
+    grid: The maze to walk out of. (MazeGrid)
+    """
+    words = {'e': 'east', 'n': 'north', 's': 'south', 'w': 'west'}
+    moves = grid.solve(*grid.start)
+    return ['{} {}'.format(words[letter], len(list(group))) for letter, group in itertools.groupby(moves)]
+
+def time_call(func, repeat):
+    """
+    Time the average run of a function. (float)
+
+    Parameters:
+    func: The function to time, called with no arguments. (callable)
+    repeat: How many times to call the function. (int)
+    """
+    start = time.perf_counter()
+    for run in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+@benchmark
+def bench_menu_size(sizes = (10, 100, 1000, 5000)):
+    """
+    Time menu creation as the number of menu_ methods grows. (list)
+
+    The first instance of each class builds the cached menu; later instances
+    should take the same time no matter how big the menu is.
+
+    Parameters:
+    sizes: The numbers of menu_ methods to test. (sequence of int)
+    """
+    results = []
+    for size in sizes:
+        menu_class = make_menu_class(size)
+        first = time_call(menu_class, 1)
+        later = time_call(menu_class, 1000)
+        results.append(('first instance, {} items'.format(size), first * 1e6, 'usec'))
+        results.append(('later instances, {} items'.format(size), later * 1e6, 'usec'))
+    return results
+
+@benchmark
+def bench_lookup(sizes = (10, 1000, 20000)):
+    """
+    Time resolving choices as the number of menu_ methods grows. (list)
+
+    Parameters:
+    sizes: The numbers of menu_ methods to test. (sequence of int)
+    """
+    results = []
+    for size in sizes:
+        menu = make_menu_class(size)(io.StringIO(), io.StringIO())
+        last = str(size - 1)
+        for label, choice in (('exact', last), ('typo', last[:-1] + 'x'), ('no match', 'xyzzy')):
+            elapsed = time_call(lambda: menu.onechoice(choice), 100)
+            results.append(('{}, {} items'.format(label, size), elapsed * 1e6, 'usec'))
+    return results
+
+@benchmark
+def bench_next_prime(exponents = (2, 4, 6, 9, 18, 50, 100, 300)):
+    """
+    Time finding the next prime at different magnitudes. (list)
+
+    The first call below the sieve limit includes growing the sieve.
+
+    Parameters:
+    exponents: The powers of ten to find the next prime after. (sequence of int)
+    """
+    results = []
+    for exponent in exponents:
+        number = 10 ** exponent
+        first = time_call(lambda: primes.next_prime(number), 1)
+        later = time_call(lambda: primes.next_prime(number), 10)
+        results.append(('first after 10 ** {}'.format(exponent), first * 1e6, 'usec'))
+        results.append(('later after 10 ** {}'.format(exponent), later * 1e6, 'usec'))
+    return results
+
+@benchmark
+def bench_number_game(limits = (99, 10 ** 4, 10 ** 5)):
+    """
+    Time exploring the number game as the limit grows. (list)
+
+    Parameters:
+    limits: The highest numbers before the game ends. (sequence of int)
+    """
+    results = []
+    for limit in limits:
+        start = time.perf_counter()
+        game = NumberGame(limit)
+        explored = time.perf_counter() - start
+        results.append(('explore, limit {}'.format(limit), len(game) / explored, 'states/sec'))
+        results.append(('shortest and longest, limit {}'.format(limit),
+            time_call(lambda: (game.shortest(), game.longest()), 1) * 1e3, 'msec'))
+    return results
+
+@benchmark
+def bench_collatz(sizes = (10 ** 4, 10 ** 6, 10 ** 7)):
+    """
+    Time Collatz stopping times for ranges of numbers. (list)
+
+    The cached one-at-a-time times are only measured for the smaller ranges.
+
+    Parameters:
+    sizes: The numbers of starting values to calculate. (sequence of int)
+    """
+    results = []
+    for size in sizes:
+        if size <= 10 ** 6:
+            cache = sequences.CollatzCache()
+            elapsed = time_call(lambda: [cache.stopping_time(n) for n in range(1, size + 1)], 1)
+            results.append(('cached, {} starts'.format(size), size / elapsed, 'starts/sec'))
+        if sequences.load_numpy() is not None:
+            elapsed = time_call(lambda: sequences.collatz_stopping_times(1, size + 1), 1)
+            results.append(('vectorized, {} starts'.format(size), size / elapsed, 'starts/sec'))
+    return results
+
+@benchmark
+def bench_bfs(sizes = (100, 1000, 2000)):
+    """
+    Time and measure the maze distance field as mazes grow. (list)
+
+    The search memory is the distance field plus the queue, which is the same
+    size and is dropped after the search.
+
+    Parameters:
+    sizes: The width and height of the square mazes to test. (sequence of int)
+    """
+    results = []
+    for size in sizes:
+        maze = make_serpentine(size, size)
+        cells = size * size
+        elapsed = time_call(maze.distance_field, 1)
+        memory = 2 * sys.getsizeof(maze.distance_field())
+        hint = time_call(lambda: maze.hint(0, 0), 1000)
+        results.append(('search, {} cells'.format(cells), elapsed, 'sec'))
+        results.append(('search memory, {} cells'.format(cells), memory / 2 ** 20, 'MiB'))
+        results.append(('cached hint, {} cells'.format(cells), hint * 1e6, 'usec'))
+    return results
+
+@benchmark
+def bench_generate(sizes = (100, 500), stream_size = 2000):
+    """
+    Time maze generation for each algorithm. (list)
+
+    Streaming Eller's algorithm to a file is timed at a larger size.
+
+    Parameters:
+    sizes: The width and height of the square mazes to generate. (sequence of int)
+    stream_size: The width and height of the streamed maze. (int)
+    """
+    results = []
+    for size in sizes:
+        for name in maze_gen.ALGORITHMS:
+            elapsed = time_call(lambda: maze_gen.generate(size, size, name, seed = 1), 1)
+            results.append(('{}, {} cells'.format(name, size * size), size * size / elapsed, 'cells/sec'))
+    handle, path = tempfile.mkstemp(suffix = '.maze')
+    os.close(handle)
+    try:
+        elapsed = time_call(lambda: maze_gen.write_maze(path, stream_size, stream_size, seed = 1), 1)
+    finally:
+        os.remove(path)
+    cells = stream_size * stream_size
+    results.append(('eller to file, {} cells'.format(cells), cells / elapsed, 'cells/sec'))
+    return results
+
+@benchmark
+def bench_engine(size = 300, count = 10 ** 6):
+    """
+    Time moves made by the headless maze engine. (list)
+
+    Parameters:
+    size: The width and height of the maze to move in. (int)
+    count: The number of random single steps to make. (int)
+    """
+    rng = random.Random(1)
+    moves = ''.join(rng.choice('nesw') for move in range(count))
+    # Put the exit outside the maze, so the walk never ends early.
+    engine = MazeEngine(maze_gen.generate(size, size, seed = 1), end = (size, size))
+    start = time.perf_counter()
+    for direction in moves:
+        engine.move(direction)
+    one_at_a_time = time.perf_counter() - start
+    engine.reset()
+    walked = time_call(lambda: engine.walk(moves), 1)
+    long_moves = time_call(lambda: engine.move(moves[0], size), count // 10)
+    return [('move', count / one_at_a_time, 'steps/sec'), ('walk', count / walked, 'steps/sec'),
+        ('move {} steps'.format(size), 1 / long_moves, 'moves/sec')]
+
+@benchmark
+def bench_simulate(agents = 100000, engine_agents = 200, teleport_rate = 0.1):
+    """
+    Time random players escaping the cmd_example2 maze. (list)
+
+    The players are run together by maze_sim, and one at a time through a
+    MazeEngine, which is what cmd_example2.Maze does for each command. The
+    NumPy simulation is skipped if NumPy isn't installed.
+
+    Parameters:
+    agents: The number of players for the NumPy simulation. (int)
+    engine_agents: The number of players to run through a MazeEngine. (int)
+    teleport_rate: The chance of a player trying to teleport on each turn. (float)
+    """
+    grid, start, end = cmd_example2.MAZE['grid'], cmd_example2.MAZE['start'], cmd_example2.MAZE['end']
+    def engine_players():
+        rng = random.Random(1)
+        for player in range(engine_agents):
+            engine = MazeEngine(grid, start, end, player)
+            event = None
+            while event is None or event.kind != SOLVED:
+                if rng.random() < teleport_rate:
+                    event = engine.teleport()
+                else:
+                    event = engine.move(rng.choice(engine.directions()))
+    results = [('engine, one at a time', engine_agents / time_call(engine_players, 1), 'agents/sec')]
+    if sequences.load_numpy() is not None:
+        import maze_sim
+        for rate in (0.0, teleport_rate):
+            elapsed = time_call(lambda: maze_sim.simulate(grid, agents, start, end, rate, seed = 1), 1)
+            results.append(('vectorized, teleport rate {}'.format(rate), agents / elapsed, 'agents/sec'))
+    return results
+
+@benchmark
+def bench_journal(count = 100000):
+    """
+    Time recording and replaying a session journal. (list)
+
+    Parameters:
+    count: The number of choices in the session. (int)
+    """
+    handle, path = tempfile.mkstemp(suffix = '.jrnl')
+    os.close(handle)
+    try:
+        # Collatz from 1 cycles forever without getting past 99.
+        script = io.StringIO('3\n' * count)
+        recorded = time_call(lambda: journal.record(NumberMenu, path, script, journal.NullWriter()), 1)
+        size = os.path.getsize(path)
+        replayed = time_call(lambda: journal.replay(NumberMenu, path), 1)
+    finally:
+        os.remove(path)
+    return [('record', count / recorded, 'lines/sec'), ('replay', count / replayed, 'lines/sec'),
+        ('journal size', size / count, 'bytes/line')]
+
+@benchmark
+def bench_batch(counts = (1000, 10000, 100000)):
+    """
+    Time choices processed by the batch loop. (list)
+
+    Parameters:
+    counts: The numbers of choices to process. (sequence of int)
+    """
+    results = []
+    for count in counts:
+        # Collatz from 1 cycles forever without getting past 99.
+        menu = NumberMenu(stdout = io.StringIO())
+        choices = itertools.islice(itertools.repeat('3'), count)
+        start = time.perf_counter()
+        menu.batchloop(choices)
+        elapsed = time.perf_counter() - start
+        results.append(('{} choices'.format(count), count / elapsed, 'choices/sec'))
+    return results
+
+@benchmark
+def bench_choices(count = 100000):
+    """
+    Time choices through the menu engine and the text frontend. (list)
+
+    The engine is also timed with choice timing turned on.
+
+    Parameters:
+    count: The number of choices to process. (int)
+    """
+    results = []
+    # Collatz from 1 cycles forever without getting past 99.
+    for capture in (False, True):
+        menu = NumberMenu(io.StringIO(), io.StringIO())
+        menu.start()
+        elapsed = time_call(lambda: menu.choose('3', capture), count)
+        label = 'engine, output captured' if capture else 'engine'
+        results.append((label, 1 / elapsed, 'choices/sec'))
+    menu = NumberMenu(io.StringIO(), io.StringIO())
+    menu.start()
+    STATS.set_timing(True)
+    try:
+        elapsed = time_call(lambda: menu.choose('3', False), count)
+    finally:
+        STATS.set_timing(False)
+    results.append(('engine, timing on', 1 / elapsed, 'choices/sec'))
+    menu = NumberMenu(io.StringIO('3\n' * count + '4\n'), io.StringIO())
+    elapsed = time_call(menu.menuloop, 1)
+    results.append(('menuloop', (count + 1) / elapsed, 'choices/sec'))
+    return results
+
+@benchmark
+def bench_sequence(sizes = (10 ** 5, 10 ** 6)):
+    """
+    Compare memory for a list and a NumberSequence. (list)
+
+    Parameters:
+    sizes: The numbers of numbers to store. (sequence of int)
+    """
+    results = []
+    for size in sizes:
+        for label, container in (('list', []), ('NumberSequence', sequences.NumberSequence())):
+            tracemalloc.start()
+            for number in range(10 ** 6, 10 ** 6 + size):
+                container.append(number)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(('{}, {} numbers'.format(label, size), peak / size, 'bytes/number'))
+    return results
+
+@benchmark
+def bench_menus(count = 20000):
+    """
+    Drive the Menu subclasses with scripts. (list)
+
+    Parameters:
+    count: The number of choices in each script. (int)
+    """
+    # Collatz from 1 cycles forever without getting past 99.
+    results = drive('NumberMenu', lambda stdin, stdout: NumberMenu(stdin, stdout).menuloop(),
+        ['3'] * count + ['4'])
+    results.extend(drive('TopMenu', lambda stdin, stdout: TopMenu(stdin, stdout).menuloop(),
+        ['b'] + ['3'] * count + ['4', 'e']))
+    return results
+
+@benchmark
+def bench_navigator(count = 5000, depth = 2000):
+    """
+    Drive nested menus recursively and with a MenuStack. (list)
+
+    Both TopMenu sessions go in and out of the number menu count times. The
+    DeepMenu session goes depth menus down and back to the top several times,
+    which is too deep to run recursively.
+
+    Parameters:
+    count: The number of times to open and close the submenu. (int)
+    depth: The number of nested menus to open. (int)
+    """
+    results = drive('TopMenu, recursive', lambda stdin, stdout: TopMenu(stdin, stdout).menuloop(),
+        ['b', '4'] * count + ['e'])
+    results.extend(drive('TopMenu, stack', lambda stdin, stdout: MenuStack(stdin, stdout).run(TopMenu()),
+        ['b', 'back'] * count + ['e']))
+    label = 'DeepMenu, stack, {} levels'.format(depth)
+    results.extend(drive(label, lambda stdin, stdout: MenuStack(stdin, stdout).run(DeepMenu()),
+        (['1'] * depth + ['top']) * 5 + ['2']))
+    return results
+
+@benchmark
+def bench_pages(sizes = (100, 10000, 100000), count = 2000, page_size = 20):
+    """
+    Drive long menus shown whole and a page at a time. (list)
+
+    Parameters:
+    sizes: The numbers of menu_ methods to test. (sequence of int)
+    count: The number of choices in each script. (int)
+    page_size: The choices on each page. (int)
+    """
+    results = []
+    choices = ['5', '17', '3', '42', '8'] * (count // 5)
+    paging = ['>', '5', '#3', '/Item number 9', '<'] * (count // 5)
+    for size in sizes:
+        menu_class = make_menu_class(size)
+        for label, rows, script in (('whole', size, choices), ('paged', page_size, choices),
+            ('paging', page_size, paging)):
+            def session(stdin, stdout):
+                menu = menu_class(stdin, stdout)
+                menu.page_size = rows
+                try:
+                    menu.menuloop()
+                except EOFError:
+                    pass
+            results.extend(drive('{}, {} items'.format(label, size), session, script))
+    return results
+
+@benchmark
+def bench_function_menus(count = 20000):
+    """
+    Drive the function and simple class menus with scripts. (list)
+
+    Parameters:
+    count: The number of choices in each script. (int)
+    """
+    math_menu = OrderedDict([('Add the last two numbers.', menu_args.fibonacci),
+        ('Get the next prime number.', menu_args.prime), ('Collatz the last number.', menu_args.collatz),
+        ('Jump ahead several steps.', menu_args.jump)])
+    monty_menu = OrderedDict([('Get some vigorous exercise.', menu_funcs.knight)])
+    knight = ['A', 'attack', 'attack', 'attack', 'attack', '']
+    results = drive('menu_args.menu', lambda stdin, stdout: menu_args.menu(math_menu),
+        ['C'] * count + ['E'], True)
+    results.extend(drive('menu_class.Menu', lambda stdin, stdout: menu_class.Menu().menu_loop(),
+        ['C'] * count + ['E'], True))
+    results.extend(drive('menu_funcs.menu', lambda stdin, stdout: menu_funcs.menu(monty_menu),
+        knight * (count // len(knight)) + ['B'], True))
+    return results
+
+@benchmark
+def bench_mazes(sizes = (10, 100, 300)):
+    """
+    Drive both cmd mazes through their solutions as mazes grow. (list)
+
+    Parameters:
+    sizes: The width and height of the square mazes to walk. (sequence of int)
+    """
+    def cmd_session(maze_class):
+        def session(stdin, stdout):
+            maze = maze_class(stdin = stdin, stdout = stdout)
+            maze.use_rawinput = False
+            maze.cmdloop()
+        return session
+    results = []
+    old_mazes = dict(cmd_example.MAZE), dict(cmd_example2.MAZE)
+    try:
+        for size in sizes:
+            grid = maze_gen.generate(size, size, seed = 1)
+            lines = maze_script(grid)
+            for module, builtin_io in ((cmd_example, True), (cmd_example2, False)):
+                module.MAZE.update(grid = grid, start = grid.start, end = grid.end)
+                label = '{}.Maze, {} cells'.format(module.__name__, size * size)
+                results.extend(drive(label, cmd_session(module.Maze), lines, builtin_io))
+    finally:
+        cmd_example.MAZE.update(old_mazes[0])
+        cmd_example2.MAZE.update(old_mazes[1])
+    return results
+
+@benchmark
+def bench_timed_input(count = 200000, waits = 20, timeout = 0.01):
+    """
+    Time reading lines and timing out on a pipe. (list)
+
+    Lines are read with a TimedReader and with the pipe's own file object. The
+    timeouts are taken on an empty pipe, measuring how late they are and how
+    much processor time is used while waiting.
+
+    Parameters:
+    count: The number of lines to read. (int)
+    waits: The number of timeouts to take. (int)
+    timeout: The timeout for each wait, in seconds. (float)
+    """
+    def read_pipe(wrap):
+        read_fd, write_fd = os.pipe()
+        def write():
+            with os.fdopen(write_fd, 'wb') as pipe:
+                pipe.write(b'3\n' * count)
+        writer = threading.Thread(target = write)
+        writer.start()
+        with os.fdopen(read_fd) as pipe:
+            reader = TimedReader.wrap(pipe) if wrap else pipe
+            start = time.perf_counter()
+            lines = sum(1 for line in iter(lambda: reader.readline(1.0) if wrap else reader.readline(), ''))
+            elapsed = time.perf_counter() - start
+            if wrap:
+                reader.close()
+        writer.join()
+        return lines / elapsed
+    results = [('TimedReader lines', read_pipe(True), 'lines/sec'),
+        ('file lines', read_pipe(False), 'lines/sec')]
+    # Time out on a pipe nothing is written to.
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd) as pipe:
+        reader = TimedReader.wrap(pipe)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        for wait in range(waits):
+            try:
+                reader.readline(timeout)
+            except InputTimeout:
+                pass
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        reader.close()
+    os.close(write_fd)
+    results.append(('timeout lateness', (elapsed / waits - timeout) * 1e6, 'usec'))
+    results.append(('cpu while waiting', cpu / elapsed * 100, 'percent'))
+    return results
+
+def main(args):
+    """
+    Run the benchmarks. (int)
+
+    The return value is the number of regressions found.
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Benchmark the menu and maze code.')
+    parser.add_argument('names', nargs = '*', help = 'The benchmarks to run, or all if none.')
+    parser.add_argument('--json', default = None, help = 'Save the results to this file.')
+    parser.add_argument('--compare', default = None, help = 'Compare to results saved here.')
+    parser.add_argument('--tolerance', type = float, default = 0.1,
+        help = 'The fraction a measurement may get worse by before it is flagged.')
+    options = parser.parse_args(args)
+    # Run the benchmarks.
+    results = OrderedDict()
+    for name in options.names or BENCHMARKS:
+        print('{}:'.format(name))
+        results[name] = OrderedDict()
+        for measurement, value, unit in BENCHMARKS[name]():
+            print('    {}: {:.3f} {}'.format(measurement, value, unit))
+            results[name][measurement] = [value, unit]
+    # Save the results.
+    if options.json:
+        with open(options.json, 'w') as json_file:
+            json.dump(results, json_file, indent = 2)
+    # Check for regressions.
+    regressions = []
+    if options.compare:
+        with open(options.compare) as json_file:
+            regressions = compare(results, json.load(json_file), options.tolerance)
+        print('Regressions:' if regressions else 'No regressions.')
+        for regression in regressions:
+            print('    {}'.format(regression))
+    return len(regressions)
+
+if __name__ == '__main__':
+    sys.exit(1 if main(sys.argv[1:]) else 0)
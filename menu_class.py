@@ -10,23 +10,26 @@ Menu: A basic menu interface. (object)
 from collections import OrderedDict
 from string import ascii_uppercase
 
+from primes import next_prime
+from sequences import NumberSequence, collatz_step, fibonacci_extend, number_text
+
 class Menu(object):
     """
     A basic menu interface for an integer graph. (object)
 
     Class Attributes:
     menu_data: The menu descriptions and function names. (dict of str: str)
-    primes: The prime numbers up to the first one over 100. (list of int)
 
     Attributes:
     choices: The letter choices and their descriptions. (OderedDict of str: str)
-    numbers: The current sequence of numbers. (list of int)
+    numbers: The current sequence of numbers. (NumberSequence)
     prompt: The text displayed when requesting a user's choice. (str)
     quit_char: The letter choice for exiting the menu loop. (str)
 
     Methods:
     collatz: Collatz the last number in the sequence and append it. (None)
     fibonacci: Add the last two numbers in the sequence and append the sum. (None)
+    jump: Move the sequence ahead several Fibonacci steps. (None)
     menu_loop: Loop through menu choices, performing the relevant actions. (None)
     prime: Append the next highest prime to the sequence. (None)
 
@@ -36,10 +39,8 @@ class Menu(object):
 
     # The menu descriptions and function names.
     menu_data = OrderedDict([('Add the last two numbers.', 'fibonacci'), 
-        ('Get the next prime number.', 'prime'), ('Collatz the last number.', 'collatz')])
-    # All of the prime numbers up to just over 100.
-    primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89]
-    primes += [97, 101]
+        ('Get the next prime number.', 'prime'), ('Collatz the last number.', 'collatz'),
+        ('Jump ahead several steps.', 'jump')])
 
     def __init__(self, prompt='Please enter your choice: '):
         """
@@ -54,21 +55,26 @@ class Menu(object):
         self.choices = OrderedDict(zip(ascii_uppercase, self.menu_data.keys()))
         self.quit_char = ascii_uppercase[len(self.menu_data)]
         # Set up the sequence information.
-        self.numbers = [0, 1]
+        self.numbers = NumberSequence([0, 1])
 
     def collatz(self):
         """Collatz the last number in the sequence and append it. (None)"""
-        # Triple and add one to odd numbers.
-        if self.numbers[-1] % 2:
-            self.numbers.append(self.numbers[-1] * 3 + 1)
-        # Halve even numbers.
-        else:
-            self.numbers.append(self.numbers[-1] // 2)
+        self.numbers.append(collatz_step(self.numbers[-1]))
 
     def fibonacci(self):
         """Add the last two numbers in the sequence and append the sum. (None)"""
         self.numbers.append(self.numbers[-1] + self.numbers[-2])
 
+    def jump(self):
+        """Move the sequence ahead several Fibonacci steps. (None)"""
+        # Get the number of steps.
+        steps = input('How many steps? ')
+        # Jump ahead, or explain why the steps can't be used.
+        try:
+            fibonacci_extend(self.numbers, steps)
+        except ValueError as error:
+            print(error)
+
     def menu_loop(self):
         """Loop through menu choices, performing the relevant actions. (None)"""
         # Loop until the user quits or the sequence goes over 100.
@@ -85,7 +91,7 @@ class Menu(object):
             elif choice in self.choices:
                 method = self.menu_data[self.choices[choice]]
                 getattr(self, method)()
-                print('The current number is {}.'.format(self.numbers[-1]))
+                print('The current number is {}.'.format(number_text(self.numbers[-1])))
             else:
                 print('That is not a valid choice.')
         # Clean up.
@@ -93,7 +99,7 @@ class Menu(object):
 
     def prime(self):
         """Append the next highest prime to the sequence. (None)"""
-        self.numbers.append([p for p in self.primes if p > self.numbers[-1]][0])
+        self.numbers.append(next_prime(self.numbers[-1]))
 
 if __name__ == '__main__':
     menu = Menu()
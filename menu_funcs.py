@@ -14,7 +14,8 @@ spam: Fine dining. (None)
 from collections import OrderedDict
 import random
 import string
-import time
+
+from timed_input import Deadline, InputTimeout, timed_input
 
 def simple_menu():
     """
@@ -28,7 +29,7 @@ def simple_menu():
         print('C: Enjoy some fine dining.')
         print('D: Quit.')
         # Get the user's choice.
-        choice = input('Please enter your choice: ').lower()
+        choice = timed_input('Please enter your choice: ').lower()
         # Process the user's choice.
         if choice == 'a':
             argument()
@@ -45,18 +46,20 @@ def simple_menu():
     print('Have a nice day.')
 
 
-def menu(menu_data, prompt = 'Please enter your choice: '):
+def menu(menu_data, prompt = 'Please enter your choice: ', idle_timeout = None):
     """
     A generic menu function. (None)
 
     The menu_data dictionary keys are strings that are shown in the menu. The 
     values of the dictionary should be functions that are called when the menu
     item is chosen. If the order of the menu items is important, this should
-    be an OrderedDict from collections.
+    be an OrderedDict from collections. If no choice is made within the idle
+    timeout, the menu quits.
 
     Parameters:
     menu_data: The menu items and actions for the menu. (dict of str: callable)
     prompt: The text for getting a menu choice from the user. (str)
+    idle_timeout: The seconds to wait for a choice, or None to wait forever. (float or None)
     """
     # Set up the menu.
     menu_choices = OrderedDict(zip(string.ascii_uppercase, menu_data.keys()))
@@ -68,7 +71,11 @@ def menu(menu_data, prompt = 'Please enter your choice: '):
             print('{}: {}'.format(char, menu_text))
         print('{}: Quit\n'.format(quit_char))
         # Get the response.
-        choice = input(prompt).upper()
+        try:
+            choice = timed_input(prompt, idle_timeout).upper()
+        except InputTimeout:
+            print('\nTimed out waiting for a choice.')
+            break
         # Handle the response.
         if choice == quit_char:
             break
@@ -85,21 +92,23 @@ def argument():
 
     No it isn't.
     """
-    # Prep the argument.
-    start = time.perf_counter()
-    user_text = input('Please state an assertion to argue about: ')
-    # Argue for two minutes
-    while time.perf_counter() - start < 120:
-        # Automatically gainsay whatever the user says. 
-        user_words = user_text.lower().split()
-        for negative in ('no', 'not', "isn't", "ain't", "doesn't", "wasn't"):
-            if negative in user_words:
-                user_text = input('Yes it is. ')
-        else:
-            user_text = input("No it isn't. ")
+    # Argue for two minutes, cutting the user off if they take too long.
+    deadline = Deadline(120)
+    try:
+        user_text = timed_input('Please state an assertion to argue about: ', deadline.remaining())
+        while not deadline.expired():
+            # Automatically gainsay whatever the user says. 
+            user_words = user_text.lower().split()
+            for negative in ('no', 'not', "isn't", "ain't", "doesn't", "wasn't"):
+                if negative in user_words:
+                    user_text = timed_input('Yes it is. ', deadline.remaining())
+            else:
+                user_text = timed_input("No it isn't. ", deadline.remaining())
+    except InputTimeout:
+        print()
     # Say goodbye.
     print("I'm sorry, your five minutes is up.")
-    input('Press Enter to continue: ')
+    timed_input('Press Enter to continue: ')
 
 def knight():
     """Some vigorous exercise. (None)"""
@@ -112,7 +121,7 @@ def knight():
         if not combat:
             print('None shall pass.')
         # Get the user's action.
-        user_action = input('What do you do? ')
+        user_action = timed_input('What do you do? ')
         # Attacking chops off a limb.
         if user_action.lower() == 'attack':
             print("Excellent attack. You chop off the black knight's {}".format(limbs.pop()))
@@ -121,19 +130,19 @@ def knight():
         elif combat:
             print('The black knight attacks, but you easily block his blow.')
     # Say goodbye.
-    input('Press Enter to call it a draw: ')
+    timed_input('Press Enter to call it a draw: ')
 
 def spam():
     """Fine dining. (None)"""
     # Get the user's order.
-    food = input('What would you like to eat? ')
+    food = timed_input('What would you like to eat? ')
     # Prepare the meal.
     pre_spam = ['spam'] * random.randint(2, 4)
     post_spam = ['spam'] * random.randint(0, 2) + ['and spam.']
     meal = pre_spam + [food] + post_spam
     # Deliver the food and say goodbye.
     print('Here is your ' + ', '.join(meal))
-    input('Press Enter to eat a wafer thin wafer and explode: ')
+    timed_input('Press Enter to eat a wafer thin wafer and explode: ')
 
 if __name__ == '__main__':
     monty_menu = [('Have an intellectual discussion.', argument), ('Get some vigorous exercise.', knight),
@@ -0,0 +1,334 @@
+"""
+menu_server.py
+
+Serve Menu subclasses to many clients at once with asyncio.
+
+Each connection gets its own instance of the menu class, so each client has its
+own session state. The menu is driven by menuloop, an async frontend on the
+menu's start, choose, and finish methods, that reads choices from the
+connection and writes the menu display and any output from the choice back to
+it.
+
+Each choice is processed in the event loop's thread pool, so a slow choice
+only holds up its own session. While a choice runs, the menu's input and
+output files are the connection. What the choice prints is sent to the client
+as it is printed, and a choice that asks the user for more input, like a
+submenu, reads the next line the client sends. Sessions left idle longer than
+the idle timeout are closed, so they don't hold a connection open forever. This
+includes waiting for input inside a choice, although timeouts passed to the
+menu's input method aren't applied over the connection.
+
+Served menus don't accept the '!' timing and profiling commands, since those
+change the whole server process and write files on the server's host.
+
+Clients aren't terminals of the server, so long menus are sent whole unless the
+menu sets page_size, or menuloop is given the size of the client's screen.
+
+Run as a script to start a server or to load test one:
+
+    python menu_server.py serve --menu menu_test:NumberMenu --port 8023 --idle 300
+    python menu_server.py load --port 8023 --sessions 1000 --concurrency 200
+
+Classes:
+ConnectionInput: A menu input file reading lines from a connection. (object)
+ConnectionOutput: A menu output file writing to a connection. (object)
+
+Functions:
+load_test: Run many scripted sessions against a menu server. (dict)
+main: Run the server or the load test from the command line. (None)
+menuloop: Run a menu session over an asyncio connection. (None)
+run_session: Run one scripted session against a menu server. (list of float)
+serve: Serve a menu class over TCP or a Unix socket. (None)
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import io
+import sys
+import time
+
+from menu import load_class
+from timed_input import InputTimeout
+
+class ConnectionInput(object):
+    """
+    A menu input file reading lines from a connection. (object)
+
+    The file is read from a thread pool worker, while the connection belongs to
+    the event loop. Each read has the loop read a line, and waits for it.
+
+    Attributes:
+    idle_timeout: The seconds to wait for a line, or None to wait forever. (float or None)
+    loop: The event loop the connection belongs to. (asyncio.AbstractEventLoop)
+    reader: The connection's reader. (asyncio.StreamReader)
+
+    Methods:
+    readline: Read a line from the connection. (str)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, reader, loop, idle_timeout = None):
+        """
+        Set up the file. (None)
+
+        Parameters:
+        reader: The connection's reader. (asyncio.StreamReader)
+        loop: The event loop the connection belongs to. (asyncio.AbstractEventLoop)
+        idle_timeout: The seconds to wait for a line, or None to wait forever. (float or None)
+        """
+        self.reader = reader
+        self.loop = loop
+        self.idle_timeout = idle_timeout
+
+    def readline(self):
+        """
+        Read a line from the connection. (str)
+
+        The line is empty if the client has disconnected. InputTimeout is raised
+        if no line comes within the idle timeout.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.reader.readline(), self.loop)
+        try:
+            line = future.result(self.idle_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise InputTimeout('No input within {} seconds.'.format(self.idle_timeout))
+        return line.decode(errors = 'replace')
+
+class ConnectionOutput(object):
+    """
+    A menu output file writing to a connection. (object)
+
+    Writes come from a thread pool worker, and are passed to the event loop,
+    which sends them in order. Flushing waits for the client to keep up.
+
+    Attributes:
+    loop: The event loop the connection belongs to. (asyncio.AbstractEventLoop)
+    writer: The connection's writer. (asyncio.StreamWriter)
+
+    Methods:
+    flush: Wait until the connection has room for more output. (None)
+    write: Send text to the client. (int)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, writer, loop):
+        """
+        Set up the file. (None)
+
+        Parameters:
+        writer: The connection's writer. (asyncio.StreamWriter)
+        loop: The event loop the connection belongs to. (asyncio.AbstractEventLoop)
+        """
+        self.writer = writer
+        self.loop = loop
+
+    def flush(self):
+        """Wait until the connection has room for more output. (None)"""
+        asyncio.run_coroutine_threadsafe(self.writer.drain(), self.loop).result()
+
+    def write(self, text):
+        """
+        Send text to the client. (int)
+
+        Parameters:
+        text: The text to send. (str)
+        """
+        self.loop.call_soon_threadsafe(self.writer.write, text.encode())
+        return len(text)
+
+async def menuloop(menu, reader, writer, intro = None, idle_timeout = None, size = None):
+    """
+    Run a menu session over an asyncio connection. (None)
+
+    This follows Menu.menuloop: start, then display and choose until a choice
+    stops the loop, then finish. The loop also ends if the client disconnects,
+    or doesn't send a choice within the idle timeout. The menu's methods run in
+    the loop's thread pool, with the connection as the menu's files, which are
+    put back when the session ends.
+
+    Parameters:
+    menu: The menu for this session. (Menu)
+    reader: The connection's reader. (asyncio.StreamReader)
+    writer: The connection's writer. (asyncio.StreamWriter)
+    intro: The text to display before the loop begins. (str or None)
+    idle_timeout: The seconds to wait for a choice, or None for the menu's idle timeout. (float or None)
+    size: The columns and lines of the client's screen, or None. (tuple of int)
+    """
+    if idle_timeout is None:
+        idle_timeout = menu.idle_timeout
+    loop = asyncio.get_running_loop()
+    def run(method, *args):
+        return loop.run_in_executor(None, functools.partial(method, *args, capture = False))
+    # Use the connection as the menu's files.
+    files = menu.stdin, menu.stdout
+    menu.stdin = ConnectionInput(reader, loop, idle_timeout)
+    menu.stdout = ConnectionOutput(writer, loop)
+    try:
+        # User defined processing before the loop starts.
+        stop = (await run(menu.start)).stop
+        # Display any introductory text.
+        if intro is not None:
+            menu.intro = intro
+        if menu.intro:
+            writer.write('{}\n'.format(menu.intro).encode())
+        # Loop through the menu choices.
+        while not stop:
+            # Display the menu.
+            writer.write(menu.render(size).encode())
+            await writer.drain()
+            # Get the user's choice.
+            try:
+                line = await asyncio.wait_for(reader.readline(), idle_timeout)
+            except asyncio.TimeoutError:
+                writer.write(b'\nTimed out waiting for input.\n')
+                break
+            if not line:
+                break
+            # Process the choice, reading any more input it needs from the connection.
+            try:
+                stop = (await run(menu.choose, line.decode(errors = 'replace').strip())).stop
+            except InputTimeout:
+                writer.write(b'\nTimed out waiting for input.\n')
+                break
+            except EOFError:
+                break
+        # Clean up after the menu loop.
+        await run(menu.finish)
+        await writer.drain()
+    finally:
+        menu.stdin, menu.stdout = files
+
+async def serve(menu_class, host = '127.0.0.1', port = 8023, path = None, idle_timeout = None):
+    """
+    Serve a menu class over TCP or a Unix socket. (None)
+
+    Parameters:
+    menu_class: The menu to give each connection. (type)
+    host: The host to listen on for TCP. (str)
+    port: The port to listen on for TCP. (int)
+    path: The Unix socket to listen on, instead of TCP. (str or None)
+    idle_timeout: The seconds to wait for a choice, or None for the menu's idle timeout. (float or None)
+    """
+    async def session(reader, writer):
+        # Each connection gets a fresh menu, without the process-wide '!' commands.
+        menu = menu_class(io.StringIO(), io.StringIO())
+        menu.stats_commands = False
+        try:
+            await menuloop(menu, reader, writer, idle_timeout = idle_timeout)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    if path is None:
+        server = await asyncio.start_server(session, host, port, backlog = 4096)
+    else:
+        server = await asyncio.start_unix_server(session, path, backlog = 4096)
+    async with server:
+        await server.serve_forever()
+
+async def run_session(choices, prompt, host = '127.0.0.1', port = 8023, path = None):
+    """
+    Run one scripted session against a menu server. (list of float)
+
+    The return value is the latency of each choice, in seconds, measured from
+    sending the choice to receiving the next prompt.
+
+    Parameters:
+    choices: The choices to make, the last of which should end the session. (list of str)
+    prompt: The prompt the menu uses to ask for a choice. (str)
+    host: The host of the server for TCP. (str)
+    port: The port of the server for TCP. (int)
+    path: The Unix socket of the server, instead of TCP. (str or None)
+    """
+    if path is None:
+        reader, writer = await asyncio.open_connection(host, port)
+    else:
+        reader, writer = await asyncio.open_unix_connection(path)
+    prompt = prompt.encode()
+    latencies = []
+    try:
+        await reader.readuntil(prompt)
+        for choice in choices[:-1]:
+            start = time.perf_counter()
+            writer.write('{}\n'.format(choice).encode())
+            await reader.readuntil(prompt)
+            latencies.append(time.perf_counter() - start)
+        # The last choice runs until the server closes the session.
+        start = time.perf_counter()
+        writer.write('{}\n'.format(choices[-1]).encode())
+        await reader.read()
+        latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+    return latencies
+
+async def load_test(choices, sessions, concurrency, prompt, **connection):
+    """
+    Run many scripted sessions against a menu server. (dict)
+
+    The return value has the sessions per second and the per-choice latency
+    percentiles in milliseconds.
+
+    Parameters:
+    choices: The choices to make in each session. (list of str)
+    sessions: The total number of sessions to run. (int)
+    concurrency: The number of sessions to run at once. (int)
+    prompt: The prompt the menu uses to ask for a choice. (str)
+    **connection: The host and port, or path, of the server.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    async def limited():
+        async with limit:
+            return await run_session(choices, prompt, **connection)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[limited() for session in range(sessions)])
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for result in results for latency in result)
+    stats = {'sessions': sessions, 'seconds': elapsed, 'sessions/sec': sessions / elapsed if elapsed else 0.0}
+    # There are no latencies without sessions.
+    if latencies:
+        for percentile in (50, 90, 99, 100):
+            index = min(len(latencies) - 1, len(latencies) * percentile // 100)
+            stats['p{} ms'.format(percentile)] = latencies[index] * 1000
+    return stats
+
+def main(args):
+    """
+    Run the server or the load test from the command line. (None)
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Serve menus over sockets.')
+    parser.add_argument('mode', choices = ('serve', 'load'))
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8023)
+    parser.add_argument('--unix', default = None, help = 'Unix socket path to use instead of TCP.')
+    parser.add_argument('--menu', default = 'menu_test:NumberMenu', help = 'The menu class to serve.')
+    parser.add_argument('--sessions', type = int, default = 1000)
+    parser.add_argument('--concurrency', type = int, default = 100)
+    parser.add_argument('--idle', type = float, default = None,
+        help = 'Seconds before closing an idle session.')
+    parser.add_argument('--choices', default = '1,2,3,3,3,3,3,3,3,3,4',
+        help = 'Comma separated choices for each load test session.')
+    options = parser.parse_args(args)
+    connection = {'host': options.host, 'port': options.port, 'path': options.unix}
+    if options.mode == 'serve':
+        asyncio.run(serve(load_class(options.menu), idle_timeout = options.idle, **connection))
+    else:
+        prompt = load_class(options.menu).prompt
+        choices = options.choices.split(',')
+        stats = asyncio.run(load_test(choices, options.sessions, options.concurrency, prompt,
+            **connection))
+        for key, value in stats.items():
+            print('{}: {:.3f}'.format(key, value))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+"""
+menu_stats.py
+
+Latency statistics and profiling for menu choices.
+
+When timing is on, every menu handler that Menu.onechoice calls is timed, and
+the time is added to a histogram for that menu class and handler. The
+histograms use power of two buckets of microseconds, so they stay small no
+matter how many choices are made. When timing is off, the only cost is
+checking a flag on each choice.
+
+The handlers for the next few choices can also be run under cProfile, with the
+profile printed by the menu after the last one.
+
+Timing and profiling can be turned on from code, or from any menu by typing a
+command starting with '!':
+
+    !stats on: Start timing choices.
+    !stats off: Stop timing choices.
+    !stats: Show the timing so far.
+    !stats export <path>: Save the timing so far as JSON.
+    !profile <count>: Profile the next count choices.
+    !profile off: Stop profiling.
+
+The commands change statistics shared by the whole process, and can write
+files, so menus with the stats_commands attribute set to False don't accept
+them. menu_server turns them off for the menus it serves.
+
+Constants:
+STATS: The statistics shared by all menus. (MenuStats)
+
+Classes:
+LatencyHistogram: A histogram of latencies in power of two buckets. (object)
+MenuStats: Latency histograms and profiling for menu handlers. (object)
+"""
+
+import io
+import json
+import time
+
+class LatencyHistogram(object):
+    """
+    A histogram of latencies in power of two buckets. (object)
+
+    Bucket n counts the latencies from 2 ** (n - 1) up to 2 ** n microseconds,
+    with bucket 0 for latencies under a microsecond.
+
+    Attributes:
+    buckets: The number of latencies in each bucket. (list of int)
+    count: The number of latencies recorded. (int)
+    maximum: The longest latency recorded, in seconds. (float)
+    minimum: The shortest latency recorded, in seconds. (float)
+    total: The sum of the latencies recorded, in seconds. (float)
+
+    Methods:
+    add: Record a latency. (None)
+    percentile: Estimate a percentile of the latencies. (float)
+    to_dict: Summarize the histogram for JSON. (dict)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self):
+        """Set up an empty histogram. (None)"""
+        self.buckets = [0] * 48
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float('inf')
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """
+        Record a latency. (None)
+
+        Parameters:
+        seconds: The latency to record. (float)
+        """
+        self.buckets[min(int(seconds * 1e6).bit_length(), 47)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile of the latencies. (float)
+
+        The return value is the top of the bucket the percentile falls in, in
+        seconds, but no more than the longest latency recorded.
+
+        Parameters:
+        percent: The percentile to estimate, from 0 to 100. (float)
+        """
+        target = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min(2 ** bucket / 1e6, self.maximum)
+        return self.maximum
+
+    def to_dict(self):
+        """Summarize the histogram for JSON. (dict)"""
+        summary = {'count': self.count, 'total ms': self.total * 1e3}
+        if self.count:
+            summary.update({'mean us': self.total / self.count * 1e6, 'min us': self.minimum * 1e6,
+                'max us': self.maximum * 1e6})
+            for percent in (50, 90, 99):
+                summary['p{} us'.format(percent)] = self.percentile(percent) * 1e6
+        # Label each bucket with its upper limit.
+        summary['buckets'] = {'<{}us'.format(2 ** bucket): count
+            for bucket, count in enumerate(self.buckets) if count}
+        return summary
+
+class MenuStats(object):
+    """
+    Latency histograms and profiling for menu handlers. (object)
+
+    Attributes:
+    enabled: A flag for handlers needing to go through call. (bool)
+    histograms: The latencies by menu class name and handler name. (dict of str: dict)
+    profile_left: The number of choices left to profile. (int)
+    profiler: The profiler for the current profile, if any. (cProfile.Profile or None)
+    profiling: A flag for a handler running under the profiler. (bool)
+    timing: A flag for timing handlers. (bool)
+
+    Methods:
+    call: Call a menu handler, timing or profiling it. (object)
+    command: Handle a '!' command from a menu. (None)
+    export: Save the histograms as JSON. (None)
+    profile: Profile the next few choices. (None)
+    report: Describe the histograms. (str)
+    set_timing: Turn timing on or off. (None)
+    to_dict: Summarize the histograms for JSON. (dict)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self):
+        """Set up with timing and profiling off. (None)"""
+        self.histograms = {}
+        self.timing = False
+        self.profile_left = 0
+        self.profiler = None
+        self.enabled = False
+        self.profiling = False
+
+    def call(self, menu, name):
+        """
+        Call a menu handler, timing or profiling it. (object)
+
+        The return value is the return value of the handler. Handlers of nested
+        menus are always timed, but are only profiled and counted as profiled
+        choices if the handler they run in isn't being profiled already.
+
+        Parameters:
+        menu: The menu the handler belongs to. (Menu)
+        name: The name of the handler method. (str)
+        """
+        handler = getattr(menu, name)
+        profiler = None if self.profiling else self.profiler
+        if profiler is not None:
+            profiler.enable()
+            self.profiling = True
+        start = time.perf_counter()
+        try:
+            return handler()
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+                self.profiling = False
+                self.profile_left -= 1
+                if not self.profile_left:
+                    self.profile(0, menu)
+            if self.timing:
+                by_choice = self.histograms.setdefault(type(menu).__name__, {})
+                if name not in by_choice:
+                    by_choice[name] = LatencyHistogram()
+                by_choice[name].add(elapsed)
+
+    def command(self, menu, text):
+        """
+        Handle a '!' command from a menu. (None)
+
+        Parameters:
+        menu: The menu the command was typed in. (Menu)
+        text: The command, without the '!'. (str)
+        """
+        words = text.lower().split()
+        if words[:1] == ['stats'] and len(words) == 2 and words[1] in ('on', 'off'):
+            self.set_timing(words[1] == 'on')
+            menu.status = 'Choice timing is {}.'.format(words[1])
+        elif words == ['stats']:
+            menu.print(self.report())
+        elif words[:2] == ['stats', 'export'] and len(words) == 3:
+            path = text.split()[2]
+            try:
+                self.export(path)
+            except OSError as error:
+                menu.status = 'Choice timing could not be saved to {}: {}'.format(path, error.strerror or error)
+            else:
+                menu.status = 'Choice timing saved to {}.'.format(path)
+        elif words == ['profile', 'off']:
+            self.profile(0, menu)
+        elif words[:1] == ['profile'] and len(words) == 2 and words[1].isdigit():
+            self.profile(int(words[1]), menu)
+            menu.status = 'Profiling the next {} choices.'.format(words[1])
+        else:
+            menu.status = 'Unknown command {!r}. Try !stats on, !stats off, !stats, '.format(text)
+            menu.status += '!stats export <path>, !profile <count>, or !profile off.'
+
+    def export(self, path):
+        """
+        Save the histograms as JSON. (None)
+
+        Parameters:
+        path: The path of the file to save. (str)
+        """
+        with open(path, 'w') as json_file:
+            json.dump(self.to_dict(), json_file, indent = 2)
+
+    def profile(self, count, menu = None):
+        """
+        Profile the next few choices. (None)
+
+        Any profile in progress is finished first, and printed by the menu. The
+        profiling modules are only imported when profiling is used.
+
+        Parameters:
+        count: The number of choices to profile, or 0 to stop. (int)
+        menu: The menu to print a finished profile with. (Menu or None)
+        """
+        import cProfile
+        import pstats
+        if self.profiler is not None and menu is not None:
+            text = io.StringIO()
+            pstats.Stats(self.profiler, stream = text).sort_stats('cumulative').print_stats(15)
+            menu.print(text.getvalue())
+        self.profiler = cProfile.Profile() if count > 0 else None
+        self.profile_left = count
+        self.enabled = self.timing or self.profiler is not None
+
+    def report(self):
+        """Describe the histograms. (str)"""
+        lines = []
+        for class_name, by_choice in sorted(self.histograms.items()):
+            for name, histogram in sorted(by_choice.items()):
+                text = '{}.{}: {} choices, mean {:.1f} us, p50 {:.1f} us, p99 {:.1f} us, max {:.1f} us'
+                lines.append(text.format(class_name, name, histogram.count,
+                    histogram.total / histogram.count * 1e6, histogram.percentile(50) * 1e6,
+                    histogram.percentile(99) * 1e6, histogram.maximum * 1e6))
+        return '\n'.join(lines) if lines else 'No choices have been timed.'
+
+    def set_timing(self, timing):
+        """
+        Turn timing on or off. (None)
+
+        Parameters:
+        timing: A flag for timing handlers. (bool)
+        """
+        self.timing = timing
+        self.enabled = self.timing or self.profiler is not None
+
+    def to_dict(self):
+        """Summarize the histograms for JSON. (dict)"""
+        return {class_name: {name: histogram.to_dict() for name, histogram in by_choice.items()}
+            for class_name, by_choice in self.histograms.items()}
+
+# The statistics shared by all menus.
+STATS = MenuStats()
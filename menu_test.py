@@ -4,16 +4,36 @@ menu_test.py
 A test of the Menu class.
 
 Classes:
+DeepMenu: A menu that opens another of itself, for any depth of menus. (Menu)
 MontyMenu: A menu of Monty Python skits. (Menu)
 NumberMenu: A menu of integer graphs. (Menu)
 TopMenu: A top level menu. (Menu)
+
+Functions:
+make_menu_class: Create a Menu subclass with many menu_ methods. (type)
 """
 
-import random
-import time
+from menu import Menu, MenuStack, Submenu
+from primes import next_prime
+from sequences import COLLATZ, NumberSequence, collatz_slowest, collatz_step, fibonacci_extend, number_text
+from timed_input import Deadline, InputTimeout
+
+class DeepMenu(Menu):
+    """
+    A menu that opens another of itself, for any depth of menus. (Menu)
+
+    Class Attributes:
+    menu_down: 1: Go down a level. (Submenu)
+
+    Methods:
+    menu_quit: 2: Quit. (bool)
+    """
+
+    menu_down = Submenu('DeepMenu', '1: Go down a level.')
 
-from menu import Menu
-from cmd_example2 import Maze
+    def menu_quit(self):
+        """2: Quit."""
+        return True
 
 class MontyMenu(Menu):
     """
@@ -28,21 +48,23 @@ class MontyMenu(Menu):
 
     def menu_argument(self):
         """A: Have an intellectual discussion."""
-        # Prep the argument.
-        start = time.perf_counter()
-        user_text = input('Please state an assertion to argue about: ')
-        # Argue for two minutes
-        while time.perf_counter() - start < 120:
-            # Automatically gainsay whatever the user says. 
-            user_words = user_text.lower().split()
-            for negative in ('no', 'not', "isn't", "ain't", "doesn't", "wasn't"):
-                if negative in user_words:
-                    user_text = input('Yes it is. ')
-            else:
-                user_text = input("No it isn't. ")
+        # Argue for two minutes, cutting the user off if they take too long.
+        deadline = Deadline(120)
+        try:
+            user_text = self.input('Please state an assertion to argue about: ', deadline.remaining())
+            while not deadline.expired():
+                # Automatically gainsay whatever the user says. 
+                user_words = user_text.lower().split()
+                for negative in ('no', 'not', "isn't", "ain't", "doesn't", "wasn't"):
+                    if negative in user_words:
+                        user_text = self.input('Yes it is. ', deadline.remaining())
+                else:
+                    user_text = self.input("No it isn't. ", deadline.remaining())
+        except InputTimeout:
+            self.print()
         # Say goodbye.
-        print("I'm sorry, your five minutes is up.")
-        input('Press Enter to continue: ')
+        self.print("I'm sorry, your five minutes is up.")
+        self.input('Press Enter to continue: ')
 
     def menu_knight(self):
         """B: Get some vigorous exercise."""
@@ -53,18 +75,18 @@ class MontyMenu(Menu):
         while limbs:
             # None shall pass.
             if not combat:
-                print('None shall pass.')
+                self.print('None shall pass.')
             # Get the user's action.
-            user_action = input('What do you do? ')
+            user_action = self.input('What do you do? ')
             # Attacking chops off a limb.
             if user_action.lower() == 'attack':
-                print("Excellent attack. You chop off the black knight's {}".format(limbs.pop()))
+                self.print("Excellent attack. You chop off the black knight's {}".format(limbs.pop()))
                 combat = True
             # Anything else after attacking provokes an attack.
             elif combat:
-                print('The black knight attacks, but you easily block his blow.')
+                self.print('The black knight attacks, but you easily block his blow.')
         # Say goodbye.
-        input('Press Enter to call it a draw: ')
+        self.input('Press Enter to call it a draw: ')
 
     def menu_quit(self):
         """D: Stop it, that's just silly."""
@@ -73,64 +95,105 @@ class MontyMenu(Menu):
     def menu_spam(self):
         """C: Enjoy some fine dining."""
         # Get the user's order.
-        food = input('What would you like to eat? ')
+        food = self.input('What would you like to eat? ')
         # Prepare the meal.
-        pre_spam = ['spam'] * random.randint(2, 4)
-        post_spam = ['spam'] * random.randint(0, 2) + ['and spam.']
+        pre_spam = ['spam'] * self.rng.randint(2, 4)
+        post_spam = ['spam'] * self.rng.randint(0, 2) + ['and spam.']
         meal = pre_spam + [food] + post_spam
         # Deliver the food and say goodbye.
-        print('Here is your ' + ', '.join(meal))
-        input('Press Enter to eat a wafer thin wafer and explode: ')
+        self.print('Here is your ' + ', '.join(meal))
+        self.input('Press Enter to eat a wafer thin wafer and explode: ')
 
 class NumberMenu(Menu):
     """
     A menu of integer graphs. (Menu)
 
     Class Attributes:
-    primes: All of the prime numbers up to just over 100. (list of int)
+    slowest_limit: The largest limit menu_slowest will check up to. (int)
 
     Attributes:
-    numbers: The number sequence generated so far. (list of int)
+    numbers: The number sequence generated so far. (NumberSequence)
 
     Methods:
     menu_collatz: 3: Collatz the last number. (bool)
     menu_fibonacci: 1: Add the last two numbers. (bool)
+    menu_jump: 5: Jump ahead several steps. (bool)
     menu_prime: 2: Go up to the next prime. (bool)
     menu_quit: 4: Quit. (bool)
+    menu_slowest: 7: Find the slowest start to Collatz down to 1. (bool)
+    menu_stopping: 6: Count the Collatz steps from the last number to 1. (bool)
 
     Overridden Methods:
     preloop
     postchoice
     postloop
+    snapshot
+    sort_menu
     """
-    
-    # All of the prime numbers up to just over 100.
-    primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89]
-    primes += [97, 101]
+
+    # The largest limit menu_slowest will check up to.
+    slowest_limit = 10 ** 7
 
     def menu_collatz(self):
         """3: Collatz the last number."""
-        if self.numbers[-1] % 2:
-            self.numbers.append(self.numbers[-1] * 3 + 1)
-        else:
-            self.numbers.append(self.numbers[-1] // 2)
+        self.numbers.append(collatz_step(self.numbers[-1]))
 
     def menu_fibonacci(self):
         """1: Add the last two numbers."""
         self.numbers.append(self.numbers[-1] + self.numbers[-2])
 
+    def menu_jump(self):
+        """5: Jump ahead several steps."""
+        # Get the number of steps.
+        steps = self.input('How many steps? ')
+        # Jump ahead, or explain why the steps can't be used.
+        try:
+            fibonacci_extend(self.numbers, steps)
+        except ValueError as error:
+            self.status = str(error)
+
     def menu_prime(self):
         """2: Go up to the next prime."""
-        self.numbers.append([p for p in self.primes if p > self.numbers[-1]][0])
+        self.numbers.append(next_prime(self.numbers[-1]))
 
     def menu_quit(self):
         """4: Quit."""
         return True
 
+    def menu_slowest(self):
+        """7: Find the slowest start to Collatz down to 1."""
+        # Get the range of starting numbers to check.
+        limit = self.input('Check starting numbers up to: ')
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            self.status = 'The limit must be a positive whole number.'
+            return
+        if limit > self.slowest_limit:
+            self.status = 'The limit can be at most {:,}.'.format(self.slowest_limit)
+            return
+        # Find the number with the longest stopping time.
+        try:
+            start, steps = collatz_slowest(limit + 1)
+        except MemoryError:
+            self.status = 'There is not enough memory to check up to {}.'.format(limit)
+            return
+        self.status = 'The slowest start up to {} is {}, taking {} steps.'.format(limit, start, steps)
+
+    def menu_stopping(self):
+        """6: Count the Collatz steps from the last number to 1."""
+        steps = COLLATZ.stopping_time(self.numbers[-1])
+        if steps is None:
+            self.status = '{} never gets to 1.'.format(self.numbers[-1])
+        else:
+            self.status = '{} gets to 1 in {} Collatz steps.'.format(number_text(self.numbers[-1]), steps)
+
     def preloop(self):
         """Processing done before starting the choice/action loop. (None)"""
         # Set up number lists.
-        self.numbers = [0, 1]
+        self.numbers = NumberSequence([0, 1])
         # Show the starting number.
         self.status = 'The number is now {}.'.format(self.numbers[-1])
 
@@ -144,7 +207,7 @@ class NumberMenu(Menu):
         """
         # Show the current number.
         if not self.status:
-            self.status = 'The number is now {}.'.format(self.numbers[-1])
+            self.status = 'The number is now {}.'.format(number_text(self.numbers[-1]))
         # Check the current number.
         if self.numbers[-1] > 99:
             return True
@@ -153,8 +216,12 @@ class NumberMenu(Menu):
 
     def postloop(self):
         """Processing done after the choice/action loop ends. (None)"""
-        print('The final number is {}.'.format(self.numbers[-1]))
-        print('Have a nice day.')
+        self.print('The final number is {}.'.format(number_text(self.numbers[-1])))
+        self.print('Have a nice day.')
+
+    def snapshot(self):
+        """Get the state to check when replaying a journal. (tuple)"""
+        return super().snapshot() + (len(self.numbers), self.numbers[-2], self.numbers[-1])
 
     def sort_menu(self, menu_lines):
         """
@@ -170,28 +237,21 @@ class TopMenu(Menu):
     A top level menu. (Menu)
 
     Class Attributes:
+    menu_maze: A: Play in a maze. (Submenu)
+    menu_numbers: B: Play with numbers. (Submenu)
+    menu_words: D: Play with words. (Submenu)
     rps_wins: What beats what in rock-paper-scissors. (dict of str: str)
 
     Methods:
-    menu_maze: A: Play in a maze. (bool)
-    menu_numbers: B. Play with numbers. (bool)
     menu_rps: C: Play with your hands. (bool)
     menu_quit: E: Quit. (bool)
-    menu_words: D: Play with words. (bool)
     """
 
     # What beats what in rock-paper-scissors. 
     rps_wins = {'rock': 'scissors', 'paper': 'rock', 'scissors': 'paper'}
 
-    def menu_maze(self):
-        """A: Play in a maze."""
-        maze = Maze()
-        maze.cmdloop()
-
-    def menu_numbers(self):
-        """B: Play with numbers."""
-        numbers = NumberMenu()
-        numbers.menuloop()
+    menu_maze = Submenu('cmd_example2:Maze', 'A: Play in a maze.')
+    menu_numbers = Submenu('NumberMenu', 'B: Play with numbers.')
 
     def menu_rps(self):
         """
@@ -200,29 +260,40 @@ class TopMenu(Menu):
         This is just a game of rock-paper-scissors.
         """
         while True:
-            play = input('Rock, paper, or scissors? ').lower()
-            bot = random.choice(list(self.rps_wins.keys()))
+            play = self.input('Rock, paper, or scissors? ').lower()
+            bot = self.rng.choice(list(self.rps_wins.keys()))
             if play not in self.rps_wins:
-                print("Invalid play. Come on, this is kid's stuff.")
+                self.print("Invalid play. Come on, this is kid's stuff.")
             elif play == bot:
-                print('Draw, play again.')
+                self.print('Draw, play again.')
             elif self.rps_wins[play] == bot:
-                print('I chose {}. You won!'.format(bot))
+                self.print('I chose {}. You won!'.format(bot))
                 break
             else:
-                print('I chose {}. You lose.'.format(bot))
+                self.print('I chose {}. You lose.'.format(bot))
                 break
 
     def menu_quit(self):
         """E: Quit."""
         return True
 
-    def menu_words(self):
-        """D: Play with words."""
-        words = MontyMenu()
-        words.menuloop()
+    menu_words = Submenu('MontyMenu', 'D: Play with words.')
+
+def make_menu_class(size):
+    """
+    Create a Menu subclass with many menu_ methods. (type)
+
+    Parameters:
+    size: The number of menu_ methods to create. (int)
+    """
+    attributes = {}
+    for number in range(size):
+        def menu_item(self):
+            return False
+        menu_item.__doc__ = '{}: Item number {}.'.format(number, number)
+        attributes['menu_{:06d}'.format(number)] = menu_item
+    return type('Menu{}'.format(size), (Menu,), attributes)
 
 
 if __name__ == '__main__':
-    top = TopMenu()
-    top.menuloop()
\ No newline at end of file
+    MenuStack().run(TopMenu())
\ No newline at end of file
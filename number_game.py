@@ -0,0 +1,446 @@
+"""
+number_game.py
+
+Explore every way the number game can be played.
+
+The number game is played by NumberMenu, menu_args.menu, and menu_class.Menu.
+It starts with the numbers 0 and 1, and each move appends a number computed
+from the last ones:
+
+    fibonacci: The sum of the last two numbers.
+    prime: The next prime after the last number.
+    collatz: The Collatz step from the last number.
+
+The game is over once the last number passes a limit, 99 in the menus. Since
+each move only depends on the last two numbers, those two numbers are the whole
+state of the game. A NumberGame finds every state that can be reached with a
+breadth first search, keeping each state only once. It can then answer
+questions about the game:
+
+    game = NumberGame(limit = 99)
+    path = game.shortest(89)
+    script = game.script(path)
+
+Large games can spread the moves of each level of the search over a process
+pool, with the workers argument. The new states are still merged one at a
+time, so this helps most with large limits, where the primes are slow to find.
+
+Run as a script to describe a game:
+
+    python number_game.py --limit 10000 --target 9973 --workers 4
+
+Constants:
+LETTER_CHOICES: The menu_args and menu_class choices for each move. (dict of str: str)
+MOVES: The names of the moves, in the order they are stored. (tuple of str)
+NUMBER_CHOICES: The NumberMenu choices for each move. (dict of str: str)
+
+Classes:
+GamePath: A series of moves through the number game. (tuple)
+NumberGame: The graph of every reachable state of the number game. (object)
+
+Functions:
+expand: Find the states after each move from some states. (array of int)
+main: Describe a number game from the command line. (None)
+order_states: Order states so that each comes after all of its useful parents. (list of int)
+"""
+
+from array import array
+import argparse
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import sys
+
+from primes import next_prime
+from sequences import collatz_step
+
+# The menu_args and menu_class choices for each move.
+LETTER_CHOICES = {'fibonacci': 'A', 'prime': 'B', 'collatz': 'C'}
+# The names of the moves, in the order they are stored.
+MOVES = ('fibonacci', 'prime', 'collatz')
+# The NumberMenu choices for each move.
+NUMBER_CHOICES = {'fibonacci': '1', 'prime': '2', 'collatz': '3'}
+
+GamePath = namedtuple('GamePath', 'moves numbers')
+GamePath.__doc__ = """
+A series of moves through the number game. (tuple)
+
+Attributes:
+moves: The names of the moves. (tuple of str)
+numbers: The number appended by each move. (tuple of int)
+"""
+
+def expand(keys, base):
+    """
+    Find the states after each move from some states. (array of int)
+
+    States are given as keys, the last number times the base plus the number
+    before it. The return value has the keys of the states after each of the
+    moves, in the order of MOVES, for each state in turn.
+
+    Parameters:
+    keys: The keys of the states to move from. (sequence of int)
+    base: The number the last number is multiplied by in the keys. (int)
+    """
+    found = array('q')
+    for key in keys:
+        last, previous = divmod(key, base)
+        found.append((previous + last) * base + last)
+        found.append(next_prime(last) * base + last)
+        found.append(collatz_step(last) * base + last)
+    return found
+
+class NumberGame(object):
+    """
+    The graph of every reachable state of the number game. (object)
+
+    Each state has an index, in the order the states were found. Because the
+    search is breadth first, states found earlier take no more moves to reach
+    than states found later. The states and moves are kept in arrays, so large
+    games take little memory.
+
+    Class Attributes:
+    chunk_size: The number of states given to a worker at once. (int)
+
+    Attributes:
+    base: The number the last number is multiplied by in the keys. (int)
+    index: The index of each state, by key. (dict of int: int)
+    keys: The key of each state, the last number times base plus the one before. (array of int)
+    limit: The highest number that doesn't end the game. (int)
+    move_to: The move leading to each state on a shortest path. (bytearray)
+    parents: The state before each state on a shortest path. (array of int)
+    successors: The state after each move from each state, or -1 if the game is over. (array of int)
+
+    Methods:
+    add: Add a new state to the graph. (int)
+    cycle: Find a loop of moves that can be repeated on the way to a target. (GamePath or None)
+    explore: Find every state that can be reached. (None)
+    goals: Find the states that reach a target. (list of int)
+    longest: Find the longest way to reach a target. (GamePath or None)
+    numbers: Get the last two numbers of a state. (tuple of int)
+    path: Get the shortest path to a state. (GamePath)
+    reachable_values: Get every number that can be appended. (set of int)
+    script: Get the menu choices for a path. (list of str)
+    shortest: Find the shortest way to reach a target. (GamePath or None)
+
+    Overridden Methods:
+    __init__
+    __len__
+    """
+
+    # The number of states given to a worker at once.
+    chunk_size = 20000
+
+    def __init__(self, limit = 99, start = (0, 1), workers = 1):
+        """
+        Explore the game. (None)
+
+        Parameters:
+        limit: The highest number that doesn't end the game. (int)
+        start: The first two numbers. (tuple of int)
+        workers: The number of processes to explore with. (int)
+        """
+        self.limit = limit
+        self.base = max(limit, start[0]) + 1
+        self.keys = array('q')
+        self.index = {}
+        self.successors = array('q')
+        self.parents = array('q')
+        self.move_to = bytearray()
+        self.add(start[1] * self.base + start[0], -1, 0)
+        self.explore(workers)
+
+    def __len__(self):
+        """The number of states in the game. (int)"""
+        return len(self.keys)
+
+    def add(self, key, parent, move):
+        """
+        Add a new state to the graph. (int)
+
+        The return value is the index of the new state.
+
+        Parameters:
+        key: The key of the state. (int)
+        parent: The index of the state it was found from. (int)
+        move: The index of the move it was found with. (int)
+        """
+        state = len(self.keys)
+        self.index[key] = state
+        self.keys.append(key)
+        self.successors.extend((-1, -1, -1))
+        self.parents.append(parent)
+        self.move_to.append(move)
+        return state
+
+    def cycle(self, target = None):
+        """
+        Find a loop of moves that can be repeated on the way to a target. (GamePath or None)
+
+        The loop starts and ends at the same state, which can be reached from
+        the start and can still reach the target. The return value is None if
+        there is no such loop, in which case longest will find a path.
+
+        Parameters:
+        target: The number to reach, or None to end the game. (int or None)
+        """
+        useful, order = self._order(target)
+        if len(order) == sum(useful):
+            return None
+        # Every state left out of the order has a useful parent also left out,
+        # so walking back through those parents must come back around.
+        left = bytearray(useful)
+        for state in order:
+            left[state] = 0
+        predecessors = self._predecessors()
+        state = left.index(1)
+        seen = {}
+        steps = []
+        while state not in seen:
+            seen[state] = len(steps)
+            for parent, move in predecessors[state]:
+                if left[parent]:
+                    steps.append((parent, move, state))
+                    state = parent
+                    break
+        loop = steps[seen[state]:]
+        loop.reverse()
+        return GamePath(tuple(MOVES[move] for parent, move, child in loop),
+            tuple(self.numbers(child)[1] for parent, move, child in loop))
+
+    def explore(self, workers = 1):
+        """
+        Find every state that can be reached. (None)
+
+        Parameters:
+        workers: The number of processes to explore with. (int)
+        """
+        executor = ProcessPoolExecutor(workers) if workers > 1 else None
+        base, limit, index, successors = self.base, self.limit, self.index, self.successors
+        frontier = [0] if self.keys[0] // base <= limit else []
+        try:
+            while frontier:
+                # Find the moves from each state in the frontier.
+                keys = [self.keys[state] for state in frontier]
+                if executor is not None and len(keys) > self.chunk_size:
+                    chunks = [keys[start:start + self.chunk_size]
+                        for start in range(0, len(keys), self.chunk_size)]
+                    found = array('q')
+                    for chunk_found in executor.map(expand, chunks, itertools.repeat(base)):
+                        found.extend(chunk_found)
+                else:
+                    found = expand(keys, base)
+                # Add the new states, and queue the ones where the game isn't over.
+                next_frontier = []
+                for position, state in enumerate(frontier):
+                    for move in range(3):
+                        key = found[position * 3 + move]
+                        child = index.get(key)
+                        if child is None:
+                            child = self.add(key, state, move)
+                            if key // base <= limit:
+                                next_frontier.append(child)
+                        successors[state * 3 + move] = child
+                frontier = next_frontier
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def goals(self, target = None):
+        """
+        Find the states that reach a target. (list of int)
+
+        Parameters:
+        target: The number to reach, or None for the states ending the game. (int or None)
+        """
+        base = self.base
+        if target is None:
+            return [state for state, key in enumerate(self.keys) if key // base > self.limit]
+        return [state for state, key in enumerate(self.keys) if key // base == target]
+
+    def longest(self, target = None):
+        """
+        Find the longest way to reach a target. (GamePath or None)
+
+        The return value is None if the target can't be reached, or if there is
+        no longest way because moves can be repeated in a loop. Use cycle to
+        find such a loop.
+
+        Parameters:
+        target: The number to reach, or None to end the game. (int or None)
+        """
+        useful, order = self._order(target)
+        if not useful[0] or len(order) < sum(useful):
+            return None
+        # Find the longest path to each useful state, in an order where every
+        # state comes after all of its parents.
+        lengths = array('q', [-1]) * len(self.keys)
+        best_parent = array('q', [-1]) * len(self.keys)
+        best_move = bytearray(len(self.keys))
+        lengths[0] = 0
+        successors = self.successors
+        for state in order:
+            if lengths[state] < 0:
+                continue
+            for move in range(3):
+                child = successors[state * 3 + move]
+                if child >= 0 and useful[child] and lengths[state] + 1 > lengths[child]:
+                    lengths[child] = lengths[state] + 1
+                    best_parent[child] = state
+                    best_move[child] = move
+        end = max(self.goals(target), key = lambda state: lengths[state])
+        return self._walk(end, best_parent, best_move)
+
+    def numbers(self, state):
+        """
+        Get the last two numbers of a state. (tuple of int)
+
+        Parameters:
+        state: The index of the state. (int)
+        """
+        last, previous = divmod(self.keys[state], self.base)
+        return previous, last
+
+    def path(self, state):
+        """
+        Get the shortest path to a state. (GamePath)
+
+        Parameters:
+        state: The index of the state. (int)
+        """
+        return self._walk(state, self.parents, self.move_to)
+
+    def reachable_values(self):
+        """Get every number that can be appended. (set of int)"""
+        base = self.base
+        return {key // base for key in itertools.islice(self.keys, 1, None)}
+
+    def script(self, path, choices = NUMBER_CHOICES):
+        """
+        Get the menu choices for a path. (list of str)
+
+        Parameters:
+        path: The path to play. (GamePath)
+        choices: The menu choice for each move. (dict of str: str)
+        """
+        return [choices[move] for move in path.moves]
+
+    def shortest(self, target = None):
+        """
+        Find the shortest way to reach a target. (GamePath or None)
+
+        The return value is None if the target can't be reached.
+
+        Parameters:
+        target: The number to reach, or None to end the game. (int or None)
+        """
+        goals = self.goals(target)
+        # States are found in order of distance, so the first goal is closest.
+        return self.path(goals[0]) if goals else None
+
+    def _order(self, target):
+        """
+        Order the states that lead to a target, parents first. (tuple)
+
+        The return value is a flag for each state that can reach the target,
+        and the order of those states. States in or after a loop are left out
+        of the order.
+
+        Parameters:
+        target: The number to reach, or None to end the game. (int or None)
+        """
+        # Work back from the goals to find the states that can reach them.
+        predecessors = self._predecessors()
+        useful = bytearray(len(self.keys))
+        stack = self.goals(target)
+        for state in stack:
+            useful[state] = 1
+        while stack:
+            for parent, move in predecessors[stack.pop()]:
+                if not useful[parent]:
+                    useful[parent] = 1
+                    stack.append(parent)
+        return useful, order_states(useful, self.successors)
+
+    def _predecessors(self):
+        """Get the states and moves leading to each state. (list of list of tuple)"""
+        predecessors = [[] for state in self.keys]
+        for edge, child in enumerate(self.successors):
+            if child >= 0:
+                predecessors[child].append(divmod(edge, 3))
+        return predecessors
+
+    def _walk(self, state, parents, moves):
+        """
+        Follow parents back from a state to the start. (GamePath)
+
+        Parameters:
+        state: The index of the state to end at. (int)
+        parents: The parent of each state. (array of int)
+        moves: The move from the parent to each state. (bytearray)
+        """
+        steps = []
+        while state > 0:
+            steps.append((MOVES[moves[state]], self.numbers(state)[1]))
+            state = parents[state]
+        steps.reverse()
+        return GamePath(tuple(move for move, number in steps), tuple(number for move, number in steps))
+
+def order_states(useful, successors):
+    """
+    Order states so that each comes after all of its useful parents. (list of int)
+
+    States in a loop, and states after a loop, are left out.
+
+    Parameters:
+    useful: A flag for each state to order. (bytearray)
+    successors: The state after each move from each state, or -1. (array of int)
+    """
+    # Count the useful parents of each useful state.
+    waiting = array('q', [0]) * len(useful)
+    for edge, child in enumerate(successors):
+        if child >= 0 and useful[child] and useful[edge // 3]:
+            waiting[child] += 1
+    # Take states once all of their parents have been taken.
+    order = [state for state, flag in enumerate(useful) if flag and not waiting[state]]
+    for state in order:
+        for move in range(3):
+            child = successors[state * 3 + move]
+            if child >= 0 and useful[child]:
+                waiting[child] -= 1
+                if not waiting[child]:
+                    order.append(child)
+    return order
+
+def main(args):
+    """
+    Describe a number game from the command line. (None)
+
+    Parameters:
+    args: The command line arguments. (list of str)
+    """
+    parser = argparse.ArgumentParser(description = 'Explore the number game.')
+    parser.add_argument('--limit', type = int, default = 99, help = 'The highest number before the game ends.')
+    parser.add_argument('--target', type = int, default = None, help = 'The number to reach, instead of ending the game.')
+    parser.add_argument('--workers', type = int, default = 1)
+    parser.add_argument('--letters', action = 'store_true', help = 'Give scripts for the letter menus.')
+    options = parser.parse_args(args)
+    game = NumberGame(options.limit, workers = options.workers)
+    choices = LETTER_CHOICES if options.letters else NUMBER_CHOICES
+    goal = 'end the game' if options.target is None else 'reach {}'.format(options.target)
+    print('{} states, {} different numbers.'.format(len(game), len(game.reachable_values())))
+    shortest = game.shortest(options.target)
+    if shortest is None:
+        print('There is no way to {}.'.format(goal))
+        return
+    print('Shortest way to {}: {}'.format(goal, ' '.join(game.script(shortest, choices))))
+    longest = game.longest(options.target)
+    if longest is None:
+        loop = game.cycle(options.target)
+        print('There is no longest way, the moves {} can be repeated forever.'.format(
+            ' '.join(game.script(loop, choices))))
+    else:
+        print('Longest way to {}: {}'.format(goal, ' '.join(game.script(longest, choices))))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
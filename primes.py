@@ -0,0 +1,196 @@
+"""
+primes.py
+
+Prime numbers for the number menus.
+
+Primes are found with a segmented sieve that grows as larger primes are asked
+for, up to MAX_SIEVE. Past that, numbers are tested with the Miller-Rabin test,
+which is exact below 3.3 * 10 ** 24 and probabilistic above that.
+
+Constants:
+MAX_SIEVE: The largest number the sieve will grow to. (int)
+RANDOM: The random bases for large Miller-Rabin tests. (random.Random)
+SIEVE: The sieve shared by the number menus. (PrimeSieve)
+SIEVE_PRODUCT: The product of the primes below 1000, for quick filtering. (int)
+SMALL_PRIMES: The Miller-Rabin bases, also used for trial division. (tuple of int)
+
+Classes:
+PrimeSieve: A segmented sieve of Eratosthenes that grows on demand. (object)
+
+Functions:
+is_prime: Check if a number is prime. (bool)
+miller_rabin: Test a number for primality with Miller-Rabin. (bool)
+next_prime: Find the smallest prime larger than a number. (int)
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+import itertools
+import math
+import random
+
+# The largest number the sieve will grow to.
+MAX_SIEVE = 10 ** 7
+# The random bases for large Miller-Rabin tests, kept apart from the random module.
+RANDOM = random.Random()
+# The Miller-Rabin bases, also used for trial division.
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+class PrimeSieve(object):
+    """
+    A segmented sieve of Eratosthenes that grows on demand. (object)
+
+    Attributes:
+    limit: The largest number that has been sieved. (int)
+    primes: The primes up to the limit. (array of int)
+    segment: The smallest amount to grow the sieve by. (int)
+
+    Methods:
+    extend: Sieve all of the numbers up to a new limit. (None)
+    is_prime: Check if a number within the limit is prime. (bool)
+    next_prime: Find the smallest prime larger than a number. (int or None)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, segment = 2 ** 16):
+        """
+        Set up an empty sieve. (None)
+
+        Parameters:
+        segment: The smallest amount to grow the sieve by. (int)
+        """
+        self.limit = 1
+        self.primes = array('Q')
+        self.segment = segment
+
+    def extend(self, limit):
+        """
+        Sieve all of the numbers up to a new limit. (None)
+
+        Parameters:
+        limit: The new limit for the sieve. (int)
+        """
+        # Make sure we have the primes needed to sieve the new segment.
+        root = math.isqrt(limit)
+        if root > self.limit:
+            self.extend(root)
+        # Sieve the numbers between the old and new limits.
+        low = self.limit + 1
+        if limit < low:
+            return
+        flags = bytearray(b'\x01') * (limit - low + 1)
+        for prime in self.primes:
+            if prime > root:
+                break
+            start = max(prime * prime, (low + prime - 1) // prime * prime)
+            if start <= limit:
+                flags[start - low::prime] = bytes(len(range(start, limit + 1, prime)))
+        # Store the new primes.
+        self.primes.extend(itertools.compress(range(low, limit + 1), flags))
+        self.limit = limit
+
+    def is_prime(self, number):
+        """
+        Check if a number within the limit is prime. (bool)
+
+        Parameters:
+        number: The number to check. (int)
+        """
+        index = bisect_left(self.primes, number)
+        return index < len(self.primes) and self.primes[index] == number
+
+    def next_prime(self, number):
+        """
+        Find the smallest prime larger than a number. (int or None)
+
+        The sieve is grown as needed up to MAX_SIEVE. If the next prime is past
+        that, the return value is None.
+
+        Parameters:
+        number: The number to find the next prime after. (int)
+        """
+        while True:
+            index = bisect_right(self.primes, number)
+            if index < len(self.primes):
+                return self.primes[index]
+            if self.limit >= MAX_SIEVE:
+                return None
+            # Grow the sieve to at least double its size.
+            new_limit = max(self.limit * 2, number + self.segment, self.limit + self.segment)
+            self.extend(min(new_limit, MAX_SIEVE))
+
+# The sieve shared by the number menus.
+SIEVE = PrimeSieve()
+SIEVE.extend(1000)
+# The product of the primes below 1000, for quick filtering.
+SIEVE_PRODUCT = math.prod(SIEVE.primes)
+
+def is_prime(number):
+    """
+    Check if a number is prime. (bool)
+
+    Parameters:
+    number: The number to check. (int)
+    """
+    if number <= SIEVE.limit:
+        return SIEVE.is_prime(number)
+    return miller_rabin(number)
+
+def miller_rabin(number, rounds = 8):
+    """
+    Test a number for primality with Miller-Rabin. (bool)
+
+    The test is exact for numbers below 3.3 * 10 ** 24. Larger numbers are
+    also tested against random bases, so a composite number has less than a
+    one in 4 ** (13 + rounds) chance of being called prime.
+
+    Parameters:
+    number: The number to test. (int)
+    rounds: The number of random bases to try for large numbers. (int)
+    """
+    # Handle small numbers and small factors.
+    if number < 2:
+        return False
+    for prime in SMALL_PRIMES:
+        if number % prime == 0:
+            return number == prime
+    # Write number - 1 as 2 ** shift * odd.
+    odd = number - 1
+    shift = (odd & -odd).bit_length() - 1
+    odd >>= shift
+    # Try each base as a witness to the number being composite.
+    bases = list(SMALL_PRIMES)
+    if number >= 3317044064679887385961981:
+        bases.extend(RANDOM.randrange(2, number - 1) for base in range(rounds))
+    for base in bases:
+        x = pow(base, odd, number)
+        if x == 1 or x == number - 1:
+            continue
+        for square in range(shift - 1):
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False
+    return True
+
+def next_prime(number):
+    """
+    Find the smallest prime larger than a number. (int)
+
+    Parameters:
+    number: The number to find the next prime after. (int)
+    """
+    # Use the sieve when we can.
+    if number < MAX_SIEVE:
+        prime = SIEVE.next_prime(number)
+        if prime is not None:
+            return prime
+    # Otherwise test odd numbers until we find a prime, skipping the slow test
+    # for numbers with small factors.
+    candidate = number + 1 + number % 2
+    while math.gcd(candidate, SIEVE_PRODUCT) != 1 or not miller_rabin(candidate):
+        candidate += 2
+    return candidate
@@ -0,0 +1,483 @@
+"""
+sequences.py
+
+Integer sequence engines for the number menus.
+
+Collatz stopping times are memoized in a bounded cache, and can be calculated
+for whole ranges of starting values at once with NumPy, if it is installed.
+NumPy is only imported when it is first needed, so importing this module stays
+fast.
+
+The number menus keep their sequences in a NumberSequence, which stores the
+numbers compactly in chunks and can move old chunks out to a file.
+
+Constants:
+COLLATZ: The stopping time cache shared by the number menus. (CollatzCache)
+JUMP_LIMIT: The most steps a typed in jump can move. (int)
+
+Classes:
+CollatzCache: A bounded cache of Collatz stopping times. (object)
+NumberSequence: A compact, append-only sequence of integers. (object)
+
+Functions:
+collatz_slowest: Find the slowest start to reach 1 in a range. (tuple of int)
+collatz_step: Take one step of the Collatz sequence. (int)
+collatz_trajectories: Calculate the start of several Collatz sequences. (array)
+collatz_stopping_times: Calculate stopping times for a range of numbers. (list or array)
+fibonacci_extend: Jump a sequence ahead by a typed in number of steps. (None)
+fibonacci_jump: Move a Fibonacci-style sequence ahead several steps. (tuple of int)
+fibonacci_pair: Calculate two consecutive Fibonacci numbers. (tuple of int)
+load_numpy: Import NumPy the first time it is needed. (module or None)
+number_text: Describe a number that may be too big to print. (str)
+"""
+
+from array import array
+from collections import OrderedDict
+import math
+import mmap
+import pickle
+import struct
+import tempfile
+
+# NumPy once it has been imported, or False if it isn't installed.
+numpy = None
+
+class CollatzCache(object):
+    """
+    A bounded cache of Collatz stopping times. (object)
+
+    The stopping time is the number of steps it takes to get to 1. When the
+    cache is full, the least recently used stopping times are dropped.
+
+    Attributes:
+    max_size: The most stopping times to keep. (int)
+    times: The cached stopping times. (OrderedDict of int: int)
+
+    Methods:
+    stopping_time: Get the stopping time of a number. (int or None)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, max_size = 2 ** 20):
+        """
+        Set up an empty cache. (None)
+
+        Parameters:
+        max_size: The most stopping times to keep. (int)
+        """
+        self.max_size = max_size
+        self.times = OrderedDict()
+
+    def stopping_time(self, number):
+        """
+        Get the stopping time of a number. (int or None)
+
+        Numbers less than one never get to 1, so their stopping time is None.
+
+        Parameters:
+        number: The number to start the sequence at. (int)
+        """
+        if number < 1:
+            return None
+        # Walk the sequence until we get to 1 or a number we know.
+        path = []
+        while number != 1 and number not in self.times:
+            path.append(number)
+            number = collatz_step(number)
+        if number == 1:
+            steps = 0
+        else:
+            steps = self.times[number]
+            self.times.move_to_end(number)
+        # Store the stopping times along the path.
+        for number in reversed(path):
+            steps += 1
+            self.times[number] = steps
+        while len(self.times) > self.max_size:
+            self.times.popitem(last = False)
+        return steps
+
+class NumberSequence(object):
+    """
+    A compact, append-only sequence of integers. (object)
+
+    The numbers are stored in chunks of chunk_size numbers. A chunk is an array
+    of 64 bit integers until a number too big for that is added to it, when it
+    becomes a list. Once there are more than max_resident full chunks in
+    memory, the oldest ones are written to the spill file, and read back
+    through a memory map when needed.
+
+    Attributes:
+    chunk_size: The number of numbers in each chunk. (int)
+    chunks: The chunks, or (offset, size, kind) for spilled chunks. (list)
+    length: The number of numbers in the sequence. (int)
+    loaded: The index and contents of the last spilled chunk read. (tuple)
+    map: The memory map of the spill file. (mmap.mmap or None)
+    max_resident: The most full chunks to keep in memory. (int or None)
+    resident: The index of the oldest chunk still in memory. (int)
+    spill_file: The file spilled chunks are written to. (file or None)
+
+    Methods:
+    append: Add a number to the end of the sequence. (None)
+    close: Close the spill file. (None)
+    extend: Add numbers to the end of the sequence. (None)
+    get_chunk: Get the contents of a chunk. (array or list)
+    spill: Write the oldest chunks in memory to the spill file. (None)
+
+    Overridden Methods:
+    __init__
+    __getitem__
+    __iter__
+    __len__
+    __repr__
+    """
+
+    def __init__(self, numbers = (), chunk_size = 2 ** 16, max_resident = 64, spill_file = None):
+        """
+        Set up the storage for the sequence. (None)
+
+        If max_resident is None, nothing is ever spilled. If spill_file is None,
+        a temporary file is used when the first chunk is spilled.
+
+        Parameters:
+        numbers: The starting numbers for the sequence. (iterable of int)
+        chunk_size: The number of numbers in each chunk. (int)
+        max_resident: The most full chunks to keep in memory. (int or None)
+        spill_file: A binary file to write spilled chunks to. (file or None)
+        """
+        self.chunk_size = chunk_size
+        self.max_resident = max_resident
+        self.spill_file = spill_file
+        self.chunks = [array('q')]
+        self.length = 0
+        self.resident = 0
+        self.map = None
+        self.loaded = (None, None)
+        self.extend(numbers)
+
+    def __getitem__(self, index):
+        """
+        Get a number from the sequence. (int)
+
+        Parameters:
+        index: The position of the number, which may be negative. (int)
+        """
+        # Take the quick way for the end of the sequence, where the menus look.
+        tail = self.chunks[-1]
+        if -len(tail) <= index < 0:
+            return tail[index]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError('NumberSequence index out of range')
+        chunk_index, offset = divmod(index, self.chunk_size)
+        chunk = self.chunks[chunk_index]
+        # Read single 64 bit integers straight from the spill file.
+        if isinstance(chunk, tuple) and chunk[2] == 'q':
+            return struct.unpack_from('q', self.map, chunk[0] + offset * 8)[0]
+        return self.get_chunk(chunk_index)[offset]
+
+    def __iter__(self):
+        """Iterate over the numbers in the sequence. (iterator)"""
+        for chunk_index in range(len(self.chunks)):
+            yield from self.get_chunk(chunk_index)
+
+    def __len__(self):
+        """The number of numbers in the sequence. (int)"""
+        return self.length
+
+    def __repr__(self):
+        """Debugging text representation. (str)"""
+        return '<NumberSequence of {} numbers ending in {}>'.format(self.length,
+            number_text(self[-1]) if self.length else 'nothing')
+
+    def append(self, number):
+        """
+        Add a number to the end of the sequence. (None)
+
+        Parameters:
+        number: The number to add. (int)
+        """
+        tail = self.chunks[-1]
+        # Start a new chunk if the last one is full.
+        if len(tail) == self.chunk_size:
+            tail = array('q')
+            self.chunks.append(tail)
+            if self.max_resident is not None and len(self.chunks) - 1 - self.resident > self.max_resident:
+                self.spill()
+        # Switch to a list if the number is too big for the array.
+        try:
+            tail.append(number)
+        except OverflowError:
+            tail = self.chunks[-1] = tail.tolist()
+            tail.append(number)
+        self.length += 1
+
+    def close(self):
+        """Close the spill file. (None)"""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.spill_file is not None:
+            self.spill_file.close()
+
+    def extend(self, numbers):
+        """
+        Add numbers to the end of the sequence. (None)
+
+        Parameters:
+        numbers: The numbers to add. (iterable of int)
+        """
+        for number in numbers:
+            self.append(number)
+
+    def get_chunk(self, chunk_index):
+        """
+        Get the contents of a chunk. (array or list)
+
+        Parameters:
+        chunk_index: The position of the chunk in the sequence. (int)
+        """
+        chunk = self.chunks[chunk_index]
+        if not isinstance(chunk, tuple):
+            return chunk
+        # Keep the last spilled chunk read, since reads tend to be close together.
+        if self.loaded[0] != chunk_index:
+            offset, size, kind = chunk
+            data = self.map[offset:offset + size]
+            if kind == 'q':
+                contents = array('q')
+                contents.frombytes(data)
+            else:
+                contents = pickle.loads(data)
+            self.loaded = (chunk_index, contents)
+        return self.loaded[1]
+
+    def spill(self):
+        """Write the oldest chunks in memory to the spill file. (None)"""
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile()
+        # Write out full chunks until few enough are left in memory.
+        self.spill_file.seek(0, 2)
+        while len(self.chunks) - 1 - self.resident > self.max_resident:
+            chunk = self.chunks[self.resident]
+            if isinstance(chunk, array):
+                data, kind = chunk.tobytes(), 'q'
+            else:
+                data, kind = pickle.dumps(chunk, pickle.HIGHEST_PROTOCOL), 'big'
+            self.chunks[self.resident] = (self.spill_file.tell(), len(data), kind)
+            self.spill_file.write(data)
+            self.resident += 1
+        # Map the file again to cover the new chunks.
+        self.spill_file.flush()
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self.spill_file.fileno(), 0, access = mmap.ACCESS_READ)
+
+# The stopping time cache shared by the number menus.
+COLLATZ = CollatzCache()
+
+# The most steps a typed in jump can move, keeping the numbers to a few
+# hundred thousand digits.
+JUMP_LIMIT = 10 ** 6
+
+def collatz_slowest(stop):
+    """
+    Find the slowest start to reach 1 in a range. (tuple of int)
+
+    The return value is the starting number below stop with the longest
+    stopping time, and that stopping time.
+
+    Parameters:
+    stop: The number after the last starting number to check. (int)
+    """
+    times = collatz_stopping_times(1, stop)
+    if load_numpy() is None:
+        steps = max(times)
+        return times.index(steps) + 1, steps
+    index = int(times.argmax())
+    return index + 1, int(times[index])
+
+def collatz_step(number):
+    """
+    Take one step of the Collatz sequence. (int)
+
+    Parameters:
+    number: The number to take the step from. (int)
+    """
+    # If the number is odd, triple it and add one.
+    if number % 2:
+        return number * 3 + 1
+    # If the number is even, halve it.
+    else:
+        return number // 2
+
+def collatz_stopping_times(start, stop, chunk = 2 ** 20):
+    """
+    Calculate stopping times for a range of numbers. (list or array)
+
+    With NumPy, the numbers are stepped together in chunks, and once a
+    number drops below its chunk, the known stopping time is used for the rest
+    of the sequence. The return value is then an array. Without NumPy, the
+    return value is a list from the shared cache.
+
+    Parameters:
+    start: The first number in the range, at least 1. (int)
+    stop: The number after the last number in the range. (int)
+    chunk: The most numbers to step together. (int)
+    """
+    # Numbers below 1 never get to 1.
+    if start < 1:
+        raise ValueError('Stopping times start at 1, not {}.'.format(start))
+    if load_numpy() is None:
+        return [COLLATZ.stopping_time(number) for number in range(start, stop)]
+    # Values past this could overflow when tripled.
+    limit = (2 ** 63 - 2) // 3
+    times = numpy.zeros(stop - start, dtype = numpy.int64)
+    low = start
+    while low < stop:
+        # Chunks grow with the numbers, so most numbers drop into a known chunk.
+        high = min(low + min(chunk, max(low, 1024)), stop)
+        values = numpy.arange(low, high, dtype = numpy.int64)
+        steps = numpy.zeros(high - low, dtype = numpy.int64)
+        active = numpy.nonzero(values != 1)[0]
+        while active.size:
+            # Step all of the active numbers at once, taking the halving step
+            # after 3n + 1 straight away.
+            current = values[active]
+            if current.max() > limit:
+                raise OverflowError('Collatz sequence too large for 64 bit integers.')
+            odd = current & 1
+            current = numpy.where(odd, (current * 3 + 1) >> 1, current >> 1)
+            values[active] = current
+            steps[active] += 1 + odd
+            # Finish numbers that reach 1 or a number already calculated.
+            known = (current >= start) & (current < low)
+            steps[active[known]] += times[current[known] - start]
+            active = active[(current != 1) & ~known]
+        times[low - start:high - start] = steps
+        low = high
+    return times
+
+def collatz_trajectories(starts, length):
+    """
+    Calculate the start of several Collatz sequences. (array)
+
+    The return value has one row for each starting number, holding the first
+    length numbers of its sequence. Sequences that reach 1 carry on with the
+    4, 2, 1 cycle. This requires NumPy.
+
+    Parameters:
+    starts: The numbers to start the sequences at. (sequence of int)
+    length: The number of numbers to calculate for each sequence. (int)
+    """
+    if load_numpy() is None:
+        raise ImportError('Collatz trajectories require NumPy.')
+    paths = numpy.empty((len(starts), length), dtype = numpy.int64)
+    values = numpy.asarray(starts, dtype = numpy.int64)
+    for column in range(length):
+        paths[:, column] = values
+        values = numpy.where(values & 1, values * 3 + 1, values >> 1)
+    return paths
+
+def fibonacci_extend(numbers, steps_text, limit = JUMP_LIMIT):
+    """
+    Jump a sequence ahead by a typed in number of steps. (None)
+
+    The last two numbers after the jump are appended to the sequence. If the
+    text is not a whole number from 0 to the limit, a ValueError is raised
+    with a message to show the user.
+
+    Parameters:
+    numbers: The sequence to extend, at least two numbers long. (NumberSequence)
+    steps_text: The number of steps, as the user typed it. (str)
+    limit: The most steps to allow. (int)
+    """
+    # Check the number of steps.
+    try:
+        steps = int(steps_text)
+    except ValueError:
+        raise ValueError('The number of steps must be a whole number.') from None
+    if steps < 0:
+        raise ValueError('The number of steps must be a whole number.')
+    if steps > limit:
+        raise ValueError('The number of steps can be at most {:,}.'.format(limit))
+    # Append the last two numbers after the jump.
+    previous, last = fibonacci_jump(numbers[-2], numbers[-1], steps)
+    if steps > 1:
+        numbers.append(previous)
+    if steps > 0:
+        numbers.append(last)
+
+def fibonacci_jump(previous, last, steps):
+    """
+    Move a Fibonacci-style sequence ahead several steps. (tuple of int)
+
+    Each step appends the sum of the last two numbers. The return value is the
+    last two numbers after all of the steps. This takes O(log steps) big integer
+    operations, using the fact that after n steps the last number is
+    F(n) * previous + F(n + 1) * last.
+
+    Parameters:
+    previous: The second to last number in the sequence. (int)
+    last: The last number in the sequence. (int)
+    steps: The number of steps to move ahead. (int)
+    """
+    if steps < 1:
+        return previous, last
+    fib_n, fib_next = fibonacci_pair(steps)
+    new_previous = (fib_next - fib_n) * previous + fib_n * last
+    new_last = fib_n * previous + fib_next * last
+    return new_previous, new_last
+
+def fibonacci_pair(n):
+    """
+    Calculate two consecutive Fibonacci numbers. (tuple of int)
+
+    The return value is F(n) and F(n + 1), calculated by fast doubling:
+    F(2k) = F(k) * (2 * F(k + 1) - F(k)) and F(2k + 1) = F(k) ** 2 + F(k + 1) ** 2.
+
+    Parameters:
+    n: The index of the first Fibonacci number. (int)
+    """
+    fib_k, fib_next = 0, 1
+    # Work down from the highest bit of n, doubling k at each bit.
+    for bit in bin(n)[2:]:
+        fib_k, fib_next = fib_k * (2 * fib_next - fib_k), fib_k * fib_k + fib_next * fib_next
+        if bit == '1':
+            fib_k, fib_next = fib_next, fib_k + fib_next
+    return fib_k, fib_next
+
+def load_numpy():
+    """Import NumPy the first time it is needed. (module or None)"""
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+    return numpy or None
+
+def number_text(number, max_digits = 60):
+    """
+    Describe a number that may be too big to print. (str)
+
+    Numbers up to max_digits long are just converted to text. Longer numbers
+    are described by their approximate length, since converting them to text
+    is slow, and is refused by Python past a few thousand digits.
+
+    Parameters:
+    number: The number to describe. (int)
+    max_digits: The most digits to show. (int)
+    """
+    # Only numbers near the limit are converted to count their digits exactly.
+    if number.bit_length() <= (max_digits + 1) * math.log2(10):
+        text = str(number)
+        digits = len(text.lstrip('-'))
+        if digits <= max_digits:
+            return text
+    else:
+        digits = int(number.bit_length() * math.log10(2)) + 1
+    return 'a number about {:,} digits long'.format(digits)
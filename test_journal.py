@@ -0,0 +1,157 @@
+"""
+test_journal.py
+
+Tests of recording and replaying sessions.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+FinalMenu: A number menu whose final state is set after the loop. (NumberMenu)
+JournalTest: Tests of recording and replaying sessions. (unittest.TestCase)
+PagedMenu: A number menu shown a few choices at a time. (FinalMenu)
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import journal
+from menu_test import NumberMenu
+
+class FinalMenu(NumberMenu):
+    """
+    A number menu whose final state is set after the loop. (NumberMenu)
+
+    Attributes:
+    finished: The number of times postloop has run. (int)
+
+    Overridden Methods:
+    preloop
+    postloop
+    snapshot
+    """
+
+    def preloop(self):
+        """Processing done before starting the choice/action loop. (None)"""
+        super().preloop()
+        self.finished = 0
+
+    def postloop(self):
+        """Processing done after the choice/action loop ends. (None)"""
+        super().postloop()
+        self.finished += 1
+
+    def snapshot(self):
+        """Get the state to check when replaying a journal. (tuple)"""
+        return super().snapshot() + (getattr(self, 'finished', None),)
+
+class PagedMenu(FinalMenu):
+    """
+    A number menu shown a few choices at a time. (FinalMenu)
+
+    Class Attributes:
+    page_size: The choices on each page. (int)
+
+    Overridden Methods:
+    snapshot
+    """
+
+    # The choices on each page.
+    page_size = 3
+
+    def snapshot(self):
+        """Get the state to check when replaying a journal. (tuple)"""
+        return super().snapshot() + (self.page,)
+
+class JournalTest(unittest.TestCase):
+    """
+    Tests of recording and replaying sessions. (unittest.TestCase)
+
+    Methods:
+    setUp: Make a temporary journal path. (None)
+    tearDown: Remove the journal. (None)
+    record: Record a script with a menu. (FinalMenu)
+    test_drift: Test that a replay of a changed journal fails. (None)
+    test_end_of_input: Test sessions where the input runs out. (None)
+    test_no_render: Test that replays don't draw the menu. (None)
+    test_pages: Test replaying page commands. (None)
+    test_postloop: Test that the final state is checked after postloop. (None)
+    test_truncated: Test reading journals cut off partway through a record. (None)
+    """
+
+    def setUp(self):
+        """Make a temporary journal path. (None)"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'session.jrnl')
+
+    def tearDown(self):
+        """Remove the journal. (None)"""
+        self.folder.cleanup()
+
+    def record(self, script, menu_class = FinalMenu):
+        """
+        Record a script with a menu. (FinalMenu)
+
+        Parameters:
+        script: The input for the session. (str)
+        menu_class: The menu to record. (type)
+        """
+        return journal.record(menu_class, self.path, io.StringIO(script), io.StringIO(), seed = 1, every = 2)
+
+    def test_drift(self):
+        """Test that a replay of a changed journal fails. (None)"""
+        self.record('1\n1\n3\n2\n4\n')
+        with open(self.path, 'rb') as journal_file:
+            data = journal_file.read()
+        # Change the second choice from adding to Collatz.
+        first = data.index(b'1\n')
+        second = data.index(b'1\n', first + 2)
+        with open(self.path, 'wb') as journal_file:
+            journal_file.write(data[:second] + b'3\n' + data[second + 2:])
+        with self.assertRaises(ValueError):
+            journal.replay(FinalMenu, self.path)
+
+    def test_end_of_input(self):
+        """Test sessions where the input runs out. (None)"""
+        # Running out between choices, and in the middle of a choice.
+        for script in ('1\n3\n', '1\n5\n'):
+            menu = self.record(script)
+            self.assertEqual(menu.finished, 1)
+            self.assertEqual(journal.replay(FinalMenu, self.path), 2)
+
+    def test_no_render(self):
+        """Test that replays don't draw the menu. (None)"""
+        self.record('1\n2\n3\n4\n')
+        with mock.patch.object(FinalMenu, 'render', side_effect = AssertionError('menu drawn')):
+            self.assertEqual(journal.replay(FinalMenu, self.path), 4)
+
+    def test_pages(self):
+        """Test replaying page commands. (None)"""
+        menu = self.record('>\n>\n1\n<\n/slowest\n#2\n4\n', PagedMenu)
+        self.assertEqual(menu.page, 1)
+        self.assertEqual(journal.replay(PagedMenu, self.path), 7)
+
+    def test_postloop(self):
+        """Test that the final state is checked after postloop. (None)"""
+        menu = self.record('1\n2\n3\n5\n3\n4\n')
+        self.assertEqual(menu.finished, 1)
+        self.assertEqual(journal.replay(FinalMenu, self.path), 6)
+
+    def test_truncated(self):
+        """Test reading journals cut off partway through a record. (None)"""
+        # A long unrecognized choice gives a record with a two byte length.
+        self.record('1\n{}\n2\n4\n'.format('x' * 200))
+        with open(self.path, 'rb') as journal_file:
+            data = journal_file.read()
+        records = list(journal.read_records(self.path))
+        for cut in range(len(journal.MAGIC), len(data)):
+            with open(self.path, 'wb') as journal_file:
+                journal_file.write(data[:cut])
+            cut_records = list(journal.read_records(self.path))
+            self.assertEqual(cut_records, records[:len(cut_records)])
+            self.assertLess(len(cut_records), len(records))
+
+if __name__ == '__main__':
+    unittest.main()
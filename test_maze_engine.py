@@ -0,0 +1,49 @@
+"""
+test_maze_engine.py
+
+Tests of the headless maze game.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+TargetTest: Tests of hints and solutions for the engine's own exit. (unittest.TestCase)
+"""
+
+import unittest
+
+from maze_engine import MazeEngine
+from maze_grid import MazeGrid
+
+class TargetTest(unittest.TestCase):
+    """
+    Tests of hints and solutions for the engine's own exit. (unittest.TestCase)
+
+    Attributes:
+    grid: A three by two maze, exiting from the bottom right cell. (MazeGrid)
+
+    Methods:
+    setUp: Make the maze. (None)
+    test_grid_exit: Test an engine using the grid's exit. (None)
+    test_own_exit: Test an engine with an exit of its own. (None)
+    """
+
+    def setUp(self):
+        """Make the maze. (None)"""
+        self.grid = MazeGrid.from_ascii('+   +---+---+\n|           |\n+   +---+   +\n|   |       |\n+---+---+   +')
+
+    def test_grid_exit(self):
+        """Test an engine using the grid's exit. (None)"""
+        engine = MazeEngine(self.grid)
+        self.assertEqual((engine.hint(), engine.solve()), ('e', 'ees'))
+
+    def test_own_exit(self):
+        """Test an engine with an exit of its own. (None)"""
+        engine = MazeEngine(self.grid, end = (2, 0))
+        self.assertEqual((engine.hint(), engine.solve()), ('e', 'ee'))
+        engine.walk('ee')
+        self.assertEqual((engine.hint(), engine.solve()), (None, ''))
+        # The grid's own exit is unchanged.
+        self.assertEqual(self.grid.solve(0, 0), 'ees')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+test_maze_grid.py
+
+Tests of the compact maze grid.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+ValidateTest: Tests of rejecting mazes that leave their outer wall. (unittest.TestCase)
+"""
+
+import os
+import tempfile
+import unittest
+
+import maze_gen
+from maze_grid import HEADER, MazeGrid
+
+class ValidateTest(unittest.TestCase):
+    """
+    Tests of rejecting mazes that leave their outer wall. (unittest.TestCase)
+
+    Methods:
+    setUp: Make a temporary directory for maze files. (None)
+    tearDown: Remove the maze files. (None)
+    write: Write a binary maze file from raw cell values. (str)
+    test_ascii: Test that ASCII mazes load with their gaps as start and exit. (None)
+    test_bad_values: Test that cell values with extra bits are refused. (None)
+    test_binary_edges: Test that binary mazes open through an edge are refused. (None)
+    test_command_line: Test that mazes written from the command line match their seed. (None)
+    test_generated: Test that generated mazes pass and load. (None)
+    test_map_edges: Test that maps open through each edge are refused. (None)
+    test_outside: Test that starts and exits outside the maze are refused. (None)
+    test_truncated: Test that binary mazes missing cells are refused. (None)
+    """
+
+    def setUp(self):
+        """Make a temporary directory for maze files. (None)"""
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the maze files. (None)"""
+        self.folder.cleanup()
+
+    def write(self, width, height, cells, start = (0, 0), end = (0, 0)):
+        """
+        Write a binary maze file from raw cell values. (str)
+
+        Parameters:
+        width: The number of columns in the maze. (int)
+        height: The number of rows in the maze. (int)
+        cells: The value of each cell. (bytes)
+        start: The starting coordinates of the maze. (tuple of int)
+        end: The coordinates of the exit. (tuple of int)
+        """
+        path = os.path.join(self.folder.name, 'bad.maze')
+        with open(path, 'wb') as maze_file:
+            maze_file.write(HEADER.pack(b'MAZE', width, height, *start + end))
+            maze_file.write(bytes(cells))
+        return path
+
+    def test_ascii(self):
+        """Test that ASCII mazes load with their gaps as start and exit. (None)"""
+        maze = MazeGrid.from_ascii('+   +---+---+\n|           |\n+   +---+   +\n|   |       |\n+---+---+   +')
+        self.assertEqual((maze.start, maze.end), ((0, 0), (2, 1)))
+        self.assertEqual(maze.solve(0, 0), 'ees')
+
+    def test_bad_values(self):
+        """Test that cell values with extra bits are refused. (None)"""
+        path = self.write(2, 1, [2, 8 | 16])
+        for use_mmap in (False, True):
+            with self.assertRaises(ValueError):
+                MazeGrid.load(path, use_mmap = use_mmap)
+
+    def test_binary_edges(self):
+        """Test that binary mazes open through an edge are refused. (None)"""
+        # Two cells side by side, with one opening added through each edge in turn.
+        for extra in ((1, 0), (4, 0), (8, 0), (0, 2)):
+            path = self.write(2, 1, [2 | extra[0], 8 | extra[1]])
+            for use_mmap in (False, True):
+                with self.assertRaises(ValueError):
+                    MazeGrid.load(path, use_mmap = use_mmap)
+        # The same maze without the openings loads.
+        maze = MazeGrid.load(self.write(2, 1, [2, 8], end = (1, 0)))
+        self.assertEqual(maze.solve(0, 0), 'e')
+
+    def test_command_line(self):
+        """Test that mazes written from the command line match their seed. (None)"""
+        path = os.path.join(self.folder.name, 'seeded.maze')
+        for algorithm in ('backtracker', 'eller'):
+            maze_gen.main([algorithm, '12', '9', path, '--seed', '7'])
+            loaded = MazeGrid.load(path)
+            self.assertEqual(bytes(loaded.cells), bytes(maze_gen.generate(12, 9, algorithm, seed = 7).cells))
+
+    def test_generated(self):
+        """Test that generated mazes pass and load. (None)"""
+        maze = maze_gen.generate(30, 20, seed = 1)
+        maze.validate()
+        path = os.path.join(self.folder.name, 'good.maze')
+        maze.save(path)
+        loaded = MazeGrid.load(path, use_mmap = True)
+        self.assertEqual(bytes(loaded.cells), bytes(maze.cells))
+        loaded.close()
+
+    def test_map_edges(self):
+        """Test that maps open through each edge are refused. (None)"""
+        for rows in ([['n', '']], [['s', '']], [['w', '']], [['', 'e']], [['e', 'ew']]):
+            with self.assertRaises(ValueError):
+                MazeGrid.from_map(rows)
+        MazeGrid.from_map([['e', 'w']])
+
+    def test_outside(self):
+        """Test that starts and exits outside the maze are refused. (None)"""
+        with self.assertRaises(ValueError):
+            MazeGrid.load(self.write(2, 1, [2, 8], end = (2, 0)))
+        with self.assertRaises(ValueError):
+            MazeGrid.from_map([['e', 'w']], start = (0, 1))
+
+    def test_truncated(self):
+        """Test that binary mazes missing cells are refused. (None)"""
+        with self.assertRaises(ValueError):
+            MazeGrid.load(self.write(3, 2, [0] * 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+test_maze_sim.py
+
+Tests of simulating random players in a maze.
+
+Run with `python -m unittest` or `python -m pytest`. The tests are skipped if
+NumPy isn't installed.
+
+Classes:
+SimulateTest: Tests of simulating players in a two cell maze. (unittest.TestCase)
+"""
+
+import unittest
+
+from maze_grid import MazeGrid
+from sequences import load_numpy
+
+if load_numpy() is not None:
+    import maze_sim
+    from maze_sim import TELEPORT_CHANCE
+
+@unittest.skipIf(load_numpy() is None, 'NumPy is not installed')
+class SimulateTest(unittest.TestCase):
+    """
+    Tests of simulating players in a two cell maze. (unittest.TestCase)
+
+    Attributes:
+    grid: A maze of two cells side by side, exiting from the east one. (MazeGrid)
+
+    Methods:
+    setUp: Make the maze. (None)
+    simulate: Simulate players from the west cell. (numpy.ndarray)
+    test_seed: Test that the same seed gives the same escape times. (None)
+    test_teleport: Test players who only ever say the magic word. (None)
+    test_walk: Test players who never say the magic word. (None)
+    """
+
+    def setUp(self):
+        """Make the maze. (None)"""
+        self.grid = MazeGrid.from_map([['e', 'w']], start = (0, 0), end = (1, 0))
+
+    def simulate(self, agents, teleport_rate, seed = 1):
+        """
+        Simulate players from the west cell. (numpy.ndarray)
+
+        Parameters:
+        agents: The number of players. (int)
+        teleport_rate: The chance of saying the magic word each turn. (float)
+        seed: The seed for the random number generator. (int)
+        """
+        return maze_sim.simulate(self.grid, agents, teleport_rate = teleport_rate, max_steps = 10000, seed = seed)
+
+    def test_seed(self):
+        """Test that the same seed gives the same escape times. (None)"""
+        self.assertEqual(self.simulate(1000, 0.5).tolist(), self.simulate(1000, 0.5).tolist())
+
+    def test_teleport(self):
+        """Test players who only ever say the magic word. (None)"""
+        steps = self.simulate(20000, 1.0)
+        summary = maze_sim.summarize(steps)
+        self.assertEqual(summary['agents'], 20000)
+        self.assertEqual(summary['escaped'], 20000)
+        self.assertEqual(sum(count for low, high, count in maze_sim.histogram(steps)), 20000)
+        # Each turn, the word works TELEPORT_CHANCE of the time, landing on the exit half of that.
+        first_turn = (steps == 1).mean()
+        self.assertAlmostEqual(first_turn, TELEPORT_CHANCE / 2, delta = 0.01)
+
+    def test_walk(self):
+        """Test players who never say the magic word. (None)"""
+        steps = self.simulate(1000, 0.0)
+        self.assertEqual(steps.tolist(), [1] * 1000)
+        self.assertEqual(maze_sim.histogram(steps), [(1, 1, 1000)])
+        self.assertEqual(maze_sim.summarize(steps)['escaped'], 1000)
+
+if __name__ == '__main__':
+    unittest.main()
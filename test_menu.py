@@ -0,0 +1,428 @@
+"""
+test_menu.py
+
+Tests of the Menu class and the menus built on it.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+BatchTest: Tests of processing streams of choices without the menu. (unittest.TestCase)
+ChoiceTest: Tests of abbreviating and misspelling menu choices. (unittest.TestCase)
+EngineTest: Tests of driving a menu one choice at a time. (unittest.TestCase)
+FruitMenu: A menu of choices with shared prefixes. (Menu)
+NumberMenuTest: Tests of the number menu. (unittest.TestCase)
+PageTest: Tests of showing long menus a page at a time. (unittest.TestCase)
+StackTest: Tests of running nested menus with a MenuStack. (unittest.TestCase)
+SubmenuTest: Tests of loading and running submenus. (unittest.TestCase)
+ThreadTest: Tests of menu sessions running in many threads at once. (unittest.TestCase)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+from menu import ChoiceTrie, Menu, MenuStack
+from menu_test import DeepMenu, NumberMenu, TopMenu, make_menu_class
+
+class EngineTest(unittest.TestCase):
+    """
+    Tests of driving a menu one choice at a time. (unittest.TestCase)
+
+    Attributes:
+    menu: A number menu with two jumps of input. (NumberMenu)
+
+    Methods:
+    setUp: Make the menu. (None)
+    test_capture: Test collecting the output of choices. (None)
+    test_finish: Test the result of finishing the menu. (None)
+    test_start: Test the result of starting the menu. (None)
+    test_status: Test that each result only has its own choice's status. (None)
+    test_stop: Test the stop flags of choices. (None)
+    """
+
+    def setUp(self):
+        """Make the menu. (None)"""
+        self.menu = NumberMenu(io.StringIO('3\n20\n'), io.StringIO())
+
+    def test_capture(self):
+        """Test collecting the output of choices. (None)"""
+        self.menu.start()
+        self.assertEqual(self.menu.choose('5').output, 'How many steps? ')
+        self.assertEqual(self.menu.stdout.getvalue(), '')
+        self.assertIsNone(self.menu.choose('5', capture = False).output)
+        self.assertEqual(self.menu.stdout.getvalue(), 'How many steps? ')
+
+    def test_finish(self):
+        """Test the result of finishing the menu. (None)"""
+        self.menu.start()
+        self.menu.choose('1')
+        result = self.menu.finish()
+        self.assertTrue(result.stop)
+        self.assertEqual(result.output, 'The final number is 1.\nHave a nice day.\n')
+        self.assertEqual(self.menu.stdout.getvalue(), '')
+
+    def test_start(self):
+        """Test the result of starting the menu. (None)"""
+        self.assertEqual(tuple(self.menu.start()), (False, 'The number is now 1.', ''))
+        self.assertEqual(list(self.menu.numbers), [0, 1])
+
+    def test_status(self):
+        """Test that each result only has its own choice's status. (None)"""
+        menu = FruitMenu(io.StringIO(), io.StringIO())
+        menu.start()
+        self.assertTrue(menu.choose('zzz').status)
+        self.assertEqual(menu.choose('apple').status, '')
+
+    def test_stop(self):
+        """Test the stop flags of choices. (None)"""
+        self.menu.start()
+        self.assertFalse(self.menu.choose('5').stop)
+        # Going over 99 ends the game.
+        self.assertTrue(self.menu.choose('5').stop)
+        self.assertTrue(self.menu.choose('4').stop)
+
+class FruitMenu(Menu):
+    """
+    A menu of choices with shared prefixes. (Menu)
+
+    Attributes:
+    eaten: The fruit chosen so far. (list of str)
+
+    Methods:
+    menu_apple: apple: Eat an apple. (bool)
+    menu_apricot: apricot: Eat an apricot. (bool)
+    menu_banana: banana: Eat a banana. (bool)
+    menu_salad: salad: Eat one of each fruit. (bool)
+
+    Overridden Methods:
+    preloop
+    """
+
+    def menu_apple(self):
+        """apple: Eat an apple."""
+        self.eaten.append('apple')
+
+    def menu_apricot(self):
+        """apricot: Eat an apricot."""
+        self.eaten.append('apricot')
+
+    def menu_banana(self):
+        """banana: Eat a banana."""
+        self.eaten.append('banana')
+
+    def menu_salad(self):
+        """salad: Eat one of each fruit."""
+        self.choice_queue.extend(['apple', 'apricot', 'banana'])
+
+    def preloop(self):
+        """Processing done before starting the choice/action loop. (None)"""
+        self.eaten = []
+
+class BatchTest(unittest.TestCase):
+    """
+    Tests of processing streams of choices without the menu. (unittest.TestCase)
+
+    Methods:
+    test_lazy: Test that choices after the one that stops aren't read. (None)
+    test_queued: Test that queued choices are processed but not counted. (None)
+    test_verbose: Test that the status is only shown when asked for. (None)
+    """
+
+    def test_lazy(self):
+        """Test that choices after the one that stops aren't read. (None)"""
+        menu = NumberMenu(io.StringIO(), io.StringIO())
+        choices = iter(['1\n', '1\n', '4\n', '1\n', '1\n'])
+        self.assertEqual(menu.batchloop(choices), 3)
+        self.assertEqual(list(choices), ['1\n', '1\n'])
+        self.assertEqual(list(menu.numbers), [0, 1, 1, 2])
+        self.assertNotIn(menu.prompt, menu.stdout.getvalue())
+
+    def test_queued(self):
+        """Test that queued choices are processed but not counted. (None)"""
+        menu = FruitMenu(io.StringIO(), io.StringIO())
+        self.assertEqual(menu.batchloop(io.StringIO('salad\nb\n')), 2)
+        self.assertEqual(menu.eaten, ['apple', 'apricot', 'banana', 'banana'])
+
+    def test_verbose(self):
+        """Test that the status is only shown when asked for. (None)"""
+        for verbose in (False, True):
+            menu = FruitMenu(io.StringIO(), io.StringIO())
+            menu.batchloop(['ap', 'apple'], verbose = verbose)
+            self.assertEqual('Status: The choice' in menu.stdout.getvalue(), verbose)
+            self.assertEqual(menu.eaten, ['apple'])
+
+class ChoiceTest(unittest.TestCase):
+    """
+    Tests of abbreviating and misspelling menu choices. (unittest.TestCase)
+
+    Attributes:
+    menu: A started menu of fruit. (FruitMenu)
+    trie: A tree of four choices, two pairs sharing prefixes. (ChoiceTrie)
+
+    Methods:
+    setUp: Make the menu and the tree. (None)
+    test_abbreviation: Test choices made by unique abbreviations. (None)
+    test_ambiguous: Test abbreviations matching more than one choice. (None)
+    test_complete: Test finding the choices starting with a prefix. (None)
+    test_suggest: Test finding the choices closest to some text. (None)
+    test_unrecognized: Test suggestions for misspelled choices. (None)
+    """
+
+    def setUp(self):
+        """Make the menu and the tree. (None)"""
+        self.menu = FruitMenu(io.StringIO(), io.StringIO())
+        self.menu.start()
+        self.trie = ChoiceTrie(['apple', 'apricot', 'banana', 'band'])
+
+    def test_abbreviation(self):
+        """Test choices made by unique abbreviations. (None)"""
+        for choice in ('b', 'APR', 'apple'):
+            self.menu.choose(choice)
+        self.assertEqual(self.menu.eaten, ['banana', 'apricot', 'apple'])
+
+    def test_ambiguous(self):
+        """Test abbreviations matching more than one choice. (None)"""
+        self.menu.choose('ap')
+        self.assertEqual(self.menu.status, "The choice 'ap' could be any of apple, apricot. Please make another choice.")
+        self.assertEqual(self.menu.eaten, [])
+
+    def test_complete(self):
+        """Test finding the choices starting with a prefix. (None)"""
+        self.assertEqual(self.trie.complete('a'), (2, ['apple', 'apricot']))
+        self.assertEqual(self.trie.complete('ban', 1), (2, ['banana']))
+        self.assertEqual(self.trie.complete(''), (4, ['apple', 'apricot', 'banana', 'band']))
+        self.assertEqual(self.trie.complete('x'), (0, []))
+
+    def test_suggest(self):
+        """Test finding the choices closest to some text. (None)"""
+        self.assertEqual(self.trie.suggest('bend'), ['band'])
+        self.assertEqual(self.trie.suggest('banan'), ['banana', 'band'])
+        self.assertEqual(self.trie.suggest('banan', limit = 1), ['banana'])
+        self.assertEqual(self.trie.suggest('qqqq'), [])
+
+    def test_unrecognized(self):
+        """Test suggestions for misspelled choices. (None)"""
+        self.menu.choose('bananna')
+        self.assertTrue(self.menu.status.endswith('Did you mean banana?'))
+        self.menu.choose('zzz')
+        self.assertEqual(self.menu.status, "I do not recognize the choice 'zzz'. Please make another choice.")
+        self.assertEqual(self.menu.eaten, [])
+
+class NumberMenuTest(unittest.TestCase):
+    """
+    Tests of the number menu. (unittest.TestCase)
+
+    Methods:
+    slowest: Run the slowest start choice with a limit. (str)
+    test_jump_steps: Test that bad jump steps set the status instead of failing. (None)
+    test_slowest: Test finding the slowest start. (None)
+    test_slowest_limits: Test that bad limits set the status instead of failing. (None)
+    """
+
+    def slowest(self, limit):
+        """
+        Run the slowest start choice with a limit. (str)
+
+        The return value is the status after the choice.
+
+        Parameters:
+        limit: The limit to enter. (str)
+        """
+        menu = NumberMenu(io.StringIO('{}\n'.format(limit)), io.StringIO())
+        menu.start()
+        return menu.choose('7').status
+
+    def test_jump_steps(self):
+        """Test that bad jump steps set the status instead of failing. (None)"""
+        menu = NumberMenu(io.StringIO('\u00b2\n{}\n'.format(10 ** 12)), io.StringIO())
+        menu.start()
+        self.assertEqual(menu.choose('5').status, 'The number of steps must be a whole number.')
+        self.assertEqual(menu.choose('5').status, 'The number of steps can be at most 1,000,000.')
+        self.assertEqual(list(menu.numbers), [0, 1])
+
+    def test_slowest(self):
+        """Test finding the slowest start. (None)"""
+        self.assertEqual(self.slowest('10'), 'The slowest start up to 10 is 9, taking 19 steps.')
+
+    def test_slowest_limits(self):
+        """Test that bad limits set the status instead of failing. (None)"""
+        self.assertEqual(self.slowest(str(10 ** 12)), 'The limit can be at most 10,000,000.')
+        for limit in ('0', '-3', 'ten', '\u00b2'):
+            self.assertEqual(self.slowest(limit), 'The limit must be a positive whole number.')
+        with mock.patch('menu_test.collatz_slowest', side_effect = MemoryError):
+            self.assertEqual(self.slowest('1000'), 'There is not enough memory to check up to 1000.')
+
+class PageTest(unittest.TestCase):
+    """
+    Tests of showing long menus a page at a time. (unittest.TestCase)
+
+    Attributes:
+    menu: A menu of 100 choices, with output to a file. (Menu)
+
+    Methods:
+    setUp: Make the menu. (None)
+    test_not_terminal: Test that menus not shown on a terminal are shown whole. (None)
+    test_own_pages: Test that each menu keeps its own pages. (None)
+    test_page_size: Test pages sized by page_size. (None)
+    test_screen_size: Test pages sized to a screen passed in. (None)
+    test_size_change: Test that the kept pages are cleared when the size changes. (None)
+    test_terminal: Test pages sized to the terminal. (None)
+    """
+
+    def setUp(self):
+        """Make the menu. (None)"""
+        self.menu = make_menu_class(100)(io.StringIO(), io.StringIO())
+
+    def test_not_terminal(self):
+        """Test that menus not shown on a terminal are shown whole. (None)"""
+        with mock.patch('shutil.get_terminal_size', side_effect = AssertionError('terminal size checked')):
+            self.assertEqual(self.menu.window(), self.menu.text)
+        self.assertEqual(self.menu.page_count, 1)
+        self.assertEqual(self.menu.pages, {})
+
+    def test_own_pages(self):
+        """Test that each menu keeps its own pages. (None)"""
+        other = type(self.menu)(io.StringIO(), io.StringIO())
+        self.menu.window((80, 17))
+        self.assertEqual(list(self.menu.pages), [0])
+        self.assertEqual(other.pages, {})
+
+    def test_page_size(self):
+        """Test pages sized by page_size. (None)"""
+        self.menu.page_size = 30
+        self.assertIn('Page 1 of 4.', self.menu.window())
+        self.menu.choose('#4')
+        text = self.menu.window()
+        self.assertIn('\n99: Item number 99.\n', text)
+        self.assertIn('Page 4 of 4.', text)
+
+    def test_screen_size(self):
+        """Test pages sized to a screen passed in. (None)"""
+        text = self.menu.render((12, 17))
+        self.assertEqual(self.menu.page_count, 10)
+        self.assertEqual(text.split('\n')[1:3], ['0: Item numb', '1: Item numb'])
+        self.menu.choose('/number 42')
+        self.assertIn('\n42: Item num', self.menu.window((12, 17)))
+
+    def test_size_change(self):
+        """Test that the kept pages are cleared when the size changes. (None)"""
+        for page in range(3):
+            self.menu.page = page
+            self.menu.window((80, 17))
+        self.assertEqual(sorted(self.menu.pages), [0, 1, 2])
+        self.assertIn('Page 3 of 5.', self.menu.window((80, 27)))
+        self.assertEqual(list(self.menu.pages), [2])
+        self.assertEqual(self.menu.page_shape, (20, 80))
+
+    def test_terminal(self):
+        """Test pages sized to the terminal. (None)"""
+        size = os.terminal_size((80, 27))
+        with mock.patch('menu.is_terminal', return_value = True), mock.patch('shutil.get_terminal_size', return_value = size):
+            self.assertIn('Page 1 of 5.', self.menu.window())
+
+class StackTest(unittest.TestCase):
+    """
+    Tests of running nested menus with a MenuStack. (unittest.TestCase)
+
+    Methods:
+    run_stack: Run a menu in a stack on a script. (str)
+    test_back: Test going back one menu. (None)
+    test_choice_eof: Test the input running out during a choice. (None)
+    test_top: Test going back to the first menu. (None)
+    """
+
+    def run_stack(self, menu, script):
+        """
+        Run a menu in a stack on a script. (str)
+
+        The return value is the stack's output.
+
+        Parameters:
+        menu: The first menu. (Menu)
+        script: The input for the stack. (str)
+        """
+        stack = MenuStack(io.StringIO(script), io.StringIO())
+        stack.run(menu)
+        self.assertEqual(stack.menus, [])
+        return stack.stdout.getvalue()
+
+    def test_back(self):
+        """Test going back one menu. (None)"""
+        menu = TopMenu()
+        output = self.run_stack(menu, 'back\nb\n1\nback\ne\n')
+        self.assertIn('Status: You are already at the top menu.', output)
+        self.assertIn('The final number is 1.', output)
+        self.assertEqual(menu.lastchoice, 'e')
+
+    def test_choice_eof(self):
+        """Test the input running out during a choice. (None)"""
+        output = self.run_stack(TopMenu(), 'b\n5\n')
+        self.assertIn('How many steps? \nThe input ran out partway through that choice.', output)
+        self.assertTrue(output.endswith('Have a nice day.\n'))
+
+    def test_top(self):
+        """Test going back to the first menu. (None)"""
+        menu = DeepMenu()
+        self.run_stack(menu, '1\n1\n1\ntop\n2\n')
+        self.assertEqual(menu.lastchoice, '2')
+
+class SubmenuTest(unittest.TestCase):
+    """
+    Tests of loading and running submenus. (unittest.TestCase)
+
+    Methods:
+    test_cmd_injected: Test a cmd.Cmd submenu reading the parent's file. (None)
+    test_cmd_stdin: Test a cmd.Cmd submenu on standard input using input(). (None)
+    """
+
+    def test_cmd_injected(self):
+        """Test a cmd.Cmd submenu reading the parent's file. (None)"""
+        menu = TopMenu(io.StringIO('a\nquit\ne\n'), io.StringIO())
+        menu.menuloop()
+        self.assertFalse(menu.submenus['menu_maze'].use_rawinput)
+        self.assertIn('In the maze: ', menu.stdout.getvalue())
+
+    def test_cmd_stdin(self):
+        """Test a cmd.Cmd submenu on standard input using input(). (None)"""
+        with mock.patch('sys.stdin', io.StringIO('a\nquit\ne\n')), mock.patch('sys.stdout', io.StringIO()):
+            menu = TopMenu()
+            menu.menuloop()
+            output = sys.stdout.getvalue()
+        self.assertTrue(menu.submenus['menu_maze'].use_rawinput)
+        self.assertIn('In the maze: ', output)
+
+class ThreadTest(unittest.TestCase):
+    """
+    Tests of menu sessions running in many threads at once. (unittest.TestCase)
+
+    Methods:
+    run_script: Run a NumberMenu session on a script. (str)
+    test_no_crossed_output: Test that threaded sessions keep their own output. (None)
+    """
+
+    def run_script(self, script):
+        """
+        Run a NumberMenu session on a script. (str)
+
+        Parameters:
+        script: The input for the session. (str)
+        """
+        menu = NumberMenu(io.StringIO(script), io.StringIO())
+        menu.menuloop()
+        return menu.stdout.getvalue()
+
+    def test_no_crossed_output(self):
+        """Test that threaded sessions keep their own output. (None)"""
+        # Give each session a script of its own, with an unrecognized choice naming it.
+        scripts = ['1\n3\n{}\n'.format(session) + '3\n' * (session % 17) + '4\n' for session in range(300)]
+        with ThreadPoolExecutor(60) as pool:
+            outputs = list(pool.map(self.run_script, scripts))
+        # Check the threaded output against the output of each script on its own.
+        for script, output in zip(scripts, outputs):
+            self.assertEqual(output, self.run_script(script))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+test_menu_server.py
+
+Tests of serving menus over asyncio connections.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+ServeTest: Tests of menu sessions served over a Unix socket. (unittest.TestCase)
+SlowMenu: A number menu with a slow choice. (NumberMenu)
+"""
+
+import asyncio
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+import menu_server
+from menu_stats import STATS
+from menu_test import NumberMenu, TopMenu
+
+class SlowMenu(NumberMenu):
+    """
+    A number menu with a slow choice. (NumberMenu)
+
+    Methods:
+    menu_wait: 8: Wait half a second. (bool)
+    """
+
+    def menu_wait(self):
+        """8: Wait half a second."""
+        time.sleep(0.5)
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not available')
+class ServeTest(unittest.TestCase):
+    """
+    Tests of menu sessions served over a Unix socket. (unittest.TestCase)
+
+    Attributes:
+    folder: The temporary directory for the socket. (tempfile.TemporaryDirectory)
+    path: The path of the server's socket. (str)
+
+    Methods:
+    setUp: Make a temporary socket path. (None)
+    tearDown: Remove the socket. (None)
+    serve: Serve a menu class and run client sessions against it. (list of tuple)
+    session: Send lines to the server and get everything it sends back. (tuple)
+    test_empty_load_test: Test a load test with no sessions. (None)
+    test_more_input: Test a choice reading more input from the client. (None)
+    test_no_stats_commands: Test that clients can't use the '!' commands. (None)
+    test_session: Test a simple session. (None)
+    test_slow_choice: Test that a slow choice doesn't hold up other sessions. (None)
+    test_submenus: Test running submenus over the connection. (None)
+    """
+
+    def setUp(self):
+        """Make a temporary socket path. (None)"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'menu.sock')
+
+    def tearDown(self):
+        """Remove the socket. (None)"""
+        self.folder.cleanup()
+
+    def serve(self, menu_class, *scripts):
+        """
+        Serve a menu class and run client sessions against it. (list of tuple)
+
+        The return value is the text each session got back, and the seconds
+        the session took.
+
+        Parameters:
+        menu_class: The menu to serve. (type)
+        *scripts: The lines each client sends. (list of str)
+        """
+        async def run():
+            server = asyncio.ensure_future(menu_server.serve(menu_class, path = self.path))
+            while not os.path.exists(self.path):
+                await asyncio.sleep(0.01)
+            try:
+                return await asyncio.wait_for(asyncio.gather(*[self.session(lines) for lines in scripts]), 30)
+            finally:
+                server.cancel()
+        return asyncio.run(run())
+
+    async def session(self, lines):
+        """
+        Send lines to the server and get everything it sends back. (tuple)
+
+        The return value is the text and the seconds the session took. The
+        connection is closed for writing after the lines are sent.
+
+        Parameters:
+        lines: The lines to send. (list of str)
+        """
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        writer.write(''.join(line + '\n' for line in lines).encode())
+        # Choices wanting more input than was sent get the end of the input.
+        writer.write_eof()
+        text = await reader.read()
+        writer.close()
+        return text.decode(), time.perf_counter() - start
+
+    def test_empty_load_test(self):
+        """Test a load test with no sessions. (None)"""
+        stats = asyncio.run(menu_server.load_test(['4'], 0, 1, NumberMenu.prompt, path = self.path))
+        self.assertEqual(stats['sessions'], 0)
+
+    def test_more_input(self):
+        """Test a choice reading more input from the client. (None)"""
+        (text, seconds), = self.serve(NumberMenu, ['5', '3', '7', '10', '4'])
+        self.assertIn('How many steps? ', text)
+        self.assertIn('Status: The number is now 3.', text)
+        self.assertIn('Status: The slowest start up to 10 is 9, taking 19 steps.', text)
+
+    def test_no_stats_commands(self):
+        """Test that clients can't use the '!' commands. (None)"""
+        export_path = os.path.join(self.folder.name, 'stats.json')
+        (text, seconds), = self.serve(NumberMenu, ['!stats on', '!stats export {}'.format(export_path), '4'])
+        self.assertFalse(STATS.timing)
+        self.assertFalse(os.path.exists(export_path))
+        self.assertIn("I do not recognize the choice '!stats on'.", text)
+
+    def test_session(self):
+        """Test a simple session. (None)"""
+        (text, seconds), = self.serve(NumberMenu, ['1', '1', '4'])
+        self.assertIn('Status: The number is now 2.', text)
+        self.assertTrue(text.endswith('Have a nice day.\n'))
+
+    def test_slow_choice(self):
+        """Test that a slow choice doesn't hold up other sessions. (None)"""
+        (slow_text, slow_seconds), (fast_text, fast_seconds) = self.serve(SlowMenu, ['8', '4'], ['1', '4'])
+        self.assertGreaterEqual(slow_seconds, 0.5)
+        self.assertLess(fast_seconds, 0.4)
+
+    def test_submenus(self):
+        """Test running submenus over the connection. (None)"""
+        (text, seconds), = self.serve(TopMenu, ['b', '1', '4', 'a', 'quit', 'c', 'rock', 'scissors', 'paper', 'e'])
+        self.assertIn('Status: The number is now 1.', text)
+        self.assertIn('In the maze: ', text)
+        self.assertIn('Rock, paper, or scissors? ', text)
+
+if __name__ == '__main__':
+    unittest.main()
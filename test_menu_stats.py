@@ -0,0 +1,77 @@
+"""
+test_menu_stats.py
+
+Tests of timing and profiling menu choices.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+CommandTest: Tests of the '!' commands. (unittest.TestCase)
+"""
+
+import io
+import os
+import tempfile
+import unittest
+
+from menu_stats import STATS
+from menu_test import NumberMenu
+
+class CommandTest(unittest.TestCase):
+    """
+    Tests of the '!' commands. (unittest.TestCase)
+
+    Attributes:
+    menu: The menu the commands are typed in. (NumberMenu)
+
+    Methods:
+    setUp: Make the menu. (None)
+    tearDown: Turn timing back off. (None)
+    test_disabled: Test that menus can refuse the commands. (None)
+    test_export: Test saving the timing to a file. (None)
+    test_export_error: Test that a bad export path is reported in the status. (None)
+    test_timing: Test turning timing on and off. (None)
+    """
+
+    def setUp(self):
+        """Make the menu. (None)"""
+        self.menu = NumberMenu(io.StringIO(), io.StringIO())
+        self.menu.start()
+
+    def tearDown(self):
+        """Turn timing back off. (None)"""
+        STATS.set_timing(False)
+
+    def test_disabled(self):
+        """Test that menus can refuse the commands. (None)"""
+        self.menu.stats_commands = False
+        status = self.menu.choose('!stats on').status
+        self.assertFalse(STATS.timing)
+        self.assertTrue(status.startswith("I do not recognize the choice '!stats on'."))
+
+    def test_export(self):
+        """Test saving the timing to a file. (None)"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'stats.json')
+            self.assertEqual(self.menu.choose('!stats export {}'.format(path)).status,
+                'Choice timing saved to {}.'.format(path))
+            self.assertTrue(os.path.exists(path))
+
+    def test_export_error(self):
+        """Test that a bad export path is reported in the status. (None)"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'missing', 'stats.json')
+            result = self.menu.choose('!stats export {}'.format(path))
+        self.assertFalse(result.stop)
+        self.assertTrue(result.status.startswith('Choice timing could not be saved to {}: '.format(path)))
+
+    def test_timing(self):
+        """Test turning timing on and off. (None)"""
+        self.assertEqual(self.menu.choose('!stats on').status, 'Choice timing is on.')
+        self.menu.choose('1')
+        self.assertGreaterEqual(STATS.histograms['NumberMenu']['menu_fibonacci'].count, 1)
+        self.assertEqual(self.menu.choose('!stats off').status, 'Choice timing is off.')
+        self.assertFalse(STATS.timing)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+test_number_game.py
+
+Tests of exploring the number game.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+NumberGameTest: Tests of searching the states of the number game. (unittest.TestCase)
+SmallChunkGame: A number game that splits small levels between workers. (NumberGame)
+"""
+
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import menu_class
+from menu_test import NumberMenu
+from number_game import LETTER_CHOICES, NumberGame
+
+class SmallChunkGame(NumberGame):
+    """
+    A number game that splits small levels between workers. (NumberGame)
+
+    Class Attributes:
+    chunk_size: The number of states given to a worker at once. (int)
+    """
+
+    chunk_size = 20
+
+class NumberGameTest(unittest.TestCase):
+    """
+    Tests of searching the states of the number game. (unittest.TestCase)
+
+    Attributes:
+    game: The game played by the menus. (NumberGame)
+
+    Methods:
+    setUp: Explore the game. (None)
+    test_cycle: Test finding a loop of moves. (None)
+    test_letter_script: Test playing a path in the letter menu. (None)
+    test_longest: Test finding the longest path when there are no loops. (None)
+    test_reachable: Test the numbers that can be appended. (None)
+    test_shortest: Test playing the shortest path in the number menu. (None)
+    test_workers: Test that exploring with workers finds the same graph. (None)
+    """
+
+    def setUp(self):
+        """Explore the game. (None)"""
+        self.game = NumberGame(99)
+
+    def test_cycle(self):
+        """Test finding a loop of moves. (None)"""
+        # Collatz steps from 2 back down to 1, and the next prime is 2 again.
+        self.assertEqual(self.game.cycle(), (('collatz', 'prime'), (1, 2)))
+        self.assertIsNone(self.game.longest())
+
+    def test_letter_script(self):
+        """Test playing a path in the letter menu. (None)"""
+        path = self.game.shortest(89)
+        menu = menu_class.Menu()
+        with mock.patch('builtins.input', side_effect = self.game.script(path, LETTER_CHOICES) + ['E']):
+            with contextlib.redirect_stdout(io.StringIO()):
+                menu.menu_loop()
+        self.assertEqual(list(menu.numbers)[2:], list(path.numbers))
+
+    def test_longest(self):
+        """Test finding the longest path when there are no loops. (None)"""
+        game = NumberGame(99, start = (90, 95))
+        self.assertEqual(len(game), 7)
+        self.assertIsNone(game.cycle())
+        self.assertEqual(game.longest(), (('prime', 'fibonacci'), (97, 192)))
+        self.assertEqual(game.shortest(), (('fibonacci',), (185,)))
+        self.assertIsNone(game.shortest(96))
+
+    def test_reachable(self):
+        """Test the numbers that can be appended. (None)"""
+        values = self.game.reachable_values()
+        self.assertEqual(set(range(100)) - values, {0, 62, 74})
+        self.assertIsNone(self.game.shortest(62))
+
+    def test_shortest(self):
+        """Test playing the shortest path in the number menu. (None)"""
+        path = self.game.shortest(89)
+        self.assertEqual(len(path.moves), 7)
+        menu = NumberMenu(io.StringIO(), io.StringIO())
+        menu.batchloop(self.game.script(path))
+        self.assertEqual(list(menu.numbers)[2:], list(path.numbers))
+
+    def test_workers(self):
+        """Test that exploring with workers finds the same graph. (None)"""
+        game = SmallChunkGame(99, workers = 2)
+        self.assertEqual(game.keys, self.game.keys)
+        self.assertEqual(game.successors, self.game.successors)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+test_primes.py
+
+Tests of the prime numbers for the number menus.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+NextPrimeTest: Tests of finding the next prime. (unittest.TestCase)
+"""
+
+import unittest
+
+from primes import PrimeSieve, is_prime, miller_rabin, next_prime
+
+class NextPrimeTest(unittest.TestCase):
+    """
+    Tests of finding the next prime. (unittest.TestCase)
+
+    Methods:
+    slow_prime: Check if a number is prime by trial division. (bool)
+    test_large: Test next primes past the sieve. (None)
+    test_pseudoprimes: Test that composites fooling weaker tests are caught. (None)
+    test_sieve_growth: Test a sieve grown a small segment at a time. (None)
+    test_small: Test next primes against trial division. (None)
+    """
+
+    def test_large(self):
+        """Test next primes past the sieve. (None)"""
+        self.assertEqual(next_prime(10 ** 12), 10 ** 12 + 39)
+        self.assertEqual(next_prime(2 ** 89 - 3), 2 ** 89 - 1)
+        self.assertEqual(next_prime(10 ** 24), 10 ** 24 + 7)
+
+    def test_pseudoprimes(self):
+        """Test that composites fooling weaker tests are caught. (None)"""
+        # A Carmichael number, and a strong pseudoprime to every prime base up to 23.
+        for number in (561, 3825123056546413051):
+            self.assertFalse(miller_rabin(number))
+            self.assertFalse(is_prime(number))
+
+    def test_sieve_growth(self):
+        """Test a sieve grown a small segment at a time. (None)"""
+        sieve = PrimeSieve(segment = 16)
+        self.assertEqual(sieve.next_prime(1000), 1009)
+        self.assertEqual(list(sieve.primes), [number for number in range(sieve.limit + 1) if self.slow_prime(number)])
+
+    def test_small(self):
+        """Test next primes against trial division. (None)"""
+        for number in range(-5, 2000):
+            expected = number + 1
+            while not self.slow_prime(expected):
+                expected += 1
+            self.assertEqual(next_prime(number), expected)
+
+    @staticmethod
+    def slow_prime(number):
+        """
+        Check if a number is prime by trial division. (bool)
+
+        Parameters:
+        number: The number to check. (int)
+        """
+        return number > 1 and all(number % factor for factor in range(2, int(number ** 0.5) + 1))
+
+if __name__ == '__main__':
+    unittest.main()
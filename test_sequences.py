@@ -0,0 +1,168 @@
+"""
+test_sequences.py
+
+Tests of the integer sequence engines.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+CollatzTest: Tests of the Collatz engines. (unittest.TestCase)
+JumpTest: Tests of jumping a sequence ahead by typed in steps. (unittest.TestCase)
+NumberSequenceTest: Tests of storing sequences in chunks that can spill to a file. (unittest.TestCase)
+NumberTextTest: Tests of describing numbers too big to print. (unittest.TestCase)
+"""
+
+import tempfile
+import unittest
+
+from sequences import COLLATZ, NumberSequence, collatz_slowest, collatz_stopping_times, fibonacci_extend, number_text
+
+class CollatzTest(unittest.TestCase):
+    """
+    Tests of the Collatz engines. (unittest.TestCase)
+
+    Methods:
+    test_below_one: Test that ranges starting below 1 are refused. (None)
+    test_slowest: Test finding the slowest start in a range. (None)
+    test_stopping_times: Test range stopping times against the cache. (None)
+    """
+
+    def test_below_one(self):
+        """Test that ranges starting below 1 are refused. (None)"""
+        for start in (0, -5):
+            with self.assertRaises(ValueError):
+                collatz_stopping_times(start, 10)
+
+    def test_slowest(self):
+        """Test finding the slowest start in a range. (None)"""
+        self.assertEqual(collatz_slowest(10), (9, 19))
+
+    def test_stopping_times(self):
+        """Test range stopping times against the cache. (None)"""
+        times = collatz_stopping_times(1, 1000)
+        self.assertEqual([int(steps) for steps in times], [COLLATZ.stopping_time(number) for number in range(1, 1000)])
+
+class JumpTest(unittest.TestCase):
+    """
+    Tests of jumping a sequence ahead by typed in steps. (unittest.TestCase)
+
+    Methods:
+    test_bad_steps: Test that steps that aren't whole numbers are refused. (None)
+    test_jump: Test the numbers appended by jumps. (None)
+    test_limit: Test that too many steps are refused. (None)
+    """
+
+    def test_bad_steps(self):
+        """Test that steps that aren't whole numbers are refused. (None)"""
+        for text in ('', 'five', '\u00b2', '-1', '2.5'):
+            numbers = [1, 1]
+            with self.assertRaisesRegex(ValueError, 'must be a whole number'):
+                fibonacci_extend(numbers, text)
+            self.assertEqual(numbers, [1, 1])
+
+    def test_jump(self):
+        """Test the numbers appended by jumps. (None)"""
+        for text, expected in (('0', [1, 1]), ('1', [1, 1, 2]), ('5', [1, 1, 8, 13])):
+            numbers = [1, 1]
+            fibonacci_extend(numbers, text)
+            self.assertEqual(numbers, expected)
+
+    def test_limit(self):
+        """Test that too many steps are refused. (None)"""
+        numbers = [1, 1]
+        with self.assertRaisesRegex(ValueError, 'at most 10'):
+            fibonacci_extend(numbers, '11', limit = 10)
+        with self.assertRaisesRegex(ValueError, 'at most 1,000,000'):
+            fibonacci_extend(numbers, str(10 ** 12))
+        fibonacci_extend(numbers, '10', limit = 10)
+        self.assertEqual(numbers, [1, 1, 89, 144])
+
+class NumberSequenceTest(unittest.TestCase):
+    """
+    Tests of storing sequences in chunks that can spill to a file. (unittest.TestCase)
+
+    Attributes:
+    numbers: Fifty numbers, one too big for a 64 bit integer. (list of int)
+
+    Methods:
+    check: Check that a sequence holds the numbers. (None)
+    setUp: Make the numbers. (None)
+    test_no_spill: Test that nothing is spilled without max_resident. (None)
+    test_spill: Test reading numbers back from spilled chunks. (None)
+    test_spill_file: Test spilling to a file passed in. (None)
+    """
+
+    def check(self, sequence):
+        """
+        Check that a sequence holds the numbers. (None)
+
+        Parameters:
+        sequence: The sequence to check. (NumberSequence)
+        """
+        self.assertEqual(len(sequence), len(self.numbers))
+        self.assertEqual(list(sequence), self.numbers)
+        # Read out of order, to move between spilled chunks.
+        for index in list(range(len(self.numbers))) + list(range(-1, -len(self.numbers) - 1, -7)):
+            self.assertEqual(sequence[index], self.numbers[index])
+        for index in (len(self.numbers), -len(self.numbers) - 1):
+            with self.assertRaises(IndexError):
+                sequence[index]
+
+    def setUp(self):
+        """Make the numbers. (None)"""
+        self.numbers = list(range(50))
+        self.numbers[5] = 2 ** 70
+
+    def test_no_spill(self):
+        """Test that nothing is spilled without max_resident. (None)"""
+        sequence = NumberSequence(self.numbers, chunk_size = 4, max_resident = None)
+        self.check(sequence)
+        self.assertIsNone(sequence.spill_file)
+        self.assertFalse(any(isinstance(chunk, tuple) for chunk in sequence.chunks))
+
+    def test_spill(self):
+        """Test reading numbers back from spilled chunks. (None)"""
+        sequence = NumberSequence(self.numbers, chunk_size = 4, max_resident = 2)
+        self.addCleanup(sequence.close)
+        self.check(sequence)
+        # All but the last two full chunks and the partial one are spilled.
+        self.assertEqual(sequence.resident, 10)
+        self.assertEqual([chunk[2] for chunk in sequence.chunks[:10]], ['q'] + ['big'] + ['q'] * 8)
+        # Numbers added later go on the end as usual.
+        sequence.append(-1)
+        self.numbers.append(-1)
+        self.check(sequence)
+
+    def test_spill_file(self):
+        """Test spilling to a file passed in. (None)"""
+        spill_file = tempfile.TemporaryFile()
+        sequence = NumberSequence(self.numbers, chunk_size = 4, max_resident = 2, spill_file = spill_file)
+        self.check(sequence)
+        self.assertGreater(spill_file.tell(), 0)
+        sequence.close()
+        self.assertTrue(spill_file.closed)
+
+class NumberTextTest(unittest.TestCase):
+    """
+    Tests of describing numbers too big to print. (unittest.TestCase)
+
+    Methods:
+    test_huge: Test that huge numbers are described without converting them. (None)
+    test_limit: Test that numbers up to max_digits long are shown in full. (None)
+    """
+
+    def test_huge(self):
+        """Test that huge numbers are described without converting them. (None)"""
+        self.assertEqual(number_text(10 ** 5000), 'a number about 5,001 digits long')
+
+    def test_limit(self):
+        """Test that numbers up to max_digits long are shown in full. (None)"""
+        for max_digits in (1, 2, 10, 60):
+            largest = 10 ** max_digits - 1
+            self.assertEqual(number_text(largest, max_digits), str(largest))
+            self.assertEqual(number_text(-largest, max_digits), str(-largest))
+            self.assertEqual(number_text(largest + 1, max_digits),
+                'a number about {:,} digits long'.format(max_digits + 1))
+
+if __name__ == '__main__':
+    unittest.main()
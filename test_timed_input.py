@@ -0,0 +1,247 @@
+"""
+test_timed_input.py
+
+Tests of input with timeouts and deadlines.
+
+Run with `python -m unittest` or `python -m pytest`.
+
+Classes:
+DeadlineTest: Tests of time limits for a series of reads. (unittest.TestCase)
+IdleMenu: A number menu that gives up on idle users. (NumberMenu)
+PipeTest: Tests of timed reads from a pipe. (unittest.TestCase)
+PtyTest: Tests of timed reads from a pseudo-terminal. (PipeTest)
+"""
+
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+import menu_args
+from menu_test import NumberMenu, TopMenu
+from timed_input import Deadline, InputTimeout, TimedReader, readline, timed_input
+
+try:
+    import pty
+    import tty
+except ImportError:
+    pty = None
+
+class DeadlineTest(unittest.TestCase):
+    """
+    Tests of time limits for a series of reads. (unittest.TestCase)
+
+    Methods:
+    test_expired: Test a deadline that has passed. (None)
+    test_remaining: Test the time left on a deadline. (None)
+    """
+
+    def test_expired(self):
+        """Test a deadline that has passed. (None)"""
+        deadline = Deadline(0)
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+
+    def test_remaining(self):
+        """Test the time left on a deadline. (None)"""
+        deadline = Deadline(60)
+        self.assertFalse(deadline.expired())
+        self.assertTrue(59 < deadline.remaining() <= 60)
+
+class IdleMenu(NumberMenu):
+    """
+    A number menu that gives up on idle users. (NumberMenu)
+
+    Class Attributes:
+    idle_timeout: The seconds to wait for input before giving up. (float)
+    """
+
+    # The seconds to wait for input before giving up.
+    idle_timeout = 0.05
+
+class PipeTest(unittest.TestCase):
+    """
+    Tests of timed reads from a pipe. (unittest.TestCase)
+
+    Attributes:
+    read_file: The file read in the tests. (file)
+    write_fd: The file descriptor written in the tests. (int)
+
+    Methods:
+    open: Open the files read and written in the tests. (tuple of file, int)
+    send: Write input to be read. (None)
+    setUp: Open the files. (None)
+    tearDown: Close the files and forget their readers. (None)
+    test_close: Test that closed readers are forgotten and replaced. (None)
+    test_function_menu: Test a function menu ending when the user is idle. (None)
+    test_idle_timeout: Test a menu loop ending when the user is idle. (None)
+    test_input_timeout: Test a timeout reaching a menu's input method. (None)
+    test_no_timeout: Test that reads without a timeout don't wrap the file. (None)
+    test_partial_line: Test that part of a line is kept across a timeout. (None)
+    test_pending_input: Test that untimed reads get input a timed read left. (None)
+    test_read_ahead: Test that timed reads get input the file read ahead. (None)
+    test_submenu: Test that cmd.Cmd submenus get input a timed read left. (None)
+    test_timeout: Test a read that runs out of time. (None)
+    """
+
+    def open(self):
+        """Open the files read and written in the tests. (tuple of file, int)"""
+        read_fd, write_fd = os.pipe()
+        return open(read_fd, 'r'), write_fd
+
+    def send(self, data):
+        """
+        Write input to be read. (None)
+
+        Parameters:
+        data: The input to write. (bytes)
+        """
+        os.write(self.write_fd, data)
+
+    def setUp(self):
+        """Open the files. (None)"""
+        self.read_file, self.write_fd = self.open()
+
+    def tearDown(self):
+        """Close the files and forget their readers. (None)"""
+        reader = TimedReader.find(self.read_file)
+        if reader is not None:
+            reader.close()
+        self.read_file.close()
+        os.close(self.write_fd)
+
+    def test_close(self):
+        """Test that closed readers are forgotten and replaced. (None)"""
+        reader = TimedReader.wrap(self.read_file)
+        self.assertIs(TimedReader.wrap(self.read_file), reader)
+        # Another file on the same descriptor replaces the reader.
+        other_file = open(self.read_file.fileno(), 'r', closefd = False)
+        other_reader = TimedReader.wrap(other_file)
+        self.assertIsNot(other_reader, reader)
+        self.assertIsNone(TimedReader.find(self.read_file))
+        other_reader.close()
+        self.assertIsNone(TimedReader.find(other_file))
+        other_file.close()
+
+    def test_function_menu(self):
+        """Test a function menu ending when the user is idle. (None)"""
+        with mock.patch('sys.stdin', self.read_file), mock.patch('sys.stdout', io.StringIO()):
+            menu_args.menu({'Add the last two numbers.': menu_args.fibonacci}, idle_timeout = 0.05)
+            output = sys.stdout.getvalue()
+        self.assertIn('Timed out waiting for a choice.\nHave a nice day.', output)
+
+    def test_idle_timeout(self):
+        """Test a menu loop ending when the user is idle. (None)"""
+        self.send(b'1\n')
+        menu = IdleMenu(self.read_file, io.StringIO())
+        menu.menuloop()
+        self.assertEqual(menu.lastchoice, '1')
+        self.assertIn('selection: \nTimed out waiting for input.\n', menu.stdout.getvalue())
+
+    def test_input_timeout(self):
+        """Test a timeout reaching a menu's input method. (None)"""
+        menu = NumberMenu(self.read_file, io.StringIO())
+        with self.assertRaises(InputTimeout):
+            menu.input('Quickly: ', 0.05)
+        self.assertEqual(menu.stdout.getvalue(), 'Quickly: ')
+        # The idle timeout is used when no timeout is given.
+        menu.idle_timeout = 0.05
+        with self.assertRaises(InputTimeout):
+            menu.input('Quickly: ')
+
+    def test_no_timeout(self):
+        """Test that reads without a timeout don't wrap the file. (None)"""
+        self.send(b'1\n4\n')
+        menu = NumberMenu(self.read_file, io.StringIO())
+        menu.menuloop()
+        self.assertIs(menu.stdin, self.read_file)
+        self.assertIsNone(TimedReader.find(self.read_file))
+
+    def test_partial_line(self):
+        """Test that part of a line is kept across a timeout. (None)"""
+        self.send(b'spam')
+        with self.assertRaises(InputTimeout):
+            readline(self.read_file, 0.05)
+        self.send(b' and eggs\n')
+        self.assertEqual(readline(self.read_file, 1), 'spam and eggs\n')
+
+    def test_pending_input(self):
+        """Test that untimed reads get input a timed read left. (None)"""
+        self.send(b'spam\neggs\n')
+        self.assertEqual(readline(self.read_file, 1), 'spam\n')
+        self.assertTrue(TimedReader.find(self.read_file).pending())
+        self.assertEqual(timed_input('', None, self.read_file, io.StringIO()), 'eggs')
+
+    def test_read_ahead(self):
+        """Test that timed reads get input the file read ahead. (None)"""
+        self.send(b'spam\neggs\nspam\n')
+        self.assertEqual(self.read_file.readline(), 'spam\n')
+        self.assertEqual(readline(self.read_file, 1), 'eggs\n')
+        self.assertEqual(readline(self.read_file), 'spam\n')
+
+    def test_submenu(self):
+        """Test that cmd.Cmd submenus get input a timed read left. (None)"""
+        self.send(b'spam\na\nquit\ne\n')
+        self.assertEqual(readline(self.read_file, 1), 'spam\n')
+        menu = TopMenu(self.read_file, io.StringIO())
+        menu.menuloop()
+        self.assertEqual(menu.lastchoice, 'e')
+        self.assertIn('In the maze: ', menu.stdout.getvalue())
+
+    def test_timeout(self):
+        """Test a read that runs out of time. (None)"""
+        with self.assertRaises(InputTimeout):
+            readline(self.read_file, 0.05)
+        self.send(b'spam\n')
+        self.assertEqual(readline(self.read_file, 0.05), 'spam\n')
+
+@unittest.skipIf(pty is None, 'pseudo-terminals are not available')
+class PtyTest(PipeTest):
+    """
+    Tests of timed reads from a pseudo-terminal. (PipeTest)
+
+    Methods:
+    test_terminal_input: Test that input() is used on a terminal without a timeout. (None)
+    test_terminal_pending: Test that input() doesn't skip input a timed read left. (None)
+
+    Overridden Methods:
+    open
+    test_pending_input
+    """
+
+    def open(self):
+        """Open the files read and written in the tests. (tuple of file, int)"""
+        write_fd, read_fd = pty.openpty()
+        return open(read_fd, 'r'), write_fd
+
+    def test_pending_input(self):
+        """Test that untimed reads get input a timed read left. (None)"""
+        # A terminal only gives more than a line at a time in raw mode.
+        tty.setraw(self.read_file.fileno())
+        super().test_pending_input()
+
+    def test_terminal_input(self):
+        """Test that input() is used on a terminal without a timeout. (None)"""
+        self.send(b'spam\n')
+        terminal_out = open(os.dup(self.read_file.fileno()), 'w')
+        with mock.patch('sys.stdin', self.read_file), mock.patch('sys.stdout', terminal_out):
+            self.assertEqual(readline(sys.stdin, 1), 'spam\n')
+            with mock.patch('builtins.input', return_value = 'eggs') as mock_input:
+                self.assertEqual(timed_input('Menu\nNext: '), 'eggs')
+        terminal_out.close()
+        mock_input.assert_called_once_with('Next: ')
+
+    def test_terminal_pending(self):
+        """Test that input() doesn't skip input a timed read left. (None)"""
+        tty.setraw(self.read_file.fileno())
+        self.send(b'spam\neggs\n')
+        terminal_out = open(os.dup(self.read_file.fileno()), 'w')
+        with mock.patch('sys.stdin', self.read_file), mock.patch('sys.stdout', terminal_out):
+            self.assertEqual(readline(sys.stdin, 1), 'spam\n')
+            with mock.patch('builtins.input', side_effect = AssertionError('input() was used')):
+                self.assertEqual(timed_input('Next: '), 'eggs')
+        terminal_out.close()
+
+if __name__ == '__main__':
+    unittest.main()
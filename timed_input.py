@@ -0,0 +1,352 @@
+"""
+timed_input.py
+
+Input with timeouts and deadlines.
+
+The built-in input function and the readline method of files block until the
+user enters something, so a time limit can only be checked after they do. A
+TimedReader reads from the file's descriptor itself, waiting on it with a
+selector, so a read can give up when its time runs out. Nothing polls while
+waiting, so idle sessions cost no processor time.
+
+    reader = TimedReader.wrap(sys.stdin)
+    line = reader.readline(timeout = 30)
+
+A Deadline covers several reads, such as all of the input for one action:
+
+    deadline = Deadline(120)
+    while not deadline.expired():
+        text = readline(reader, deadline.remaining())
+
+Reads that run out of time raise InputTimeout. Files that can't be waited on,
+like io.StringIO objects or journal replays, are read normally. They never
+block, so they never time out.
+
+A file is only wrapped in a TimedReader the first time it is read with a
+timeout. Reads without a timeout use the file itself, or its reader if it has
+one, so that input the reader has already taken isn't skipped. Reading from the
+real standard input of a terminal without a timeout uses the built-in input
+function, so the user keeps line editing and history.
+
+Classes:
+Deadline: A time limit for a series of reads. (object)
+InputTimeout: A read ran out of time. (TimeoutError)
+TimedReader: An input file with timed reads. (object)
+
+Functions:
+is_terminal: Check if files are all attached to a terminal. (bool)
+readline: Read a line from a file, with a timeout if the file allows it. (str)
+timed_input: Show a prompt and get a line of input, with a timeout. (str)
+"""
+
+import io
+import os
+import selectors
+import sys
+import time
+
+class Deadline(object):
+    """
+    A time limit for a series of reads. (object)
+
+    Attributes:
+    end: The time the deadline passes, on the time.monotonic clock. (float)
+    seconds: The length of the time limit. (float)
+
+    Methods:
+    expired: Check if the deadline has passed. (bool)
+    remaining: Get the seconds left before the deadline. (float)
+
+    Overridden Methods:
+    __init__
+    """
+
+    def __init__(self, seconds):
+        """
+        Start the time limit. (None)
+
+        Parameters:
+        seconds: The length of the time limit. (float)
+        """
+        self.seconds = seconds
+        self.end = time.monotonic() + seconds
+
+    def expired(self):
+        """Check if the deadline has passed. (bool)"""
+        return time.monotonic() >= self.end
+
+    def remaining(self):
+        """Get the seconds left before the deadline. (float)"""
+        return max(self.end - time.monotonic(), 0.0)
+
+class InputTimeout(TimeoutError):
+    """A read ran out of time. (TimeoutError)"""
+    pass
+
+class TimedReader(object):
+    """
+    An input file with timed reads. (object)
+
+    The reader takes over the file's descriptor, so everything should read
+    through the reader once it is made. Use wrap to get the reader for a file,
+    so that everything reading the same descriptor shares one reader. Any input
+    the file read into its own buffers before it was wrapped is moved into the
+    reader, since reading the descriptor would skip it.
+
+    Class Attributes:
+    readers: The readers made by wrap, by file descriptor. (dict of int: TimedReader)
+
+    Attributes:
+    buffer: The input read but not yet returned. (bytearray)
+    encoding: The encoding of the input. (str)
+    fd: The file descriptor being read. (int)
+    position: The start of the input in the buffer not yet returned. (int)
+    selector: The selector for waiting on the file descriptor. (selectors.BaseSelector)
+    stream: The file being read. (file)
+
+    Methods:
+    close: Stop waiting on the file and forget the reader. (None)
+    drain: Move input the file has already read into the reader. (None)
+    fileno: Get the file descriptor being read. (int)
+    find: Get the reader already made for a file, if there is one. (TimedReader or None)
+    pending: Check if input has been read but not yet returned. (bool)
+    readline: Read a line, waiting no longer than the timeout. (str)
+    wrap: Get a reader for a file, if it can be waited on. (object)
+
+    Overridden Methods:
+    __init__
+    __iter__
+    """
+
+    # The readers made by wrap, by file descriptor.
+    readers = {}
+
+    def __init__(self, stream, selector):
+        """
+        Set up the reader. (None)
+
+        Parameters:
+        stream: The file to read. (file)
+        selector: A selector with the file registered for reading. (selectors.BaseSelector)
+        """
+        self.stream = stream
+        self.fd = stream.fileno()
+        self.selector = selector
+        self.encoding = getattr(stream, 'encoding', None) or 'utf-8'
+        self.buffer = bytearray()
+        self.position = 0
+        self.drain()
+
+    def __iter__(self):
+        """Iterate over the lines of input. (generator)"""
+        return iter(self.readline, '')
+
+    def close(self):
+        """Stop waiting on the file and forget the reader. (None)"""
+        self.selector.close()
+        if self.readers.get(self.fd) is self:
+            del self.readers[self.fd]
+
+    def drain(self):
+        """
+        Move input the file has already read into the reader. (None)
+
+        Reading a file object, even a line at a time, can read ahead into its
+        buffers, where reads of the descriptor can't see it. The descriptor is
+        made non-blocking for the drain, so only input that is already there is
+        taken. Text files are read a character at a time, since a larger read
+        would lose what it had gathered when the input runs dry.
+        """
+        blocking = os.get_blocking(self.fd)
+        os.set_blocking(self.fd, False)
+        try:
+            if isinstance(self.stream, io.TextIOBase):
+                # Decoded text is encoded again the way it was decoded.
+                errors = getattr(self.stream, 'errors', None) or 'strict'
+                text = []
+                while True:
+                    try:
+                        char = self.stream.read(1)
+                    except (BlockingIOError, TypeError):
+                        # Text files raise TypeError when the descriptor has no input ready.
+                        break
+                    if not char:
+                        break
+                    text.append(char)
+                self.buffer.extend(''.join(text).encode(self.encoding, errors))
+            else:
+                read = getattr(self.stream, 'read1', self.stream.read)
+                while True:
+                    try:
+                        data = read(65536)
+                    except BlockingIOError:
+                        break
+                    if not data:
+                        break
+                    self.buffer.extend(data)
+        finally:
+            os.set_blocking(self.fd, blocking)
+
+    def fileno(self):
+        """Get the file descriptor being read. (int)"""
+        return self.fd
+
+    @classmethod
+    def find(cls, stream):
+        """
+        Get the reader already made for a file, if there is one. (TimedReader or None)
+
+        Parameters:
+        stream: The file being read. (file)
+        """
+        if isinstance(stream, cls):
+            return stream
+        try:
+            reader = cls.readers.get(stream.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+        if reader is not None and reader.stream is stream:
+            return reader
+        return None
+
+    def pending(self):
+        """Check if input has been read but not yet returned. (bool)"""
+        return self.position < len(self.buffer)
+
+    def readline(self, timeout = None):
+        """
+        Read a line, waiting no longer than the timeout. (str)
+
+        The line includes the line ending, and is empty at the end of the file.
+        An InputTimeout is raised if the line isn't finished in time. Any part
+        of the line read before then is kept for the next read.
+
+        Parameters:
+        timeout: The seconds to wait, or None to wait as long as it takes. (float or None)
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        buffer = self.buffer
+        while True:
+            # Return a line if one has been read.
+            line_end = buffer.find(b'\n', self.position)
+            if line_end >= 0:
+                line = buffer[self.position:line_end + 1]
+                self.position = line_end + 1
+                return line.decode(self.encoding, 'replace')
+            # Wait for more input, without polling.
+            if end is not None:
+                wait = max(end - time.monotonic(), 0)
+                if not self.selector.select(wait):
+                    raise InputTimeout('No input within {} seconds.'.format(timeout))
+            del buffer[:self.position]
+            self.position = 0
+            data = os.read(self.fd, 65536)
+            # At the end of the file, return whatever is left.
+            if not data:
+                line = bytes(buffer)
+                buffer.clear()
+                return line.decode(self.encoding, 'replace')
+            buffer.extend(data)
+
+    @classmethod
+    def wrap(cls, stream):
+        """
+        Get a reader for a file, if it can be waited on. (object)
+
+        The return value is the reader already made for the file, a new reader
+        if there isn't one, or the file itself if it has no descriptor or can't
+        be waited on. A new reader takes any input the file has read ahead, and
+        replaces a reader left on the same descriptor by another file.
+
+        Parameters:
+        stream: The file to read. (file)
+        """
+        reader = cls.find(stream)
+        if reader is not None:
+            return reader
+        try:
+            fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            return stream
+        # Some files, like regular files, can't be waited on, but never block anyway.
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(fd, selectors.EVENT_READ)
+        except (OSError, ValueError):
+            selector.close()
+            return stream
+        old_reader = cls.readers.get(fd)
+        if old_reader is not None:
+            old_reader.close()
+        reader = cls(stream, selector)
+        cls.readers[fd] = reader
+        return reader
+
+def is_terminal(*streams):
+    """
+    Check if files are all attached to a terminal. (bool)
+
+    Parameters:
+    *streams: The files to check.
+    """
+    try:
+        return all(stream.isatty() for stream in streams)
+    except (AttributeError, ValueError):
+        return False
+
+def readline(stream, timeout = None):
+    """
+    Read a line from a file, with a timeout if the file allows it. (str)
+
+    With a timeout, the file is wrapped in a TimedReader if it can be waited
+    on. Without one, the file is read through its reader if it already has one,
+    and directly if it doesn't.
+
+    Parameters:
+    stream: The file to read from. (file)
+    timeout: The seconds to wait, or None to wait as long as it takes. (float or None)
+    """
+    if timeout is not None:
+        stream = TimedReader.wrap(stream)
+        if isinstance(stream, TimedReader):
+            return stream.readline(timeout)
+        return stream.readline()
+    reader = TimedReader.find(stream)
+    return (stream if reader is None else reader).readline()
+
+def timed_input(prompt = '', timeout = None, stdin = None, stdout = None):
+    """
+    Show a prompt and get a line of input, with a timeout. (str)
+
+    This works like the built-in input function, but raises InputTimeout if
+    the timeout runs out first. The prompt is written in one write, and may be
+    more than one line long.
+
+    If the files are the real standard input and output, they are a terminal,
+    and there is no timeout, the built-in input function is used, for its line
+    editing and history. The last line of the prompt is passed to it, and the
+    lines before it are written first. This is skipped if an earlier timed
+    read left input waiting in the file's TimedReader, so it isn't lost.
+
+    Parameters:
+    prompt: The text displayed when getting the input. (str)
+    timeout: The seconds to wait, or None to wait as long as it takes. (float or None)
+    stdin: The file to read from, or None for standard input. (file)
+    stdout: The file to show the prompt on, or None for standard output. (file)
+    """
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    # Input left in a reader by a timed read would be skipped by input().
+    reader = TimedReader.find(stdin)
+    waiting = reader is not None and reader.pending()
+    if timeout is None and not waiting and stdin is sys.stdin and stdout is sys.stdout and is_terminal(stdin, stdout):
+        head, newline, prompt = prompt.rpartition('\n')
+        if newline:
+            stdout.write(head + newline)
+        return input(prompt)
+    stdout.write(prompt)
+    stdout.flush()
+    line = readline(stdin, timeout)
+    if not line:
+        raise EOFError('EOF when reading a line')
+    return line.rstrip('\n')